@@ -0,0 +1,109 @@
+"""
+Benchmark de la lectura de la página cruda: str decodificado vs bytes (S3 o almacén local).
+
+- "str": lectura completa + decode('utf-8') y el parser recibe el str (ruta anterior de
+  download_from_s3);
+- "bytes": el parser recibe los bytes del objeto y resuelve la codificación (ruta actual);
+- "local": almacén local (RAW_STORE_PATH), read_local_raw lee los bytes del archivo.
+
+Cada combinación corre en un intérprete nuevo para que el pico de RSS (ru_maxrss) sea
+comparable; se reporta el crecimiento del pico sobre el RSS después de importar y calentar.
+La página lleva comillas tipográficas (como las portadas reales), así que el str ocupa
+2 bytes por carácter.
+
+Uso: python -m benchmarks.bytes_parsing [MB] [repeticiones]
+"""
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import generate_page_of_size
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SITE = "elespectador"
+BASE_URL = "https://www.elespectador.com/"
+MODES = ("str", "bytes", "local")
+
+
+def write_page(directory, size_mb):
+    """Escribe la portada sintética como lo haría punto1. Retorna la llave relativa."""
+    html = generate_page_of_size(SITE, size_mb, seed=5, nesting=2).replace("<h2", "<h2 title=\"“portada”\"", 1)
+    key = f"headlines/raw/{SITE}-2025-01-01.html"
+    path = os.path.join(directory, *key.split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(html.encode("utf-8"))
+    return key
+
+
+def _peak_rss_mb():
+    # En Linux ru_maxrss está en KB (en macOS en bytes)
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / (1024 * 1024)
+
+
+def _child(directory, key, backend, mode, repetitions):
+    """Corre dentro del intérprete nuevo: carga la página según `mode` y extrae."""
+    from punto2 import app
+
+    path = os.path.join(directory, *key.split("/"))
+
+    def load():
+        if mode == "local":
+            return app.read_local_raw(key, root=directory)[0]
+        with open(path, "rb") as f:
+            raw = f.read()
+        return raw.decode("utf-8") if mode == "str" else raw
+
+    app.extract_news_data("<html></html>", BASE_URL, SITE, backend=backend) # Calienta imports
+    baseline = _peak_rss_mb()
+    times, rows = [], 0
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        rows = len(app.extract_news_data(load(), BASE_URL, SITE, backend=backend))
+        times.append(time.perf_counter() - start)
+    print(json.dumps({"rows": rows, "seconds": min(times), "peak_mb": _peak_rss_mb() - baseline}))
+
+
+def measure(directory, key, backend, mode, repetitions=3):
+    env = dict(os.environ, PYTHONPATH=ROOT, LOG_LEVEL="ERROR", METRICS_MODE="off")
+    result = subprocess.run([sys.executable, "-m", "benchmarks.bytes_parsing", "--child", directory, key,
+                             backend, mode, str(repetitions)],
+                            capture_output=True, text=True, cwd=ROOT, env=env, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run(size_mb=5, repetitions=3, backends=None):
+    from punto2.parsers import available_backends
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        key = write_page(directory, size_mb)
+        for backend in backends or available_backends():
+            for mode in MODES:
+                results[(backend, mode)] = measure(directory, key, backend, mode, repetitions)
+    return results
+
+
+def report(results):
+    print(f"{'backend':<13}{'entrada':<8}{'filas':>7}{'s':>8}{'pico RSS MB':>13}{'vs str':>9}")
+    for (backend, mode), r in results.items():
+        reference = results[(backend, "str")]
+        speedup = reference["seconds"] / r["seconds"] if r["seconds"] else 0
+        print(f"{backend:<13}{mode:<8}{r['rows']:>7}{r['seconds']:>8.3f}{r['peak_mb']:>13.1f}{speedup:>8.2f}x")
+
+
+def main(argv):
+    if argv[:1] == ["--child"]:
+        return _child(argv[1], argv[2], argv[3], argv[4], int(argv[5]))
+    size_mb = float(argv[0]) if argv else 5
+    repetitions = int(argv[1]) if len(argv) > 1 else 3
+    report(run(size_mb, repetitions))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,58 @@
+"""
+Benchmark de latencia por invocación con clientes compartidos vs clientes nuevos.
+
+Simula invocaciones en caliente de punto2 (descarga + subida) contra un S3 de moto.
+"Antes" descarta los clientes en cada invocación, como hacía el código original.
+
+Uso: python -m benchmarks.client_reuse [invocaciones]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "sa-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+
+from moto import mock_aws
+
+from common import clients
+from punto2 import app as app2
+
+
+def invocation():
+    html, _ = app2.download_from_s3(app2.S3_BUCKET_NAME, f"{app2.S3_RAW_PREFIX}/eltiempo-2025-01-01.html")
+    app2.upload_to_s3(html, f"{app2.S3_FINAL_PREFIX}/bench.csv")
+    app2.upload_to_s3(html, f"{app2.S3_FINAL_PREFIX}/bench2.csv")
+
+
+def measure(invocations, reuse):
+    times = []
+    for _ in range(invocations):
+        if not reuse:
+            clients.reset_clients()
+        start = time.perf_counter()
+        invocation()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return 1000 * times[len(times) // 2], 1000 * times[int(len(times) * 0.95) - 1]
+
+
+def run(invocations=50):
+    with mock_aws():
+        clients.reset_clients()
+        s3 = app2.get_s3_client()
+        s3.create_bucket(Bucket=app2.S3_BUCKET_NAME, CreateBucketConfiguration={"LocationConstraint": "sa-east-1"})
+        s3.put_object(Bucket=app2.S3_BUCKET_NAME, Key=f"{app2.S3_RAW_PREFIX}/eltiempo-2025-01-01.html", Body=b"<html></html>")
+
+        before = measure(invocations, reuse=False)
+        after = measure(invocations, reuse=True)
+        clients.reset_clients()
+
+    print(f"{'modo':<22}{'p50 ms':>10}{'p95 ms':>10}")
+    print(f"{'clientes por llamada':<22}{before[0]:>10.2f}{before[1]:>10.2f}")
+    print(f"{'clientes compartidos':<22}{after[0]:>10.2f}{after[1]:>10.2f}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -0,0 +1,190 @@
+"""
+Medición del arranque en frío de las tres Lambdas, cada una en un intérprete nuevo.
+
+Por handler reporta:
+- el tiempo de importación según `python -X importtime` y los módulos que más aportan;
+- el tiempo de importación y de la primera invocación medidos en el proceso hijo, contra un
+  endpoint AWS falso local (AWS_ENDPOINT_URL), así la medición no depende de la red;
+- qué dependencias pesadas quedaron cargadas después de importar el handler.
+
+Uso: python -m benchmarks.cold_start [repeticiones]
+
+La prueba test/cold_start_test.py falla si un handler vuelve a cargar una dependencia pesada
+al importarse y, con COLD_START_BUDGETS=1, si supera BUDGETS_MS.
+"""
+import json
+import os
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.synthetic import generate_front_page
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("boto3", "botocore.client", "bs4", "requests", "s3transfer", "multiprocessing")
+# Presupuestos en milisegundos (holgados: la máquina de CI es más lenta que un contenedor Lambda)
+BUDGETS_MS = {
+    "punto1": {"import": 150, "first_invocation": 2500},
+    "punto2": {"import": 250, "first_invocation": 3000},
+    "punto3": {"import": 150, "first_invocation": 2000},
+}
+HANDLERS = {
+    "punto1": "punto1.app",
+    "punto2": "punto2.app",
+    "punto3": "punto3.app",
+}
+RAW_KEY = "headlines/raw/eltiempo-2025-01-15.html"
+
+
+class FakeAWSHandler(BaseHTTPRequestHandler):
+    """
+    Responde lo mínimo que usan los handlers: GetObject/PutObject de S3 (direcciones path-style
+    /bucket/llave), StartCrawler de Glue (POST JSON) y la portada que descarga punto1 (/sitio).
+    """
+    protocol_version = "HTTP/1.1"
+    objects = {}
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=b"", content_type="application/xml", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path.startswith("/sitio"):
+            return self._send(200, self.server.page, "text/html; charset=utf-8")
+        body = self.objects.get(path)
+        if body is None:
+            error = b"<Error><Code>NoSuchKey</Code><Message>No existe</Message></Error>"
+            return self._send(404, error)
+        return self._send(200, body, "text/html", {"ETag": '"fake"'})
+
+    def do_PUT(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.objects[self.path.split("?", 1)[0]] = self.rfile.read(length)
+        self._send(200, headers={"ETag": '"fake"'})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        if self.headers.get("X-Amz-Target", "").startswith("AWSGlue."):
+            return self._send(200, b"{}", "application/x-amz-json-1.1")
+        self._send(200, b"<DeleteResult></DeleteResult>")
+
+
+def start_fake_aws():
+    """Levanta el endpoint falso en un hilo. Retorna (servidor, url)."""
+    page = generate_front_page("eltiempo", n_cards=200, seed=3).encode("utf-8")
+    FakeAWSHandler.objects = {f"/parcial3luis/{RAW_KEY}": page}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeAWSHandler)
+    server.page = page
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def child_env(endpoint_url):
+    env = dict(os.environ)
+    env.update({
+        "AWS_ENDPOINT_URL": endpoint_url,
+        "AWS_ACCESS_KEY_ID": "testing",
+        "AWS_SECRET_ACCESS_KEY": "testing",
+        "AWS_DEFAULT_REGION": "us-east-1",
+        "SCRAPER_SITES": json.dumps([{"name": "eltiempo", "url": f"{endpoint_url}/sitio"}]),
+        "LOG_LEVEL": "ERROR",
+        "METRICS_MODE": "off",
+        "PYTHONPATH": ROOT,
+    })
+    env.pop("PREWARM", None)
+    return env
+
+
+def importtime(module):
+    """Ejecuta `python -X importtime -c 'import module'`. Retorna (total_ms, [(módulo, propio_ms)])."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, cwd=ROOT, check=True)
+    total_us, self_times = 0, []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        self_times.append((name, int(self_us) / 1000))
+        if name == module:
+            total_us = int(cumulative_us)
+    return total_us / 1000, sorted(self_times, key=lambda item: item[1], reverse=True)
+
+
+def first_invocation(name, endpoint_url):
+    """Importa e invoca el handler en un intérprete nuevo. Retorna el JSON que imprime el hijo."""
+    result = subprocess.run([sys.executable, "-m", "benchmarks.cold_start", "--child", name],
+                            capture_output=True, text=True, cwd=ROOT, env=child_env(endpoint_url), check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _child(name):
+    """Corre dentro del intérprete nuevo: mide import y primera invocación."""
+    import importlib
+    import time
+
+    start = time.perf_counter()
+    module = importlib.import_module(HANDLERS[name])
+    imported = time.perf_counter()
+    loaded = [heavy for heavy in HEAVY_MODULES if heavy in sys.modules]
+    if name == "punto1":
+        response = module.handler(None, None)
+    elif name == "punto2":
+        event = {"Records": [{"s3": {"bucket": {"name": "parcial3luis"}, "object": {"key": RAW_KEY}}}]}
+        response = module.handler(event, None)
+    else:
+        response = {"statusCode": 200}
+        module.handler(module.CRAWLER_NAME)
+    finished = time.perf_counter()
+    print(json.dumps({
+        "import_ms": (imported - start) * 1000,
+        "first_invocation_ms": (finished - imported) * 1000,
+        "heavy_modules_after_import": loaded,
+        "status": response.get("statusCode"),
+    }))
+
+
+def measure(repetitions=3):
+    """Mejor tiempo de `repetitions` arranques por handler."""
+    server, endpoint_url = start_fake_aws()
+    results = {}
+    try:
+        for name, module in HANDLERS.items():
+            runs = [first_invocation(name, endpoint_url) for _ in range(repetitions)]
+            total_ms, offenders = importtime(module)
+            results[name] = {
+                "importtime_ms": total_ms,
+                "import_ms": min(run["import_ms"] for run in runs),
+                "first_invocation_ms": min(run["first_invocation_ms"] for run in runs),
+                "heavy_modules_after_import": runs[0]["heavy_modules_after_import"],
+                "status": runs[0]["status"],
+                "top_imports": offenders[:5],
+            }
+    finally:
+        server.shutdown()
+    return results
+
+
+def main(argv):
+    if argv[:1] == ["--child"]:
+        return _child(argv[1])
+    results = measure(int(argv[0]) if argv else 3)
+    print(f"{'handler':<9}{'importtime ms':>15}{'import ms':>11}{'1a invocación ms':>18}{'status':>8}  pesadas al importar")
+    for name, r in results.items():
+        print(f"{name:<9}{r['importtime_ms']:>15.1f}{r['import_ms']:>11.1f}{r['first_invocation_ms']:>18.1f}"
+              f"{r['status']:>8}  {', '.join(r['heavy_modules_after_import']) or '-'}")
+        print("         " + ", ".join(f"{module} {ms:.1f}" for module, ms in r["top_imports"]))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,163 @@
+"""
+Suite de benchmarks de extract_news_data sobre portadas sintéticas con línea base guardada.
+
+Por escenario (periódico, tamaño y anidamiento) reporta el tiempo de parseo, el tiempo de
+extracción (selectores sobre el árbol ya parseado), filas por segundo y el pico de memoria.
+Los tiempos se normalizan con una carga de calibración en Python puro para poder comparar
+la línea base entre máquinas distintas; las filas deben coincidir exactamente.
+
+Uso:
+    python -m benchmarks.extraction [--size-mb 2 5] [--nesting 1 3] [--update-baseline]
+
+Con BENCHMARK_BASELINE=1 la prueba test/benchmark_test.py compara contra BASELINE_PATH.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import time
+import tracemalloc
+
+from benchmarks.synthetic import generate_page_of_size
+from punto2.app import extract_news_data
+from punto2.parsers import parse_html
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "extraction_baseline.json")
+SITES = {"eltiempo": "https://www.eltiempo.com/", "elespectador": "https://www.elespectador.com/"}
+SEED = 7
+TIME_TOLERANCE = float(os.environ.get("BENCHMARK_TOLERANCE", "2.0")) # Factor permitido sobre la línea base
+MEMORY_TOLERANCE = 1.5
+
+
+def scenarios(sizes_mb=(0.25,), nestings=(1, 3)):
+    """Escenarios (nombre, periódico, tamaño, anidamiento). El anidamiento solo aplica a El Espectador."""
+    result = []
+    for site in SITES:
+        for size_mb in sizes_mb:
+            for nesting in (nestings if site == "elespectador" else (1,)):
+                result.append((f"{site}-{size_mb:g}mb-n{nesting}", site, size_mb, nesting))
+    return result
+
+
+def calibrate(repetitions=5):
+    """Tiempo de una carga fija en Python puro; sirve de unidad para comparar entre máquinas."""
+    best = float("inf")
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        acc = {}
+        for i in range(200_000):
+            key = f"k{i % 997}"
+            acc[key] = acc.get(key, 0) + len(key)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _best_time(func, repetitions):
+    best, result = float("inf"), None
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def measure(site, size_mb, nesting=1, backend=None, repetitions=3):
+    """Mide un escenario. Retorna parse_s, extract_s, total_s, rows, rows_per_s y peak_mb."""
+    html = generate_page_of_size(site, size_mb, seed=SEED, nesting=nesting)
+    base_url = SITES[site]
+
+    def extract():
+        with contextlib.redirect_stdout(io.StringIO()): # Silencia los logs del extractor
+            return extract_news_data(html, base_url, site, backend=backend)
+
+    parse_s, _ = _best_time(lambda: parse_html(html, backend), repetitions)
+    total_s, rows = _best_time(extract, repetitions)
+
+    tracemalloc.start() # Corrida aparte: tracemalloc hace más lento todo lo que mide
+    try:
+        extract()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "html_mb": round(len(html.encode("utf-8")) / (1024 * 1024), 2),
+        "parse_s": parse_s,
+        "extract_s": max(total_s - parse_s, 0.0),
+        "total_s": total_s,
+        "rows": len(rows),
+        "rows_per_s": len(rows) / total_s if total_s else 0.0,
+        "peak_mb": peak / (1024 * 1024),
+    }
+
+
+def run(scenario_list, backend=None, repetitions=3):
+    """Mide todos los escenarios y agrega los tiempos normalizados por la calibración."""
+    unit = calibrate()
+    results = {}
+    for name, site, size_mb, nesting in scenario_list:
+        result = measure(site, size_mb, nesting, backend, repetitions)
+        result["parse_norm"] = result["parse_s"] / unit
+        result["total_norm"] = result["total_s"] / unit
+        results[name] = result
+    return results
+
+
+def load_baseline(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    baseline = load_baseline(path)
+    for name, result in results.items():
+        baseline[name] = {key: round(result[key], 3) for key in ("rows", "parse_norm", "total_norm", "peak_mb")}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(name, result, baseline, time_tolerance=TIME_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE):
+    """Lista de regresiones de `result` frente a la línea base del escenario (vacía si no hay)."""
+    expected = baseline[name]
+    problems = []
+    if result["rows"] != expected["rows"]:
+        problems.append(f"{name}: {result['rows']} filas, la línea base tiene {expected['rows']}")
+    for key in ("parse_norm", "total_norm"):
+        if result[key] > expected[key] * time_tolerance:
+            problems.append(f"{name}: {key} {result[key]:.2f} supera {time_tolerance}x la línea base ({expected[key]:.2f})")
+    if result["peak_mb"] > expected["peak_mb"] * memory_tolerance:
+        problems.append(f"{name}: pico de {result['peak_mb']:.1f} MB supera {memory_tolerance}x la línea base ({expected['peak_mb']:.1f} MB)")
+    return problems
+
+
+def report(results, baseline):
+    print(f"{'escenario':<24}{'MB':>6}{'filas':>7}{'parseo s':>10}{'extrac. s':>10}{'filas/s':>10}{'pico MB':>9}  estado")
+    for name, r in results.items():
+        status = "sin línea base" if name not in baseline else ("; ".join(compare(name, r, baseline)) or "ok")
+        print(f"{name:<24}{r['html_mb']:>6}{r['rows']:>7}{r['parse_s']:>10.3f}{r['extract_s']:>10.3f}"
+              f"{r['rows_per_s']:>10.0f}{r['peak_mb']:>9.1f}  {status}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de extracción sobre portadas sintéticas.")
+    parser.add_argument("--size-mb", type=float, nargs="+", default=[2, 5])
+    parser.add_argument("--nesting", type=int, nargs="+", default=[1, 3])
+    parser.add_argument("--backend", default=None)
+    parser.add_argument("--repetitions", type=int, default=3)
+    parser.add_argument("--update-baseline", action="store_true", help="Guarda los resultados como línea base")
+    args = parser.parse_args(argv)
+
+    results = run(scenarios(args.size_mb, args.nesting), args.backend, args.repetitions)
+    baseline = load_baseline()
+    report(results, baseline)
+    if args.update_baseline:
+        save_baseline(results)
+        print(f"Línea base actualizada en {BASELINE_PATH}")
+
+
+if __name__ == "__main__":
+    main()
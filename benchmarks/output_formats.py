@@ -0,0 +1,77 @@
+"""
+Benchmark de formatos de salida para headlines/final: CSV delimitado por '>' vs Parquet.
+
+Genera un mes de titulares sintéticos (dos periódicos, un archivo por día), y mide bytes
+escritos, tiempo de lectura completa y tiempo de un "scan" por categoría (lo que haría Athena).
+
+Uso: python -m benchmarks.output_formats [filas_por_día]
+"""
+import csv
+import io
+import random
+import sys
+import time
+
+from benchmarks.synthetic import CATEGORIES, WORDS
+from punto2.app import rows_to_csv, rows_to_parquet
+
+
+def synthetic_day(periodico, day, rows_per_day, rng):
+    return [
+        {
+            "category": rng.choice(CATEGORIES),
+            "title": " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 14))).capitalize(),
+            "link": f"https://www.{periodico}.com/{rng.choice(CATEGORIES).lower()}/2025-01-{day:02d}-noticia-{i}",
+        }
+        for i in range(rows_per_day)
+    ]
+
+
+def read_csv(content):
+    return list(csv.DictReader(io.StringIO(content), delimiter=">"))
+
+
+def scan_csv(content, category):
+    return sum(1 for row in csv.DictReader(io.StringIO(content), delimiter=">") if row["category"] == category)
+
+
+def read_parquet(content):
+    import pyarrow.parquet as pq
+    return pq.read_table(io.BytesIO(content))
+
+
+def scan_parquet(content, category):
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+    column = pq.read_table(io.BytesIO(content), columns=["category"]).column("category")
+    return pc.sum(pc.equal(column.cast("string"), category)).as_py() or 0
+
+
+def run(rows_per_day=400):
+    rng = random.Random(5)
+    files = [synthetic_day(p, d, rows_per_day, rng) for p in ("eltiempo", "elespectador") for d in range(1, 31)]
+    formats = {
+        "csv": (rows_to_csv, read_csv, scan_csv),
+        "parquet": (rows_to_parquet, read_parquet, scan_parquet),
+    }
+
+    print(f"{'formato':<10}{'bytes':>12}{'escritura s':>13}{'lectura s':>11}{'scan s':>9}{'coincidencias':>15}")
+    for name, (write, read, scan) in formats.items():
+        start = time.perf_counter()
+        contents = [write(rows) for rows in files]
+        write_time = time.perf_counter() - start
+        size = sum(len(c.encode("utf-8") if isinstance(c, str) else c) for c in contents)
+
+        start = time.perf_counter()
+        for content in contents:
+            read(content)
+        read_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        matches = sum(scan(content, "Política") for content in contents)
+        scan_time = time.perf_counter() - start
+        print(f"{name:<10}{size:>12}{write_time:>13.3f}{read_time:>11.3f}{scan_time:>9.3f}{matches:>15}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 400)
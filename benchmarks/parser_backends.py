@@ -0,0 +1,38 @@
+"""
+Benchmark de backends de parseo para extract_news_data: páginas por segundo por backend.
+
+Uso: python -m benchmarks.parser_backends [tamaño_en_MB] [repeticiones]
+"""
+import contextlib
+import io
+import sys
+import time
+
+from benchmarks.synthetic import generate_page_of_size
+from punto2.app import extract_news_data
+from punto2.parsers import available_backends
+
+SITES = {"eltiempo": "https://www.eltiempo.com/", "elespectador": "https://www.elespectador.com/"}
+
+
+def run(size_mb=2, repetitions=3):
+    print(f"{'periódico':<14}{'backend':<14}{'filas':>8}{'s/página':>10}{'páginas/s':>11}")
+    for site, base_url in SITES.items():
+        html = generate_page_of_size(site, size_mb, seed=7)
+        reference = None
+        for backend in available_backends():
+            times = []
+            for _ in range(repetitions):
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()): # Silencia los logs del extractor
+                    rows = extract_news_data(html, base_url, site, backend=backend)
+                times.append(time.perf_counter() - start)
+            if reference is None:
+                reference = rows
+            parity = "" if rows == reference else "  (¡filas distintas!)"
+            best = min(times)
+            print(f"{site:<14}{backend:<14}{len(rows):>8}{best:>10.3f}{1 / best:>11.2f}{parity}")
+
+
+if __name__ == "__main__":
+    run(float(sys.argv[1]) if len(sys.argv) > 1 else 2, int(sys.argv[2]) if len(sys.argv) > 2 else 3)
@@ -0,0 +1,45 @@
+"""
+Benchmark del parseo parcial (PARTIAL_PARSE) vs árbol completo: tiempo y memoria pico.
+
+Uso: python -m benchmarks.partial_parse [tamaño_en_MB]
+"""
+import contextlib
+import io
+import sys
+import time
+import tracemalloc
+
+from benchmarks.synthetic import generate_page_of_size
+from punto2.app import extract_news_data
+from punto2.parsers import available_backends
+
+SITES = {"eltiempo": "https://www.eltiempo.com/", "elespectador": "https://www.elespectador.com/"}
+
+
+def measure(html, base_url, site, backend, partial):
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        rows = extract_news_data(html, base_url, site, backend=backend, partial=partial)
+        elapsed = time.perf_counter() - start
+
+        tracemalloc.start()
+        extract_news_data(html, base_url, site, backend=backend, partial=partial)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return rows, elapsed, peak
+
+
+def run(size_mb=3):
+    print(f"{'periódico':<14}{'backend':<13}{'modo':<10}{'filas':>7}{'tiempo s':>10}{'pico MB':>10}")
+    for site, base_url in SITES.items():
+        html = generate_page_of_size(site, size_mb, seed=11)
+        for backend in [b for b in available_backends() if b != "selectolax"]:
+            full_rows, full_time, full_peak = measure(html, base_url, site, backend, partial=False)
+            rows, elapsed, peak = measure(html, base_url, site, backend, partial=True)
+            parity = "" if rows == full_rows else "  (¡filas distintas!)"
+            print(f"{site:<14}{backend:<13}{'completo':<10}{len(full_rows):>7}{full_time:>10.3f}{full_peak / 2**20:>10.1f}")
+            print(f"{site:<14}{backend:<13}{'parcial':<10}{len(rows):>7}{elapsed:>10.3f}{peak / 2**20:>10.1f}{parity}")
+
+
+if __name__ == "__main__":
+    run(float(sys.argv[1]) if len(sys.argv) > 1 else 3)
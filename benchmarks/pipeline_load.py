@@ -0,0 +1,416 @@
+"""
+Arnés de carga local de la cadena completa punto1 -> punto2 -> punto3, sin AWS ni periódicos.
+
+- Portadas: un servidor HTTP local sirve una portada sintética por sitio y día (o capturas
+  grabadas de un directorio con --pages, p. ej. un headlines/raw/ descargado).
+- S3 y Glue: moto. Cada PutObject / CompleteMultipartUpload exitoso se convierte en un
+  evento S3 sintético (ObjectCreated:Put / ObjectCreated:CompleteMultipartUpload) y se enruta
+  con las notificaciones que declaran punto2/ y punto3/zappa_settings.json (tipos de evento,
+  prefijo y sufijo), un registro por evento: lo que no llegaría en AWS tampoco llega aquí.
+- N sitios x M días: el reloj de punto1 se fija en cada día simulado. Los sitios alternan las
+  plantillas de El Tiempo y El Espectador; a partir del tercero su salida cae en la partición
+  del periódico de la plantilla (punto2 identifica el periódico por el nombre). Con
+  --concurrency > 1 los eventos que escriben la misma partición van en serie en un mismo
+  worker: moto no soporta dos sobrescrituras simultáneas de una llave.
+
+Reporta throughput (páginas y filas por segundo), percentiles de latencia por etapa
+(p50/p90/p99/máx por invocación), el pico de RSS del proceso y, con --trace-memory, el pico de
+memoria de Python por etapa (con --concurrency > 1 incluye las invocaciones simultáneas;
+tracemalloc hace varias veces más lentas las invocaciones, así que no mezclar con latencias).
+
+Uso: python -m benchmarks.pipeline_load --sites 4 --days 7 --size-mb 1 [--concurrency 4]
+         [--registration partitions|crawler] [--pages DIR] [--trace-memory] [--json reporte.json]
+"""
+import argparse
+import fnmatch
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.synthetic import generate_page_of_size
+
+BUCKET = "parcial3luis"
+REGION = "sa-east-1"
+TEMPLATES = ("eltiempo", "elespectador")
+FIRST_DAY = datetime(2025, 1, 1, 6, 0)
+STAGES = ("punto1", "punto2", "punto3")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRIGGERED_STAGES = ("punto2", "punto3") # Etapas que se disparan con notificaciones del bucket
+# Operación de S3 -> tipo de evento que emite
+OPERATION_EVENTS = {
+    "PutObject": "ObjectCreated:Put",
+    "CompleteMultipartUpload": "ObjectCreated:CompleteMultipartUpload",
+}
+FINAL_COLUMNS = ("category", "title", "link")
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    """Sirve /<sitio>/<día> con la portada que da `server.page_for(sitio, día)`."""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        try:
+            _, site, day = self.path.split("/", 2)
+            body = self.server.page_for(site, int(day))
+        except (ValueError, KeyError):
+            body = None
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class PageSource:
+    """Portadas por (sitio, día): sintéticas (en caché) o grabadas, rotando por día."""
+
+    def __init__(self, sites, size_mb, pages_dir=None):
+        self.templates = {site: TEMPLATES[i % len(TEMPLATES)] for i, site in enumerate(sites)}
+        self.size_mb = size_mb
+        self.recorded = {}
+        if pages_dir:
+            for filename in sorted(os.listdir(pages_dir)):
+                if filename.endswith(".html"):
+                    self.recorded.setdefault(filename.split("-")[0], []).append(os.path.join(pages_dir, filename))
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, site, day):
+        template = self.templates[site]
+        if template in self.recorded:
+            files = self.recorded[template]
+            with open(files[day % len(files)], "rb") as f:
+                return f.read()
+        with self._lock:
+            if (template, day) not in self._cache:
+                html = generate_page_of_size(template, self.size_mb, seed=day, nesting=2)
+                self._cache[(template, day)] = html.encode("utf-8")
+            return self._cache[(template, day)]
+
+
+def site_names(n_sites):
+    """eltiempo, elespectador, eltiempo2, elespectador2, ..."""
+    names = []
+    for i in range(n_sites):
+        template = TEMPLATES[i % len(TEMPLATES)]
+        names.append(template if i < len(TEMPLATES) else f"{template}{i // len(TEMPLATES) + 1}")
+    return names
+
+
+def load_triggers(root=ROOT, stages=TRIGGERED_STAGES):
+    """
+    Notificaciones S3 de cada etapa según su zappa_settings.json.
+    Retorna [(etapa, patrones de evento, prefijo, sufijo)].
+    """
+    triggers = []
+    for stage in stages:
+        with open(os.path.join(root, stage, "zappa_settings.json"), encoding="utf-8") as f:
+            settings = json.load(f)
+        for stage_settings in settings.values():
+            for event in stage_settings.get("events", []):
+                source = event.get("event_source", {})
+                if not source.get("arn", "").startswith("arn:aws:s3:::"):
+                    continue
+                filters = {"prefix": "", "suffix": ""}
+                # Formato de Zappa (key_filters) o el de la API de S3 (Filter.Key.FilterRules)
+                for rule in source.get("key_filters", []):
+                    filters[rule["type"].lower()] = rule["value"]
+                s3_filter = source.get("filter") or source.get("filters") or {}
+                for rule in s3_filter.get("Key", {}).get("FilterRules", []):
+                    filters[rule["Name"].lower()] = rule["Value"]
+                triggers.append((stage, tuple(source.get("events", [])), filters["prefix"], filters["suffix"]))
+    return triggers
+
+
+def triggered_stages(triggers, key, event_name):
+    """Etapas que recibirían el evento `event_name` (p. ej. ObjectCreated:Put) de `key`."""
+    stages = []
+    for stage, patterns, prefix, suffix in triggers:
+        if key.startswith(prefix) and key.endswith(suffix) and stage not in stages \
+                and any(fnmatch.fnmatchcase(f"s3:{event_name}", pattern) for pattern in patterns):
+            stages.append(stage)
+    return stages
+
+
+class EventRouter:
+    """
+    Convierte las escrituras exitosas en S3 en eventos pendientes por etapa, según las
+    notificaciones de `triggers` (ver load_triggers). Se engancha en la sesión boto3 por
+    defecto, así aplica a todos los clientes que crea common.clients.
+    """
+
+    def __init__(self, triggers=None):
+        self.triggers = load_triggers() if triggers is None else triggers
+        self.pending = {stage: [] for stage in TRIGGERED_STAGES}
+        self._lock = threading.Lock()
+
+    def install(self, session):
+        for operation in OPERATION_EVENTS:
+            session.events.register(f"before-parameter-build.s3.{operation}", self._remember_target)
+            session.events.register(f"after-call.s3.{operation}", self._emit)
+
+    def _remember_target(self, params, context, **kwargs):
+        context["pipeline_target"] = (params.get("Bucket"), params.get("Key"))
+
+    def _emit(self, http_response, context, model, **kwargs):
+        bucket, key = context.get("pipeline_target", (None, None))
+        if key is None or http_response.status_code != 200:
+            return
+        event_name = OPERATION_EVENTS[model.name]
+        for stage in triggered_stages(self.triggers, key, event_name):
+            with self._lock:
+                self.pending[stage].append(s3_record(bucket, key, event_name))
+
+    def take(self, stage):
+        with self._lock:
+            records, self.pending[stage] = self.pending[stage], []
+        return records
+
+
+def s3_record(bucket, key, event_name="ObjectCreated:Put"):
+    """Registro con la forma de una notificación de S3."""
+    return {
+        "eventSource": "aws:s3",
+        "eventName": event_name,
+        "awsRegion": REGION,
+        "s3": {"bucket": {"name": bucket, "arn": f"arn:aws:s3:::{bucket}"}, "object": {"key": key}},
+    }
+
+
+def partition_of(record):
+    """Plantilla (y por lo tanto partición de salida) de una página de headlines/raw/."""
+    filename = record["s3"]["object"]["key"].rsplit("/", 1)[-1]
+    return next((template for template in TEMPLATES if template in filename), filename)
+
+
+def percentile(values, p):
+    """Percentil por rango más cercano (p en 0-100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+class StageRecorder:
+    """Latencias, errores y pico de memoria de Python por etapa."""
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.latencies = {stage: [] for stage in STAGES}
+        self.errors = {stage: 0 for stage in STAGES}
+        self.peaks = {stage: 0 for stage in STAGES}
+        self._lock = threading.Lock()
+
+    def invoke(self, stage, func, *args):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            response = func(*args)
+        except Exception:
+            response = {"statusCode": 500}
+        elapsed = time.perf_counter() - start
+        status = response.get("statusCode", 200) if isinstance(response, dict) else 200
+        with self._lock:
+            self.latencies[stage].append(elapsed)
+            self.errors[stage] += int(status != 200)
+            if self.trace_memory:
+                self.peaks[stage] = max(self.peaks[stage], tracemalloc.get_traced_memory()[1])
+        return response
+
+    def summary(self):
+        result = {}
+        for stage in STAGES:
+            values = self.latencies[stage]
+            result[stage] = {
+                "invocations": len(values),
+                "errors": self.errors[stage],
+                "p50_ms": 1000 * percentile(values, 50),
+                "p90_ms": 1000 * percentile(values, 90),
+                "p99_ms": 1000 * percentile(values, 99),
+                "max_ms": 1000 * max(values, default=0.0),
+            }
+            if self.trace_memory:
+                result[stage]["peak_traced_mb"] = self.peaks[stage] / (1024 * 1024)
+        return result
+
+
+def create_catalog(glue, database, table):
+    """Base de datos y tabla particionada que el crawler habría creado para headlines/final."""
+    glue.create_database(DatabaseInput={"Name": database})
+    glue.create_table(DatabaseName=database, TableInput={
+        "Name": table,
+        "PartitionKeys": [{"Name": name, "Type": "string"} for name in ("periodico", "year", "month", "day")],
+        "StorageDescriptor": {
+            "Columns": [{"Name": name, "Type": "string"} for name in FINAL_COLUMNS],
+            "Location": f"s3://{BUCKET}/headlines/final/",
+            "InputFormat": "org.apache.hadoop.mapred.TextInputFormat",
+            "OutputFormat": "org.apache.hadoop.hive.ql.io.HiveIgnoreKeyTextOutputFormat",
+            "SerdeInfo": {"SerializationLibrary": "org.apache.hadoop.hive.serde2.lazy.LazySimpleSerDe",
+                          "Parameters": {"field.delim": ">"}},
+        },
+    })
+
+
+def _fixed_clock(day):
+    class FixedClock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return day
+    return FixedClock
+
+
+def _peak_rss_mb():
+    scale = 1 if sys.platform == "darwin" else 1024 # ru_maxrss: KB en Linux, bytes en macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / (1024 * 1024)
+
+
+def _set_test_environment():
+    for name, value in {"AWS_ACCESS_KEY_ID": "testing", "AWS_SECRET_ACCESS_KEY": "testing",
+                        "AWS_DEFAULT_REGION": REGION}.items():
+        os.environ.setdefault(name, value)
+    os.environ.pop("AWS_ENDPOINT_URL", None) # moto intercepta las llamadas; no hace falta endpoint
+    os.environ.setdefault("LOG_LEVEL", "ERROR")
+    os.environ.setdefault("METRICS_MODE", "off")
+
+
+def run(sites=2, days=3, size_mb=0.5, concurrency=1, registration="partitions", pages_dir=None,
+        trace_memory=False):
+    """Ejecuta la carga y retorna el reporte."""
+    _set_test_environment()
+    import boto3
+    from moto import mock_aws
+
+    from common import clients
+    from punto1 import app as app1
+    from punto2 import app as app2
+    from punto3 import app as app3
+    from punto3 import partitions
+
+    names = site_names(sites)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+    server.page_for = PageSource(names, size_mb, pages_dir)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    recorder = StageRecorder(trace_memory)
+    router = EventRouter()
+    saved = (app1.datetime, app3.REGISTRATION_MODE, app3.CRAWLER_WAIT_BUDGET, os.environ.get("SCRAPER_SITES"))
+    rows = pages = 0
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        with mock_aws():
+            clients.reset_clients()
+            partitions.clear_cache()
+            boto3.setup_default_session(region_name=REGION)
+            router.install(boto3.DEFAULT_SESSION)
+            s3 = clients.get_client("s3", region_name=REGION)
+            s3.create_bucket(Bucket=BUCKET, CreateBucketConfiguration={"LocationConstraint": REGION})
+            glue = app3.get_glue_client()
+            create_catalog(glue, app3.GLUE_DATABASE, app3.PARTITION_TABLES["headlines/final"])
+            glue.create_crawler(Name=app3.CRAWLER_NAME, Role="LabRole", DatabaseName=app3.GLUE_DATABASE,
+                                Targets={"S3Targets": [{"Path": f"s3://{BUCKET}/headlines/final/"}]})
+            app3.REGISTRATION_MODE = registration
+            app3.CRAWLER_WAIT_BUDGET = 0 # El crawler de moto no termina: no se espera la re-ejecución
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+                for day in range(days):
+                    app1.datetime = _fixed_clock(FIRST_DAY + timedelta(days=day))
+                    os.environ["SCRAPER_SITES"] = json.dumps(
+                        [{"name": name, "url": f"{base_url}/{name}/{day}"} for name in names])
+                    response = recorder.invoke("punto1", app1.handler, None, None)
+                    pages += sum(1 for ok in response.get("results", {}).values() if ok)
+
+                    groups = {}
+                    for record in router.take("punto2"):
+                        groups.setdefault(partition_of(record), []).append(record)
+                    process = lambda records: [recorder.invoke("punto2", app2.handler, {"Records": [record]}, None)
+                                               for record in records]
+                    for responses in executor.map(process, groups.values()):
+                        rows += sum(r.get("summary", {}).get("rows", 0) for r in responses)
+
+                    events = router.take("punto3")
+                    list(executor.map(lambda record: recorder.invoke("punto3", app3.handler, {"Records": [record]}, None), events))
+            wall = time.perf_counter() - start
+
+            partitions_registered = len(glue.get_partitions(
+                DatabaseName=app3.GLUE_DATABASE, TableName=app3.PARTITION_TABLES["headlines/final"])["Partitions"])
+            clients.reset_clients()
+    finally:
+        app1.datetime, app3.REGISTRATION_MODE, app3.CRAWLER_WAIT_BUDGET, scraper_sites = saved
+        if scraper_sites is None:
+            os.environ.pop("SCRAPER_SITES", None)
+        else:
+            os.environ["SCRAPER_SITES"] = scraper_sites
+        boto3.DEFAULT_SESSION = None
+        server.shutdown()
+        if trace_memory:
+            tracemalloc.stop()
+
+    return {
+        "sites": sites,
+        "days": days,
+        "pages": pages,
+        "rows": rows,
+        "glue_partitions": partitions_registered,
+        "wall_seconds": wall,
+        "pages_per_s": pages / wall if wall else 0.0,
+        "rows_per_s": rows / wall if wall else 0.0,
+        "stages": recorder.summary(),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def report(result):
+    print(f"{result['sites']} sitios x {result['days']} días: {result['pages']} páginas, {result['rows']} filas, "
+          f"{result['glue_partitions']} particiones en Glue")
+    print(f"{result['wall_seconds']:.2f}s  {result['pages_per_s']:.2f} páginas/s  {result['rows_per_s']:.0f} filas/s  "
+          f"pico RSS {result['peak_rss_mb']:.0f} MB")
+    print(f"{'etapa':<8}{'invoc.':>8}{'errores':>9}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'máx ms':>10}{'pico MB':>9}")
+    for stage, stats in result["stages"].items():
+        peak = f"{stats['peak_traced_mb']:.1f}" if "peak_traced_mb" in stats else "-"
+        print(f"{stage:<8}{stats['invocations']:>8}{stats['errors']:>9}{stats['p50_ms']:>10.1f}{stats['p90_ms']:>10.1f}"
+              f"{stats['p99_ms']:>10.1f}{stats['max_ms']:>10.1f}{peak:>9}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Carga local de punto1 -> punto2 -> punto3 con moto.")
+    parser.add_argument("--sites", type=int, default=2)
+    parser.add_argument("--days", type=int, default=3)
+    parser.add_argument("--size-mb", type=float, default=0.5, help="Tamaño de las portadas sintéticas")
+    parser.add_argument("--concurrency", type=int, default=1, help="Invocaciones simultáneas de punto2/punto3")
+    parser.add_argument("--registration", choices=("partitions", "crawler"), default="partitions")
+    parser.add_argument("--pages", help="Directorio con capturas <periódico>-AAAA-MM-DD.html a servir")
+    parser.add_argument("--trace-memory", action="store_true", help="Pico de memoria de Python por etapa")
+    parser.add_argument("--json", help="Archivo donde guardar el reporte")
+    args = parser.parse_args(argv)
+
+    result = run(args.sites, args.days, args.size_mb, args.concurrency, args.registration, args.pages,
+                 args.trace_memory)
+    report(result)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    return 0 if all(stats["errors"] == 0 for stats in result["stages"].values()) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
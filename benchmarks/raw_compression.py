@@ -0,0 +1,83 @@
+"""
+Benchmark de almacenamiento del HTML crudo: sin comprimir vs gzip vs zstd.
+
+Sube una portada sintética con punto1.upload_to_s3 a un S3 simulado con moto y
+mide los bytes almacenados y la latencia de subida + descarga con punto2.download_from_s3.
+
+Uso: python -m benchmarks.raw_compression [tamaño_en_MB]
+"""
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "sa-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+
+import boto3
+from moto import mock_aws
+
+from punto1 import app as app1
+from punto2 import app as app2
+
+REPETICIONES = 5
+
+
+def synthetic_front_page(size_mb, seed=42):
+    """Genera una portada con tarjetas repetitivas, scripts y estilos, como las reales."""
+    rng = random.Random(seed)
+    words = ["gobierno", "Bogotá", "elecciones", "fútbol", "economía", "salud", "paro", "Congreso", "precio", "dólar"]
+    parts = ["<html><head><style>.c-article{margin:0;padding:0}</style></head><body>"]
+    size = 0
+    i = 0
+    while size < size_mb * 1024 * 1024:
+        title = " ".join(rng.choice(words) for _ in range(8))
+        card = (
+            f'<article data-category="{rng.choice(words)}" class="c-article">'
+            f'<a class="c-articulo__titulo__txt" href="/noticia-{i}.html">{title}</a>'
+            f'<script>window.dataLayer.push({{"id": {i}}});</script></article>'
+        )
+        parts.append(card)
+        size += len(card)
+        i += 1
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def run(size_mb=3):
+    html = synthetic_front_page(size_mb)
+    modes = ["", "gzip"]
+    try:
+        import zstandard  # noqa: F401
+        modes.append("zstd")
+    except ImportError:
+        print("zstandard no está instalado; se omite zstd.")
+
+    with mock_aws():
+        s3 = boto3.client("s3", region_name="sa-east-1")
+        s3.create_bucket(Bucket=app1.S3_BUCKET_NAME, CreateBucketConfiguration={"LocationConstraint": "sa-east-1"})
+
+        print(f"{'modo':<8}{'bytes':>12}{'ratio':>8}{'subida ms':>12}{'descarga ms':>14}")
+        for mode in modes:
+            key = f"{app1.S3_PREFIX}/bench-{mode or 'plain'}-2025-01-01.html"
+            upload_times, download_times = [], []
+            for _ in range(REPETICIONES):
+                start = time.perf_counter()
+                app1.upload_to_s3(html, key, compression=mode)
+                upload_times.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                content, _ = app2.download_from_s3(app1.S3_BUCKET_NAME, key)
+                download_times.append(time.perf_counter() - start)
+                assert content == html.encode("utf-8")
+
+            stored = s3.head_object(Bucket=app1.S3_BUCKET_NAME, Key=key)["ContentLength"]
+            print(
+                f"{mode or 'ninguno':<8}{stored:>12}{len(html.encode('utf-8')) / stored:>8.1f}"
+                f"{1000 * min(upload_times):>12.1f}{1000 * min(download_times):>14.1f}"
+            )
+
+
+if __name__ == "__main__":
+    run(float(sys.argv[1]) if len(sys.argv) > 1 else 3)
@@ -0,0 +1,66 @@
+"""
+Benchmark de memoria de la escritura de archivos finales: lista + CSV completo vs streaming.
+
+Mide con tracemalloc el pico de memoria de serializar N filas sintéticas de las dos formas.
+El sink descarta los bytes (solo los cuenta), así se mide la serialización y no la subida.
+
+Uso: python -m benchmarks.streaming_output [filas]
+"""
+import sys
+import time
+import tracemalloc
+
+from benchmarks.output_formats import synthetic_day
+from punto2.app import CSV_FIELDNAMES, rows_to_csv
+from punto2.streaming import CsvStreamWriter
+
+
+class CountingSink:
+    def __init__(self):
+        self.bytes = 0
+
+    def write(self, data):
+        self.bytes += len(data)
+
+
+def row_stream(n_rows):
+    import random
+    rng = random.Random(11)
+    for start in range(0, n_rows, 1000):
+        yield from synthetic_day("eltiempo", 15, min(1000, n_rows - start), rng)
+
+
+def list_path(n_rows):
+    news_data = list(row_stream(n_rows))
+    return len(rows_to_csv(news_data).encode("utf-8"))
+
+
+def streaming_path(n_rows):
+    sink = CountingSink()
+    writer = CsvStreamWriter(sink, CSV_FIELDNAMES)
+    for row in row_stream(n_rows):
+        writer.write(row)
+    writer.close()
+    return sink.bytes
+
+
+def measure(func, n_rows):
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        size = func(n_rows)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return size, peak / (1024 * 1024), time.perf_counter() - start
+
+
+def run(n_rows=200_000):
+    print(f"{'ruta':<12}{'filas':>9}{'MB CSV':>9}{'pico MB':>10}{'s':>8}")
+    for name, func in (("lista", list_path), ("streaming", streaming_path)):
+        size, peak_mb, elapsed = measure(func, n_rows)
+        print(f"{name:<12}{n_rows:>9}{size / (1024 * 1024):>9.1f}{peak_mb:>10.1f}{elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
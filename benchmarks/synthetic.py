@@ -0,0 +1,135 @@
+"""
+Generador de portadas sintéticas con la forma de El Tiempo y El Espectador.
+
+Las páginas son deterministas para una misma semilla e incluyen el ruido de una portada
+real (scripts, estilos, navegación, pie de página, enlaces duplicados y tarjetas anidadas).
+"""
+import random
+
+CATEGORIES = ["Política", "Economía", "Deportes", "Bogotá", "Cultura", "Salud", "Mundo", "Tecnología"]
+WORDS = [
+    "gobierno", "Bogotá", "elecciones", "fútbol", "economía", "salud", "paro", "Congreso",
+    "precio", "dólar", "reforma", "Medellín", "selección", "lluvias", "alcaldía", "Petro",
+]
+
+
+def _title(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 12))).capitalize()
+
+
+def _noise(rng, i):
+    return (
+        f'<script>window.dataLayer=window.dataLayer||[];dataLayer.push({{"slot":{i},"r":{rng.random():.6f}}});</script>'
+        f'<div class="ad-slot" id="ad-{i}"><span>Publicidad</span></div>'
+    )
+
+
+def _page(head, body_parts):
+    return (
+        "<!DOCTYPE html><html lang=\"es\"><head><meta charset=\"utf-8\">"
+        f"{head}</head><body>"
+        '<nav class="main-nav"><a href="/">Inicio</a><a href="/politica">Política</a><a href="/deportes">Deportes</a></nav>'
+        + "".join(body_parts)
+        + '<footer class="site-footer"><a href="/terminos">Términos y condiciones del sitio</a></footer>'
+        "</body></html>"
+    )
+
+
+def eltiempo_card(rng, i):
+    """Una de las tres variantes de tarjeta que reconoce el extractor de El Tiempo."""
+    title = _title(rng)
+    category = rng.choice(CATEGORIES)
+    link = f"/{category.lower()}/noticia-{i}"
+    kind = i % 3
+    if kind == 0:
+        return (
+            f'<article class="c-article" data-category="{category}">'
+            f'<a class="c-articulo__titulo__txt" href="{link}">{title}</a>'
+            f'<p class="c-article__epigraph">{_title(rng)}</p></article>'
+        )
+    if kind == 1:
+        return (
+            f'<div class="c-article-block"><div class="c-article-block__content">'
+            f'<span class="c-article-block__section">{category}</span>'
+            f'<a class="c-article-block__title-link" href="{link}">{title}</a></div></div>'
+        )
+    return (
+        f'<div class="c-main-section__cards__item">'
+        f'<span class="c-main-section__card__section">{category}</span>'
+        f'<a class="c-main-section__card__title" href="{link}">{title}</a></div>'
+    )
+
+
+def elespectador_card(rng, i, depth=0):
+    """Tarjetas de El Espectador con los patrones que cubren los card_selectors."""
+    title = _title(rng)
+    category = rng.choice(CATEGORIES)
+    link = f"/{category.lower()}/articulo-{i}"
+    kind = i % 6
+    if kind == 0:
+        inner = (
+            f'<div class="Card-SectionContainer"><h4 class="Card-Section"><a href="/{category.lower()}">{category}</a></h4></div>'
+            f'<h2 class="Card-Title Card-Title_xs"><a href="{link}">{title}</a></h2>'
+        )
+        if depth > 0:
+            inner += elespectador_card(rng, i + 100000, depth - 1)
+        return f'<div class="CardLayout-Container"><div class="Card">{inner}</div></div>'
+    if kind == 1:
+        return (
+            f'<div class="Teaser-container"><span class="section-name">{category}</span>'
+            f'<h3><a href="{link}">{title}</a></h3></div>'
+        )
+    if kind == 2:
+        return (
+            f'<div class="card-body"><a href="{link}?page=1">{rng.randint(1, 99)}</a>'
+            f'<div class="nav-links"><a href="/seccion">Más noticias de la sección</a></div>'
+            f'<a href="{link}">{title}</a></div>'
+        )
+    if kind == 3:
+        return (
+            f'<div class="news-item" data-category="{category}">'
+            f'<h2 class="Promo-title"><a href="{link}">{title}</a></h2></div>'
+        )
+    if kind == 4:
+        return (
+            f'<article class="Content"><h4 class="Card-Section"><a href="/{category.lower()}">{category}</a></h4>'
+            f'<h3><a href="{link}"></a></h3></article>'
+        )
+    return (
+        f'<div data-pf-type="BlockArticle"><h1><a href="{link}">{title}</a></h1>'
+        f'<span class="section-name">{category}</span></div>'
+    )
+
+
+def generate_front_page(site, n_cards=200, seed=0, nesting=1, duplicate_ratio=0.1, noise=True):
+    """
+    Genera el HTML de una portada de `site` ("eltiempo" o "elespectador") con `n_cards` tarjetas.
+    `nesting` controla cuántas tarjetas anidadas puede contener una tarjeta de El Espectador y
+    `duplicate_ratio` la fracción de tarjetas que repiten un enlace anterior.
+    """
+    rng = random.Random(seed)
+    head = "<title>Portada</title><style>" + ".c-article{margin:0}" * 50 + "</style>"
+    parts = []
+    previous = []
+    for i in range(n_cards):
+        if previous and rng.random() < duplicate_ratio:
+            parts.append(rng.choice(previous))
+            continue
+        if site == "eltiempo":
+            card = eltiempo_card(rng, i)
+        elif site == "elespectador":
+            card = elespectador_card(rng, i, depth=nesting)
+        else:
+            raise ValueError(f"Periódico desconocido: {site}")
+        parts.append(card)
+        previous.append(card)
+        if noise:
+            parts.append(_noise(rng, i))
+    return _page(head, parts)
+
+
+def generate_page_of_size(site, size_mb, seed=0, **kwargs):
+    """Genera una portada de aproximadamente `size_mb` megabytes."""
+    sample = generate_front_page(site, n_cards=100, seed=seed, **kwargs)
+    n_cards = max(1, int(100 * size_mb * 1024 * 1024 / len(sample.encode("utf-8"))))
+    return generate_front_page(site, n_cards=n_cards, seed=seed, **kwargs)
@@ -0,0 +1,76 @@
+"""
+Clientes AWS y sesión HTTP compartidos por punto1, punto2 y punto3.
+
+Los clientes se crean una sola vez por contenedor Lambda (y por región), así las
+invocaciones en caliente no repiten la construcción del cliente ni el handshake TLS.
+
+boto3 y requests se importan al crear el primer cliente o la sesión, no al importar el
+módulo: importar los handlers queda barato y cada Lambda carga solo lo que usa. Cada
+handler puede crear sus clientes durante el init del contenedor con PREWARM=1.
+"""
+import os
+import threading
+
+MAX_POOL_CONNECTIONS = int(os.environ.get("AWS_MAX_POOL_CONNECTIONS", "16")) # Conexiones por cliente
+MAX_RETRY_ATTEMPTS = int(os.environ.get("AWS_MAX_RETRY_ATTEMPTS", "5"))
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", "16"))
+# Con PREWARM=1 los handlers crean sus clientes al importarse, durante el init del contenedor.
+# Sirve con SnapStart o concurrencia aprovisionada, donde el init ocurre antes de la invocación;
+# sin eso es mejor dejarlo apagado para que cada ruta cargue solo lo que usa.
+PREWARM = os.environ.get("PREWARM", "").lower() in ("1", "true", "yes")
+
+_clients = {}
+_http_session = None
+_lock = threading.Lock()
+
+
+def client_config():
+    """Configuración común: pool de conexiones y reintentos con backoff."""
+    from botocore.config import Config
+
+    return Config(
+        max_pool_connections=MAX_POOL_CONNECTIONS,
+        retries={"max_attempts": MAX_RETRY_ATTEMPTS, "mode": "standard"},
+    )
+
+
+def get_client(service_name, region_name=None):
+    """Retorna el cliente boto3 de `service_name` para la región, creándolo solo la primera vez."""
+    key = (service_name, region_name)
+    client = _clients.get(key)
+    if client is None:
+        with _lock: # boto3.client no es seguro entre hilos durante la creación
+            client = _clients.get(key)
+            if client is None:
+                import boto3
+
+                client = boto3.client(service_name, region_name=region_name, config=client_config())
+                _clients[key] = client
+    return client
+
+
+def get_http_session(pool_size=HTTP_POOL_SIZE):
+    """Retorna la sesión requests compartida (keep-alive) del contenedor."""
+    global _http_session
+    if _http_session is None:
+        with _lock:
+            if _http_session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _http_session = session
+    return _http_session
+
+
+def reset_clients():
+    """Descarta los clientes en caché (útil en pruebas o al cambiar de credenciales)."""
+    global _http_session
+    with _lock:
+        _clients.clear()
+        if _http_session is not None:
+            _http_session.close()
+        _http_session = None
@@ -0,0 +1,138 @@
+"""
+Instrumentación liviana compartida por punto1, punto2 y punto3: logs estructurados por nivel,
+spans de tiempo y métricas en CloudWatch Embedded Metric Format (EMF).
+
+LOG_LEVEL (DEBUG, INFO, WARNING, ERROR) decide qué logs se escriben; con LOG_FORMAT=text se
+escriben como texto plano para correr localmente. Con METRICS_MODE=emf (por defecto) las
+métricas acumuladas en la invocación se imprimen al final como JSON EMF, que CloudWatch Logs
+convierte en métricas sin llamadas a la API; METRICS_MODE=off deja spans y contadores en no-op.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "json").lower() # "json" o "text"
+METRICS_MODE = os.environ.get("METRICS_MODE", "emf").lower() # "emf" u "off"
+METRICS_NAMESPACE = os.environ.get("METRICS_NAMESPACE", "Parcial3/Headlines")
+
+
+def enabled_for(level):
+    """Indica si los logs de `level` se escriben con el LOG_LEVEL actual."""
+    return LEVELS[level] >= LEVELS.get(LOG_LEVEL, LEVELS["INFO"])
+
+
+def log(level, message, **fields):
+    """Escribe una línea de log con campos estructurados si el nivel está habilitado."""
+    if not enabled_for(level):
+        return
+    if LOG_FORMAT == "text":
+        extra = " ".join(f"{name}={value}" for name, value in fields.items())
+        print(f"[{level}] {message}" + (f" {extra}" if extra else ""))
+    else:
+        print(json.dumps({"level": level, "message": message, **fields}, ensure_ascii=False, default=str))
+
+
+def debug(message, **fields):
+    log("DEBUG", message, **fields)
+
+
+def info(message, **fields):
+    log("INFO", message, **fields)
+
+
+def warning(message, **fields):
+    log("WARNING", message, **fields)
+
+
+def error(message, **fields):
+    log("ERROR", message, **fields)
+
+
+class Metrics:
+    """
+    Acumula tiempos y contadores de una invocación (seguro entre hilos). Cada métrica puede
+    llevar dimensiones propias, por ejemplo el selector en las filas por selector; flush()
+    emite un documento EMF por cada combinación de dimensiones.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._values = {} # (dimensiones, nombre) -> [valor, unidad]
+        self._lock = threading.Lock()
+
+    def add(self, name, value, unit="Count", **dimensions):
+        if not self.enabled:
+            return
+        key = (tuple(sorted(dimensions.items())), name)
+        with self._lock:
+            entry = self._values.setdefault(key, [0, unit])
+            entry[0] += value
+
+    @contextmanager
+    def span(self, name, **dimensions):
+        """Mide el bloque y suma su duración a la métrica `<name>_ms`."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.add(f"{name}_ms", elapsed_ms, "Milliseconds", **dimensions)
+            debug("span", span=name, duration_ms=round(elapsed_ms, 3), **dimensions)
+
+    def snapshot(self):
+        """Valores acumulados como {(dimensiones, nombre): valor}, sin reiniciarlos."""
+        with self._lock:
+            return {key: entry[0] for key, entry in self._values.items()}
+
+    def flush(self, namespace=None, **dimensions):
+        """Imprime las métricas en formato EMF, las reinicia y retorna los documentos emitidos."""
+        with self._lock:
+            values, self._values = self._values, {}
+        if not self.enabled or not values:
+            return []
+        groups = {}
+        for (metric_dimensions, name), (value, unit) in values.items():
+            groups.setdefault(metric_dimensions, []).append((name, value, unit))
+
+        timestamp = int(time.time() * 1000)
+        documents = []
+        for metric_dimensions, metrics in groups.items():
+            all_dimensions = {**dimensions, **dict(metric_dimensions)}
+            document = {
+                "_aws": {
+                    "Timestamp": timestamp,
+                    "CloudWatchMetrics": [{
+                        "Namespace": namespace or METRICS_NAMESPACE,
+                        "Dimensions": [sorted(all_dimensions)],
+                        "Metrics": [{"Name": name, "Unit": unit} for name, _, unit in metrics],
+                    }],
+                },
+                **all_dimensions,
+                **{name: round(value, 3) for name, value, _ in metrics},
+            }
+            print(json.dumps(document, ensure_ascii=False))
+            documents.append(document)
+        return documents
+
+
+# Métricas de la invocación en curso (un contenedor Lambda atiende una invocación a la vez)
+metrics = Metrics(enabled=METRICS_MODE != "off")
+
+
+def span(name, **dimensions):
+    return metrics.span(name, **dimensions)
+
+
+def count(name, value=1, **dimensions):
+    metrics.add(name, value, "Count", **dimensions)
+
+
+def flush_metrics(**dimensions):
+    return metrics.flush(**dimensions)
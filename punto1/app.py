@@ -1,28 +1,306 @@
-import requests
-import boto3
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from common import clients, telemetry
+
 # --- Configuración S3 ---
 S3_BUCKET_NAME = "parcial3luis" # ¡CAMBIA ESTO por tu bucket real!
 S3_PREFIX = "headlines/raw" # Prefijo para la estructura de carpetas en S3
+# Estado de descargas (ETag, Last-Modified y hash por sitio). Va fuera de headlines/raw
+# para no disparar el procesamiento de punto2. Con FETCH_STATE_PATH se usa un archivo local.
+FETCH_STATE_KEY = "headlines/state/fetch-state.json"
+FETCH_STATE_PATH = os.environ.get("FETCH_STATE_PATH")
+# Compresión opcional del HTML crudo: "" (sin comprimir), "gzip" o "zstd" (requiere zstandard)
+RAW_COMPRESSION = os.environ.get("RAW_COMPRESSION", "").lower()
+
+# --- Modo streaming ---
+# Con STREAM_UPLOADS=1 la página se copia en bloques (sin decodificar) a un buffer acotado
+# y se sube con upload_fileobj (multipart), así la memoria no depende del tamaño de la página.
+STREAM_UPLOADS = os.environ.get("STREAM_UPLOADS", "").lower() in ("1", "true", "yes")
+STREAM_CHUNK_SIZE = 64 * 1024 # Bloques leídos de la respuesta HTTP
+SPOOL_MAX_BYTES = 8 * 1024 * 1024 # Por encima de esto el buffer pasa a /tmp
+MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024 # Tamaño de cada parte del multipart upload
+CHARSET_RE = re.compile(r"""charset\s*=\s*["']?([^"';\s]+)""", re.IGNORECASE)
+
+# --- Configuración de descarga ---
+DEFAULT_TIMEOUT = 15 # Segundos por sitio si el registro no indica otro valor
+MAX_WORKERS = int(os.environ.get("SCRAPER_MAX_WORKERS", "8")) # Descargas simultáneas como máximo
+
+# Registro de sitios a descargar. Se puede reemplazar con la variable de entorno
+# SCRAPER_SITES (lista JSON con objetos {"name", "url", "timeout", "enabled"}).
+SITES = [
+    {"name": "eltiempo", "url": "https://www.eltiempo.com/", "timeout": DEFAULT_TIMEOUT, "enabled": True},
+    {"name": "elespectador", "url": "https://www.elespectador.com/", "timeout": DEFAULT_TIMEOUT, "enabled": True},
+    # Opcional: activa Publimetro cambiando "enabled" a True
+    {"name": "publimetro", "url": "https://www.publimetro.co/", "timeout": DEFAULT_TIMEOUT, "enabled": False},
+]
+
+
+
+def get_s3_client():
+    """Retorna el cliente S3 compartido del contenedor."""
+    return clients.get_client('s3')
+
+
+def get_http_session():
+    """
+    Retorna una sesión HTTP compartida (keep-alive) para todo el contenedor Lambda.
+    El pool de conexiones se dimensiona según MAX_WORKERS.
+    """
+    return clients.get_http_session(pool_size=MAX_WORKERS)
+
 
+def load_sites():
+    """
+    Retorna los sitios habilitados, leyendo SCRAPER_SITES si está definida. Las entradas
+    sin "name" o "url" (texto) y los nombres repetidos se descartan con una advertencia:
+    una entrada mal configurada no debe tumbar al handler ni pisar el estado de otro sitio.
+    """
+    sites = SITES
+    raw_sites = os.environ.get("SCRAPER_SITES")
+    if raw_sites:
+        try:
+            sites = json.loads(raw_sites)
+        except ValueError as e:
+            telemetry.warning("SCRAPER_SITES no es un JSON válido. Usando el registro por defecto.", error=str(e))
+        if not isinstance(sites, list):
+            telemetry.warning("SCRAPER_SITES no es una lista. Usando el registro por defecto.")
+            sites = SITES
 
-def upload_to_s3(file_content, object_name):
-    """Sube el contenido de la página a S3."""
+    enabled, names = [], set()
+    for site in sites:
+        if not (isinstance(site, dict) and isinstance(site.get("name"), str) and site["name"]
+                and isinstance(site.get("url"), str) and site["url"]):
+            telemetry.warning("Sitio sin name o url válidos. Se ignora.", site=site)
+            continue
+        if not site.get("enabled", True):
+            continue
+        if site["name"] in names:
+            telemetry.warning("Sitio repetido. Se ignora.", site=site["name"])
+            continue
+        names.add(site["name"])
+        enabled.append(site)
+    return enabled
+
+
+def load_fetch_state():
+    """Carga el estado de descargas anterior. Retorna {} si no existe o no se puede leer."""
+    try:
+        if FETCH_STATE_PATH:
+            if not os.path.exists(FETCH_STATE_PATH):
+                return {}
+            with open(FETCH_STATE_PATH, encoding="utf-8") as f:
+                return json.load(f)
+        s3 = get_s3_client()
+        response = s3.get_object(Bucket=S3_BUCKET_NAME, Key=FETCH_STATE_KEY)
+        return json.loads(response['Body'].read().decode('utf-8'))
+    except Exception as e:
+        telemetry.warning("No se pudo cargar el estado de descargas. Se descargará todo de nuevo.", error=str(e))
+        return {}
+
+def save_fetch_state(state):
+    """Guarda el estado de descargas en S3 (o en FETCH_STATE_PATH si está definido)."""
+    content = json.dumps(state, sort_keys=True)
+    try:
+        if FETCH_STATE_PATH:
+            with open(FETCH_STATE_PATH, "w", encoding="utf-8") as f:
+                f.write(content)
+        else:
+            s3 = get_s3_client()
+            s3.put_object(Bucket=S3_BUCKET_NAME, Key=FETCH_STATE_KEY, Body=content, ContentType='application/json')
+        return True
+    except Exception as e:
+        telemetry.error("Error al guardar el estado de descargas", error=str(e))
+        return False
+
+def conditional_headers(site_state):
+    """Construye los encabezados If-None-Match / If-Modified-Since a partir del estado del sitio."""
+    headers = {}
+    if site_state.get("etag"):
+        headers["If-None-Match"] = site_state["etag"]
+    if site_state.get("last_modified"):
+        headers["If-Modified-Since"] = site_state["last_modified"]
+    return headers
+
+def resolve_compression(compression):
+    """Normaliza el modo de compresión: retorna "gzip", "zstd" o None."""
+    if not compression:
+        return None
+    if compression == "zstd":
+        try:
+            import zstandard # noqa: F401
+            return "zstd"
+        except ImportError:
+            telemetry.warning("zstandard no está instalado. Usando gzip.")
+            return "gzip"
+    if compression == "gzip":
+        return "gzip"
+    telemetry.warning("Compresión desconocida. Se sube sin comprimir.", compression=compression)
+    return None
+
+def compress_content(file_content, compression):
+    """
+    Comprime el HTML según `compression`. Retorna (cuerpo, content_encoding);
+    content_encoding es None cuando no se comprime.
+    """
+    content_encoding = resolve_compression(compression)
+    if not content_encoding:
+        return file_content, None
+    data = file_content.encode('utf-8') if isinstance(file_content, str) else file_content
+    if content_encoding == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor(level=10).compress(data), "zstd"
+    return gzip.compress(data, compresslevel=6), "gzip"
+
+def encoding_args(content_encoding, original_size, content_hash=None):
+    """
+    Argumentos de put_object/upload_fileobj que describen la compresión del objeto y el
+    sha256 del HTML sin comprimir (punto2 lo usa como llave de su caché de resultados).
+    """
+    metadata = {'sha256': content_hash} if content_hash else {}
+    if not content_encoding:
+        return {'Metadata': metadata} if metadata else {}
+    metadata.update({'compression': content_encoding, 'uncompressed-size': str(original_size)})
+    return {'ContentEncoding': content_encoding, 'Metadata': metadata}
+
+def html_content_type(charset=None):
+    """Content-Type del HTML crudo; el charset le dice a punto2 cómo decodificar los bytes."""
+    return f"text/html; charset={charset}" if charset else 'text/html'
+
+def upload_to_s3(file_content, object_name, compression=None, content_hash=None):
+    """
+    Sube el contenido de la página a S3 (comprimido si RAW_COMPRESSION lo indica).
+    Un str se guarda en UTF-8 y así queda declarado en el Content-Type. `content_hash` es el
+    sha256 de los bytes descargados; si no se pasa, se calcula sobre lo que se sube.
+    """
     
-    s3 = boto3.client('s3')
+    s3 = get_s3_client()
     try:
-        s3.put_object(Bucket=S3_BUCKET_NAME, Key=object_name, Body=file_content, ContentType='text/html')
-        print(f"Archivo subido a S3: s3://{S3_BUCKET_NAME}/{object_name}")
+        with telemetry.span("compress"):
+            body, content_encoding = compress_content(file_content, RAW_COMPRESSION if compression is None else compression)
+        data = file_content.encode('utf-8') if isinstance(file_content, str) else file_content
+        extra_args = encoding_args(content_encoding, len(data), content_hash or hashlib.sha256(data).hexdigest())
+        with telemetry.span("upload"):
+            content_type = html_content_type('utf-8' if isinstance(file_content, str) else None)
+            s3.put_object(Bucket=S3_BUCKET_NAME, Key=object_name, Body=body, ContentType=content_type, **extra_args)
+        telemetry.info("Archivo subido a S3", key=object_name, bytes=len(body))
         return True
     except Exception as e:
-        print(f"Error al subir a S3: {e}")
+        telemetry.error("Error al subir a S3", key=object_name, error=str(e))
         return False
 
-def download_and_save_page(url, site_name):
-    """Descarga la página web y la sube a S3 con la estructura deseada."""
+def upload_fileobj_to_s3(fileobj, object_name, content_encoding=None, original_size=0, charset=None, content_hash=None,
+                         bucket=None, metadata=None):
+    """
+    Sube un archivo abierto a S3 por partes (multipart si supera MULTIPART_CHUNK_SIZE).
+    `charset` es el que declaró el sitio; los bytes se guardan tal como llegaron. `bucket`
+    (por defecto S3_BUCKET_NAME) y `metadata` (se agrega a la de encoding_args) son opcionales.
+    """
+    from boto3.s3.transfer import TransferConfig # Solo el modo streaming la necesita
+
+    s3 = get_s3_client()
+    config = TransferConfig(
+        multipart_threshold=MULTIPART_CHUNK_SIZE,
+        multipart_chunksize=MULTIPART_CHUNK_SIZE,
+        max_concurrency=2 # Acota la memoria a ~2 partes en vuelo
+    )
+    extra_args = dict(encoding_args(content_encoding, original_size, content_hash), ContentType=html_content_type(charset))
+    if metadata:
+        extra_args['Metadata'] = dict(extra_args.get('Metadata', {}), **metadata)
     try:
-        response = requests.get(url)
+        with telemetry.span("upload"):
+            s3.upload_fileobj(fileobj, bucket or S3_BUCKET_NAME, object_name, ExtraArgs=extra_args, Config=config)
+        telemetry.info("Archivo subido a S3", key=object_name, bytes=original_size)
+        return True
+    except Exception as e:
+        telemetry.error("Error al subir a S3", key=object_name, error=str(e))
+        return False
+
+def open_spool(compression):
+    """
+    Archivo temporal que vive en memoria hasta SPOOL_MAX_BYTES y el escritor que comprime
+    sobre él si se pide. Retorna (spool, writer, content_encoding).
+    """
+    content_encoding = resolve_compression(compression)
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    if content_encoding == "zstd":
+        import zstandard
+        writer = zstandard.ZstdCompressor(level=10).stream_writer(spool, closefd=False)
+    elif content_encoding == "gzip":
+        writer = gzip.GzipFile(fileobj=spool, mode='wb', compresslevel=6)
+    else:
+        writer = spool
+    return spool, writer, content_encoding
+
+def finish_spool(spool, writer):
+    """Cierra el stream comprimido (sin cerrar el spool) y rebobina el spool para subirlo."""
+    if writer is not spool:
+        writer.close()
+    spool.seek(0)
+
+def spool_response(response, compression):
+    """
+    Copia el cuerpo crudo de la respuesta, en bloques y sin decodificar, a un archivo
+    temporal que vive en memoria hasta SPOOL_MAX_BYTES. Calcula el hash sobre la marcha
+    y comprime si se pide. Retorna (spool, sha256, content_encoding, tamaño_original).
+    """
+    spool, writer, content_encoding = open_spool(compression)
+    digest = hashlib.sha256()
+    original_size = 0
+    for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+        if chunk:
+            digest.update(chunk)
+            writer.write(chunk)
+            original_size += len(chunk)
+    finish_spool(spool, writer)
+    return spool, digest.hexdigest(), content_encoding, original_size
+
+def response_charset(response):
+    """Charset que declara el Content-Type de la respuesta HTTP, o None."""
+    match = CHARSET_RE.search(response.headers.get('Content-Type') or '')
+    return match.group(1) if match else None
+
+def stream_page_to_s3(response, object_name, site_name, state=None):
+    """Sube la respuesta a S3 en modo streaming, aplicando la misma deduplicación por hash."""
+    site_state = state.get(site_name, {}) if state is not None else {}
+    with response, telemetry.span("download"): # En streaming el cuerpo se lee aquí
+        spool, content_hash, content_encoding, original_size = spool_response(response, RAW_COMPRESSION)
+    with spool:
+        if state is not None and content_hash == site_state.get("sha256"):
+            telemetry.info("Mismo contenido que la última descarga. No se sube a S3.", site=site_name)
+            telemetry.count("pages_unchanged")
+            state[site_name] = dict(site_state, **cache_validators(response))
+            return True
+        uploaded = upload_fileobj_to_s3(spool, object_name, content_encoding, original_size,
+                                        response_charset(response), content_hash)
+    if uploaded and state is not None:
+        state[site_name] = dict(cache_validators(response), sha256=content_hash)
+    return uploaded
+
+def download_and_save_page(url, site_name, timeout=DEFAULT_TIMEOUT, state=None, stream=None):
+    """
+    Descarga la página web y la sube a S3 con la estructura deseada.
+    Si se pasa `state`, hace un GET condicional y no sube la página cuando no cambió
+    (respuesta 304 o mismo hash de contenido). En ese caso también retorna True.
+    Con `stream` (por defecto STREAM_UPLOADS) la página no se carga completa en memoria.
+    """
+    from requests.exceptions import RequestException
+
+    site_state = state.get(site_name, {}) if state is not None else {}
+    stream = STREAM_UPLOADS if stream is None else stream
+    try:
+        with telemetry.span("download"):
+            response = get_http_session().get(url, timeout=timeout, headers=conditional_headers(site_state), stream=stream)
+        if response.status_code == 304:
+            telemetry.info("La página no ha cambiado (304). No se sube a S3.", site=site_name)
+            telemetry.count("pages_unchanged")
+            return True
         response.raise_for_status() # Lanza una excepción para errores HTTP (ej. 404, 500)
 
         # Formato de fecha para el nombre del archivo
@@ -31,38 +309,91 @@ def download_and_save_page(url, site_name):
         # Define el nombre del objeto en S3 según la estructura solicitada
         object_name = f"{S3_PREFIX}/{site_name}-{date_str}.html"
 
-        return upload_to_s3(response.text, object_name)
+        if stream:
+            return stream_page_to_s3(response, object_name, site_name, state)
+
+        # Un solo hash por página, sobre los bytes tal como llegaron: el mismo que guarda el
+        # estado de descargas y el que lee la caché de resultados de punto2
+        content_hash = hashlib.sha256(response.content).hexdigest()
+        if state is not None:
+            if content_hash == site_state.get("sha256"):
+                telemetry.info("Mismo contenido que la última descarga. No se sube a S3.", site=site_name)
+                telemetry.count("pages_unchanged")
+                state[site_name] = dict(site_state, **cache_validators(response))
+                return True
+
+        uploaded = upload_to_s3(response.text, object_name, content_hash=content_hash)
+        if uploaded and state is not None:
+            state[site_name] = dict(cache_validators(response), sha256=content_hash)
+        return uploaded
 
-    except requests.exceptions.RequestException as e:
-        print(f"Error al descargar {url}: {e}")
+    except RequestException as e:
+        telemetry.error("Error al descargar la página", url=url, error=str(e))
         return False
 
+def cache_validators(response):
+    """Extrae ETag y Last-Modified de la respuesta (solo los que vengan)."""
+    validators = {}
+    if response.headers.get("ETag"):
+        validators["etag"] = response.headers["ETag"]
+    if response.headers.get("Last-Modified"):
+        validators["last_modified"] = response.headers["Last-Modified"]
+    return validators
+
+def fetch_sites(sites, max_workers=MAX_WORKERS, state=None):
+    """
+    Descarga y sube todos los sitios en paralelo con un pool de hilos acotado.
+    Retorna un diccionario {nombre_sitio: True/False}. Cada hilo solo modifica
+    la entrada de su propio sitio en `state`.
+    """
+    if not sites:
+        return {}
+
+    def fetch(site):
+        try:
+            return download_and_save_page(site["url"], site["name"], site.get("timeout", DEFAULT_TIMEOUT), state)
+        except Exception as e: # Un sitio con error no debe tumbar a los demás
+            telemetry.error("Error inesperado procesando el sitio", site=site['name'], error=str(e))
+            return False
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(sites)))) as executor:
+        outcomes = list(executor.map(fetch, sites))
+
+    return {site["name"]: outcome for site, outcome in zip(sites, outcomes)}
+
 def handler(event, context):
     """
     Función principal que será ejecutada por AWS Lambda.
     """
-    print("Iniciando descarga y subida de páginas a S3...")
-    
-    # Descargar y guardar El Tiempo
-    success_tiempo = download_and_save_page("https://www.eltiempo.com/", "eltiempo")
-    
-    # Descargar y guardar El Espectador
-    success_espectador = download_and_save_page("https://www.elespectador.com/", "elespectador")
-    
-    # Opcional: Descargar y guardar Publimetro (descomenta si lo prefieres)
-    # success_publimetro = download_and_save_page("https://www.publimetro.co/", "publimetro")
+    telemetry.info("Iniciando descarga y subida de páginas a S3")
 
-    if success_tiempo and success_espectador: # y success_publimetro si lo incluyes
+    state = load_fetch_state()
+    previous_state = json.dumps(state, sort_keys=True)
+    results = fetch_sites(load_sites(), state=state)
+    if json.dumps(state, sort_keys=True) != previous_state:
+        save_fetch_state(state)
+    for site_name, success in results.items():
+        telemetry.info("Resultado del sitio", site=site_name, status='OK' if success else 'ERROR')
+        telemetry.count("sites_ok" if success else "sites_error")
+    telemetry.flush_metrics(Function="punto1")
+
+    if results and all(results.values()):
         return {
             'statusCode': 200,
-            'body': 'Páginas descargadas y subidas a S3 exitosamente.'
+            'body': 'Páginas descargadas y subidas a S3 exitosamente.',
+            'results': results
         }
     else:
         return {
             'statusCode': 500,
-            'body': 'Hubo un error al descargar y/o subir una o más páginas.'
+            'body': 'Hubo un error al descargar y/o subir una o más páginas.',
+            'results': results
         }
 
+if clients.PREWARM:
+    get_s3_client()
+    get_http_session()
+
 if __name__ == '__main__':
     # Para probar la función localmente (requiere que tengas configuradas tus credenciales AWS
     # y que el bucket S3_BUCKET_NAME ya exista).
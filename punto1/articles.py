@@ -0,0 +1,370 @@
+"""
+Descarga asíncrona de los cuerpos de las noticias (los enlaces de headlines/final/).
+
+Son miles de páginas por periódico y día: con requests en serie (como la portada en
+download_and_save_page) tomaría horas, así que aquí un número fijo de workers asyncio comparte
+una sesión aiohttp:
+
+- pool de conexiones por host (limit_per_host) con keep-alive;
+- límite de cortesía por host con un token bucket (ARTICLE_HOST_RATE peticiones por segundo,
+  ráfagas de ARTICLE_HOST_BURST); un 429/503 con Retry-After frena a todo el host;
+- reintentos con backoff exponencial y jitter para errores de red, timeouts y 429/5xx;
+- GET condicional con el ETag / Last-Modified de la descarga anterior y sin subir nada si el
+  contenido tiene el mismo sha256. Ese estado va en los metadatos del propio artículo en S3: se
+  escribe junto con el cuerpo (una invocación que se corta no pierde lo ya subido, dos
+  invocaciones simultáneas no se pisan el estado de otros enlaces) y se consulta con un
+  head_object por enlace, así el costo no crece con la historia;
+- el cuerpo se copia por bloques a un buffer acotado (open_spool) y se sube con
+  upload_fileobj_to_s3 en un hilo, sin bloquear el loop.
+
+Cada artículo queda en headlines/articles/periodico=<p>/<hash del enlace>.html, en el bucket del
+que vienen los enlaces, con el enlace en los metadatos. Los enlaces se intercalan por host para que un periódico
+lento no deje sin trabajo al otro. Requiere aiohttp (solo este módulo).
+
+Uso:
+    python -m punto1.articles --newspaper eltiempo --date 2025-01-31 [--concurrency 32]
+    python -m punto1.articles --key headlines/final/periodico=eltiempo/.../eltiempo-headlines-2025-01-31.csv
+"""
+import argparse
+import asyncio
+import csv
+import hashlib
+import io
+import json
+import os
+import random
+import re
+import time
+from datetime import date, datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import unquote_plus, urlsplit
+
+from botocore.exceptions import ClientError
+
+from common import telemetry
+from punto1 import app
+
+ARTICLES_PREFIX = "headlines/articles"
+FINAL_PREFIX = "headlines/final"
+FINAL_KEY_RE = re.compile(r"^headlines/final/periodico=(?P<periodico>[^/]+)/.+\.csv$")
+CSV_DELIMITER = '>'
+NOT_FOUND_CODES = ("NoSuchKey", "404", "NotFound")
+
+# --- Configuración de descarga ---
+ARTICLE_CONCURRENCY = int(os.environ.get("ARTICLE_CONCURRENCY", "32")) # Descargas en curso en total
+ARTICLE_HOST_CONNECTIONS = int(os.environ.get("ARTICLE_HOST_CONNECTIONS", "8")) # Conexiones por host
+ARTICLE_HOST_RATE = float(os.environ.get("ARTICLE_HOST_RATE", "10")) # Peticiones por segundo por host
+ARTICLE_HOST_BURST = int(os.environ.get("ARTICLE_HOST_BURST", "10"))
+ARTICLE_TIMEOUT = 20 # Segundos por intento
+MAX_ATTEMPTS = 4
+BACKOFF_BASE = 0.5 # Segundos antes del segundo intento; se duplica en cada reintento
+BACKOFF_MAX = 30
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+USER_AGENT = "parcial3-headlines/1.0 (+https://github.com/Luanzy16/parcialc3-bigdata)"
+
+
+class TokenBucket:
+    """Límite de peticiones por segundo con ráfagas de hasta `burst`, para un host."""
+
+    def __init__(self, rate, burst, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.clock = clock
+        self.updated = clock()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """Espera hasta que haya un token y lo consume (las esperas se atienden en orden)."""
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+    def pause(self, seconds):
+        """Deja al host sin tokens por `seconds` (p. ej. tras un Retry-After)."""
+        self._refill()
+        self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+class RetryableStatus(Exception):
+    """Respuesta HTTP que vale la pena reintentar (429/5xx)."""
+
+    def __init__(self, status, retry_after=None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+def retry_after_seconds(value):
+    """Segundos del encabezado Retry-After (número o fecha HTTP), o None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, retry_after=None):
+    """Espera antes del intento `attempt + 1`: backoff exponencial con jitter completo."""
+    delay = random.uniform(0, min(BACKOFF_MAX, base * 2 ** (attempt - 1)))
+    return max(delay, retry_after or 0)
+
+
+def article_key(periodico, link):
+    """Ruta estable del cuerpo de un artículo (el mismo enlace siempre va a la misma llave)."""
+    return f"{ARTICLES_PREFIX}/periodico={periodico}/{hashlib.sha1(link.encode('utf-8')).hexdigest()[:20]}.html"
+
+
+def article_state(s3_client, bucket, key):
+    """
+    Validadores (etag, last_modified) y sha256 de la última descarga guardada en los metadatos
+    del artículo, o {} si todavía no existe.
+    """
+    try:
+        metadata = s3_client.head_object(Bucket=bucket, Key=key).get('Metadata', {})
+    except ClientError as e:
+        if e.response['Error']['Code'] not in NOT_FOUND_CODES:
+            telemetry.warning("No se pudo leer el estado del artículo. Se descarga completo.", key=key, error=str(e))
+        return {}
+    state = {'etag': metadata.get('source-etag'), 'last_modified': metadata.get('source-last-modified'),
+             'sha256': metadata.get('sha256')}
+    return {name: value for name, value in state.items() if value}
+
+
+def state_metadata(link, validators):
+    """Metadatos que acompañan al cuerpo: enlace de origen y validadores HTTP de la respuesta."""
+    metadata = {'link': link}
+    if validators.get('etag'):
+        metadata['source-etag'] = validators['etag']
+    if validators.get('last_modified'):
+        metadata['source-last-modified'] = validators['last_modified']
+    return metadata
+
+
+def final_keys_from_event(event):
+    """Retorna (bucket, llaves CSV de headlines/final) de un evento S3 o de {"bucket", "keys"}."""
+    if 'keys' in event:
+        return event.get('bucket') or app.S3_BUCKET_NAME, list(event['keys'])
+    bucket, keys = app.S3_BUCKET_NAME, []
+    for record in event.get('Records', []):
+        bucket = record['s3']['bucket']['name']
+        keys.append(unquote_plus(record['s3']['object']['key']))
+    return bucket, keys
+
+
+def read_links(s3_client, bucket, keys):
+    """
+    Enlaces de las filas de los CSV finales, sin repetidos y en orden.
+    Retorna una lista de (periodico, enlace).
+    """
+    links, seen = [], set()
+    for key in keys:
+        match = FINAL_KEY_RE.match(key)
+        if not match:
+            continue
+        body = s3_client.get_object(Bucket=bucket, Key=key)['Body'].read().decode('utf-8')
+        for row in csv.DictReader(io.StringIO(body), delimiter=CSV_DELIMITER):
+            link = (row.get('link') or '').strip()
+            if link.startswith(('http://', 'https://')) and link not in seen:
+                seen.add(link)
+                links.append((match.group('periodico'), link))
+    return links
+
+
+def interleave_by_host(links):
+    """Reordena los enlaces alternando hosts (round robin), conservando el orden dentro de cada host."""
+    by_host = {}
+    for item in links:
+        by_host.setdefault(urlsplit(item[1]).netloc, []).append(item)
+    queues = list(by_host.values())
+    ordered = []
+    for position in range(max((len(queue) for queue in queues), default=0)):
+        ordered.extend(queue[position] for queue in queues if position < len(queue))
+    return ordered
+
+
+def article_result(link, status, key=None, attempts=0, size=0, error=None):
+    """Resultado de la descarga de un artículo."""
+    return {'link': link, 'status': status, 'key': key, 'attempts': attempts, 'bytes': size, 'error': error}
+
+
+async def download_article(session, s3_client, bucket, periodico, link, limiter_for_host, max_attempts, backoff_base):
+    """
+    Descarga un artículo con reintentos y lo sube a `bucket` si cambió. Retorna el resultado
+    (ver article_result); 'unchanged' si respondió 304 o el hash es el mismo.
+    """
+    import aiohttp
+
+    key = article_key(periodico, link)
+    previous = await asyncio.to_thread(article_state, s3_client, bucket, key)
+    headers = app.conditional_headers(previous)
+    limiter = limiter_for_host(urlsplit(link).netloc)
+    for attempt in range(1, max_attempts + 1):
+        await limiter.acquire()
+        try:
+            with telemetry.span("download"):
+                async with session.get(link, headers=headers) as response:
+                    if response.status == 304:
+                        telemetry.count("articles_unchanged")
+                        return article_result(link, 'unchanged', key, attempt)
+                    if response.status in RETRY_STATUSES:
+                        raise RetryableStatus(response.status, retry_after_seconds(response.headers.get('Retry-After')))
+                    if response.status >= 400:
+                        return article_result(link, 'error', key, attempt, error=f"HTTP {response.status}")
+
+                    spool, writer, content_encoding = app.open_spool(app.RAW_COMPRESSION)
+                    try:
+                        digest, size = hashlib.sha256(), 0
+                        async for chunk in response.content.iter_chunked(app.STREAM_CHUNK_SIZE):
+                            digest.update(chunk)
+                            writer.write(chunk)
+                            size += len(chunk)
+                        app.finish_spool(spool, writer)
+                    except BaseException: # Cuerpo cortado a medias: el reintento abre otro spool
+                        spool.close()
+                        raise
+                    validators = app.cache_validators(response)
+                    charset = app.response_charset(response)
+        except (aiohttp.ClientError, asyncio.TimeoutError, RetryableStatus) as e:
+            if attempt == max_attempts:
+                telemetry.error("No se pudo descargar el artículo", link=link, attempts=attempt, error=str(e) or type(e).__name__)
+                return article_result(link, 'error', key, attempt, error=str(e) or type(e).__name__)
+            retry_after = getattr(e, 'retry_after', None)
+            if retry_after:
+                limiter.pause(retry_after)
+            telemetry.count("article_retries")
+            await asyncio.sleep(backoff_delay(attempt, backoff_base, retry_after))
+            continue
+
+        content_hash = digest.hexdigest()
+        with spool:
+            if content_hash == previous.get('sha256'):
+                telemetry.count("articles_unchanged")
+                return article_result(link, 'unchanged', key, attempt, size)
+            uploaded = await asyncio.to_thread(app.upload_fileobj_to_s3, spool, key, content_encoding, size,
+                                               charset, content_hash, bucket, state_metadata(link, validators))
+        if not uploaded:
+            return article_result(link, 'error', key, attempt, size, error="fallo al subir a S3")
+        telemetry.count("articles_downloaded")
+        return article_result(link, 'ok', key, attempt, size)
+
+
+async def crawl_articles(links, bucket, concurrency=ARTICLE_CONCURRENCY, host_connections=ARTICLE_HOST_CONNECTIONS,
+                         host_rate=ARTICLE_HOST_RATE, host_burst=ARTICLE_HOST_BURST, timeout=ARTICLE_TIMEOUT,
+                         max_attempts=MAX_ATTEMPTS, backoff_base=BACKOFF_BASE):
+    """
+    Descarga `links` ([(periodico, enlace)]) con `concurrency` workers y los sube a `bucket`.
+    Retorna los resultados en el orden de `links`.
+    """
+    try:
+        import aiohttp
+    except ImportError as e:
+        raise RuntimeError("La descarga de artículos requiere aiohttp (pip install aiohttp).") from e
+
+    s3_client = app.get_s3_client()
+    limiters = {}
+
+    def limiter_for_host(host):
+        if host not in limiters:
+            limiters[host] = TokenBucket(host_rate, host_burst)
+        return limiters[host]
+
+    queue = asyncio.Queue()
+    for item in interleave_by_host(links):
+        queue.put_nowait(item)
+    order = {item[1]: index for index, item in enumerate(links)}
+    results = [None] * len(links)
+
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=host_connections, ttl_dns_cache=300)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout,
+                                     headers={'User-Agent': USER_AGENT}) as session:
+        async def worker():
+            while True:
+                try:
+                    periodico, link = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    result = await download_article(session, s3_client, bucket, periodico, link, limiter_for_host,
+                                                    max_attempts, backoff_base)
+                except Exception as e: # Un artículo con error no debe detener a los demás
+                    telemetry.error("Error inesperado descargando el artículo", link=link, error=str(e))
+                    result = article_result(link, 'error', error=str(e))
+                results[order[link]] = result
+
+        await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, len(links))))))
+    return results
+
+
+def summarize(results, elapsed):
+    summary = {status: sum(1 for r in results if r['status'] == status) for status in ('ok', 'unchanged', 'error')}
+    summary.update(bytes=sum(r['bytes'] for r in results), seconds=round(elapsed, 3),
+                   articles_per_s=round(len(results) / elapsed, 2) if elapsed else 0.0)
+    return summary
+
+
+def run(bucket, keys, **options):
+    """Descarga a `bucket` los artículos de sus CSV `keys`. Retorna (resumen, resultados)."""
+    links = read_links(app.get_s3_client(), bucket, keys)
+    telemetry.info("Descargando artículos", links=len(links), newspapers=sorted({periodico for periodico, _ in links}))
+
+    start = time.perf_counter()
+    results = asyncio.run(crawl_articles(links, bucket, **options))
+    summary = summarize(results, time.perf_counter() - start)
+    telemetry.info("Descarga de artículos terminada", **summary)
+    return summary, results
+
+
+def handler(event, context):
+    """Con el evento S3 de headlines/final/*.csv (o {"bucket", "keys"}) descarga sus artículos."""
+    bucket, keys = final_keys_from_event(event)
+    summary, _ = run(bucket, keys)
+    telemetry.flush_metrics(Function="articles")
+    return {'statusCode': 200 if summary['error'] == 0 else 500, 'summary': summary}
+
+
+def list_final_keys(s3_client, bucket, newspapers, day):
+    """Llaves CSV de headlines/final de `day` para los periódicos pedidos."""
+    keys = []
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for periodico in newspapers:
+        prefix = (f"{FINAL_PREFIX}/periodico={periodico}/year={day:%Y}/month={day:%m}/day={day:%d}/")
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+            keys.extend(obj['Key'] for obj in page.get('Contents', []) if obj['Key'].endswith('.csv'))
+    return keys
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Descarga los cuerpos de las noticias de headlines/final/.")
+    parser.add_argument('--bucket', default=app.S3_BUCKET_NAME)
+    parser.add_argument('--key', action='append', dest='keys', help="CSV de headlines/final (repetible)")
+    parser.add_argument('--newspaper', action='append', dest='newspapers', help="Periódico a incluir (repetible)")
+    parser.add_argument('--date', type=date.fromisoformat, default=date.today(), help="Día AAAA-MM-DD de --newspaper")
+    parser.add_argument('--concurrency', type=int, default=ARTICLE_CONCURRENCY)
+    parser.add_argument('--host-rate', type=float, default=ARTICLE_HOST_RATE, help="Peticiones por segundo por host")
+    args = parser.parse_args(argv)
+
+    keys = list(args.keys or [])
+    if args.newspapers:
+        keys += list_final_keys(app.get_s3_client(), args.bucket, args.newspapers, args.date)
+    summary, _ = run(args.bucket, keys, concurrency=args.concurrency, host_rate=args.host_rate)
+    print(json.dumps(summary))
+    return 0 if summary['error'] == 0 else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
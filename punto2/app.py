@@ -1,58 +1,394 @@
-import boto3
 import csv
+import gzip
+import itertools
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from io import StringIO
 from urllib.parse import urljoin
-from bs4 import BeautifulSoup
 from datetime import datetime
 import os
+import uuid
+
+from common import clients, telemetry
+from punto2 import incremental, result_cache, seen_index, streaming
+from punto2.extraction_plan import compile_selectors, match_selectors
 
 # --- Configuración S3 ---
 # ¡IMPORTANTE! Reemplaza "tu-nombre-de-bucket-s3-para-headlines" con el nombre REAL de tu bucket S3.
 S3_BUCKET_NAME = "parcial3luis" # ¡Mantén tu nombre de bucket real aquí!
 S3_RAW_PREFIX = "headlines/raw"
 S3_FINAL_PREFIX = "headlines/final"
+# El Parquet va en su propio prefijo con el mismo esquema de particiones Hive, así el crawler
+# no mezcla archivos de texto y columnares en una misma tabla.
+S3_PARQUET_PREFIX = "headlines/parquet"
+# Formatos de salida separados por coma: "csv", "parquet" o "csv,parquet" (requiere pyarrow)
+OUTPUT_FORMATS = [f.strip() for f in os.environ.get("OUTPUT_FORMATS", "csv").lower().split(",") if f.strip()]
+CSV_FIELDNAMES = ['category', 'title', 'link']
+# "overwrite": un archivo por día que se reemplaza en cada ejecución (comportamiento original).
+# "merge": cada ejecución agrega a la partición solo los titulares nuevos (ver punto2.incremental).
+WRITE_MODE = os.environ.get("WRITE_MODE", "overwrite").lower()
+MERGE_MAX_ATTEMPTS = 5
+# Titulares nuevos entre días (ver punto2.seen_index): "" desactivado, "tag" agrega la
+# columna is_new a la salida, "stream" escribe solo los nuevos en headlines/new/.
+SEEN_INDEX_MODE = os.environ.get("SEEN_INDEX_MODE", "").lower()
+S3_NEW_PREFIXES = {'csv': "headlines/new", 'parquet': "headlines/new_parquet"}
+
+# --- Procesamiento en paralelo de registros ---
+RECORD_WORKERS = int(os.environ.get("RECORD_WORKERS", "4")) # Registros a la vez (E/S con S3)
+EXTRACT_WORKERS = int(os.environ.get("EXTRACT_WORKERS", "0")) # >0: extracción en un pool de procesos
+
+# --- Escritura en streaming ---
+# En modo overwrite sin índice de vistos las filas van del extractor (un generador) a los
+# serializadores y de ahí a S3 por partes, sin armar la lista completa ni el CSV entero en
+# memoria. Con merge o SEEN_INDEX_MODE hace falta el lote completo y se usa la ruta con listas.
+STREAM_OUTPUT = os.environ.get("STREAM_OUTPUT", "1").lower() in ("1", "true", "yes")
+MULTIPART_PART_SIZE = 8 * 1024 * 1024 # Bytes por parte (S3 exige al menos 5 MB)
+
+# --- Almacén local de páginas crudas ---
+# Con RAW_STORE_PATH las llaves de headlines/raw/ se leen de ese directorio (mismo árbol de
+# llaves que el bucket) en vez de descargarlas de S3: los bytes del archivo van al parser sin
+# decodificarlos. Útil en corridas locales.
+RAW_STORE_PATH = os.environ.get("RAW_STORE_PATH", "")
+
+# --- Caché de resultados ---
+# Con RESULT_CACHE=1 un evento repetido o una página idéntica a la ya procesada termina sin
+# descargar ni reescribir nada (ver punto2.result_cache). Cambiar el código de extracción
+# invalida la caché; EXTRACTION_RULES_VERSION se sube a mano si la salida cambia por otra
+# razón (p. ej. una versión nueva de bs4).
+RESULT_CACHE = os.environ.get("RESULT_CACHE", "").lower() in ("1", "true", "yes")
+EXTRACTION_RULES_VERSION = 1
+
+# Selectores de tarjetas de El Espectador, en orden de prioridad (gana la primera coincidencia)
+ELESPECTADOR_CARD_SELECTORS = [
+    "div.CardLayout-Container",
+    "div.Card",
+    "div.Teaser-container",
+    "article.Content",
+    "div.card-body",
+    # Nuevos selectores añadidos para cubrir más patrones de diseño
+    "div[data-pf-type='BlockArticle']",  # Común en sitios que usan Piano Publisher Framework
+    "div[data-pf-type='BlockPromo']",    # Otro tipo de bloque de contenido
+    "div.promo-container",               # Contenedor genérico para promociones/noticias
+    "div.article-container",             # Contenedor genérico para artículos
+    "div.news-item",                     # Contenedor genérico para ítems de noticias
+    "div.story-card",                    # Un patrón común para tarjetas de noticias
+    "div.headline-card",                 # Otro patrón para tarjetas de titulares
+    "section.main-content article",      # Artículos dentro de la sección principal de contenido
+    "div.section-body .row .col-md-4",   # Patrón común en diseños de cuadrícula
+    "div.listing-item",                  # Elementos en listados de noticias
+    "div.news-card"                      # Otro nombre común para tarjetas de noticias
+]
+ELESPECTADOR_PLAN = compile_selectors(ELESPECTADOR_CARD_SELECTORS)
+# Clases del enlace del titular en las tarjetas <article> de El Tiempo, en orden de prioridad
+ELTIEMPO_LINK_CLASSES = [
+    "c-articulo__titulo__txt",
+    "c-article-block__title-link",
+    "c-main-section__card__title",
+]
+
+# --- Reglas podadas ---
+# Con SELECTOR_RULES_PATH se usan las reglas que generó punto2.selector_profile: sin los
+# selectores que nunca producen filas y con las clases de enlace ordenadas por aciertos, ya
+# verificadas contra las capturas guardadas. El archivo se ignora si las listas completas
+# cambiaron desde que se generó (una regla nueva nunca queda fuera por un archivo viejo).
+SELECTOR_RULES_PATH = os.environ.get("SELECTOR_RULES_PATH", "")
+
+# --- Parseo parcial ---
+# Con PARTIAL_PARSE=1 solo se construyen los subárboles cuya raíz cumple alguno de estos
+# selectores simples. Para El Espectador también se conservan los ancestros que consultan
+# las reglas de tarjeta (contenedores de selectores con descendencia, footer/nav y h1-h4),
+# así el resultado es el mismo que con el árbol completo.
+PARTIAL_PARSE = os.environ.get("PARTIAL_PARSE", "").lower() in ("1", "true", "yes")
+PARTIAL_PARSE_CONTAINERS = {
+    "eltiempo": [
+        "article[data-category]",
+        "div.c-article-block__content",
+        "div.c-main-section__cards__item",
+    ],
+    "elespectador": [
+        "div.CardLayout-Container", "div.Card", "div.Teaser-container", "article.Content",
+        "div.card-body", "div[data-pf-type='BlockArticle']", "div[data-pf-type='BlockPromo']",
+        "div.promo-container", "div.article-container", "div.news-item", "div.story-card",
+        "div.headline-card", "section.main-content", "div.section-body", "div.listing-item",
+        "div.news-card",
+        "[class*='footer']", "[class*='nav']", "h1", "h2", "h3", "h4",
+    ],
+}
+
+def default_rules():
+    """Reglas completas de extracción por periódico."""
+    return {
+        "elespectador": {"card_selectors": list(ELESPECTADOR_CARD_SELECTORS)},
+        "eltiempo": {"link_classes": list(ELTIEMPO_LINK_CLASSES)},
+    }
+
+def load_rules(path):
+    """
+    Lee un archivo de reglas podadas ({periódico: {lista: [...]}, "baseline": reglas completas}).
+    Retorna las reglas completas si el archivo no sirve o se generó con otras listas.
+    """
+    rules = default_rules()
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        telemetry.warning("No se pudo leer el archivo de reglas. Se usan las reglas completas.", path=path, error=str(e))
+        return rules
+    if data.get("baseline") != rules:
+        telemetry.warning("El archivo de reglas se generó con otras listas de selectores. Se ignora.", path=path)
+        return rules
+    for newspaper, lists in rules.items():
+        for name, full in lists.items():
+            pruned = data.get(newspaper, {}).get(name)
+            if pruned is not None and set(pruned) <= set(full):
+                lists[name] = list(pruned)
+    return rules
+
+_active_rules = None
+_plans = {tuple(ELESPECTADOR_CARD_SELECTORS): ELESPECTADOR_PLAN}
+_rules_lock = threading.Lock()
+
+def active_rules():
+    """Reglas en uso: las podadas de SELECTOR_RULES_PATH o las completas (se leen una vez)."""
+    global _active_rules
+    with _rules_lock:
+        if _active_rules is None:
+            _active_rules = load_rules(SELECTOR_RULES_PATH) if SELECTOR_RULES_PATH else default_rules()
+        return _active_rules
+
+def selector_plan(selectors):
+    """Plan compilado de una lista de selectores (se compila una vez por lista)."""
+    key = tuple(selectors)
+    with _rules_lock:
+        if key not in _plans:
+            _plans[key] = compile_selectors(selectors)
+        return _plans[key]
+
+def profile_rule(profile, rule, **deltas):
+    """Suma `deltas` (matches, rows, seconds...) a las estadísticas de `rule` en `profile`."""
+    stats = profile.setdefault(rule, {'matches': 0, 'rows': 0, 'seconds': 0.0})
+    for name, value in deltas.items():
+        stats[name] = stats.get(name, 0) + value
+
+def is_broad_selector(selector):
+    """Indica si el selector es de un contenedor genérico (card-body, *container, *item)."""
+    return 'card-body' in selector or 'container' in selector or 'item' in selector
 
-# El cliente S3 se inicializará directamente, esperando credenciales de AWS configuradas.
+# El cliente S3 se crea una sola vez por contenedor, esperando credenciales de AWS configuradas.
 def get_s3_client():
     """
-    Retorna un cliente S3 real.
+    Retorna el cliente S3 compartido.
     Asegúrate de que tus credenciales de AWS estén configuradas (ej. con 'aws configure').
     """
-    return boto3.client('s3', region_name='sa-east-1') # Usa la región de tu bucket real
+    return clients.get_client('s3', region_name='sa-east-1') # Usa la región de tu bucket real
+
+def content_type_for(object_name):
+    """Content-Type según la extensión del objeto."""
+    if object_name.endswith('.html'):
+        return 'text/html'
+    if object_name.endswith('.parquet'):
+        return 'application/vnd.apache.parquet'
+    return 'text/csv'
 
 def upload_to_s3(file_content, object_name):
     """Sube el contenido del archivo a S3."""
     s3_client = get_s3_client()
     try:
-        s3_client.put_object(Bucket=S3_BUCKET_NAME, Key=object_name, Body=file_content, ContentType='text/html' if object_name.endswith('.html') else 'text/csv')
-        print(f"Archivo subido a S3: s3://{S3_BUCKET_NAME}/{object_name}")
+        with telemetry.span("upload"):
+            s3_client.put_object(Bucket=S3_BUCKET_NAME, Key=object_name, Body=file_content, ContentType=content_type_for(object_name))
+        telemetry.info("Archivo subido a S3", key=object_name, bytes=len(file_content))
         return True
     except Exception as e:
-        print(f"Error al subir a S3: {e}")
+        telemetry.error("Error al subir a S3", key=object_name, error=str(e))
         return False
 
+def open_s3_body(response):
+    """
+    Retorna un stream de lectura del cuerpo de get_object, descomprimiendo al vuelo
+    si el objeto se guardó con Content-Encoding gzip o zstd.
+    """
+    encoding = (response.get('ContentEncoding') or response.get('Metadata', {}).get('compression') or '').lower()
+    body = response['Body']
+    if encoding == 'gzip':
+        return gzip.GzipFile(fileobj=body)
+    if encoding == 'zstd':
+        import zstandard
+        return zstandard.ZstdDecompressor().stream_reader(body)
+    return body
+
+def delete_from_s3(object_names):
+    """Borra objetos del bucket (se usa para deshacer escrituras parciales)."""
+    if not object_names:
+        return
+    s3_client = get_s3_client()
+    try:
+        s3_client.delete_objects(Bucket=S3_BUCKET_NAME, Delete={'Objects': [{'Key': name} for name in object_names]})
+    except Exception as e:
+        telemetry.error("Error al borrar objetos de S3", keys=object_names, error=str(e))
+
 def download_from_s3(bucket, key):
-    """Descarga el contenido de un archivo de S3."""
+    """
+    Descarga un archivo de S3 sin decodificarlo. Retorna (bytes, charset del Content-Type
+    o None) o (None, None) si falla; el parser resuelve la codificación (ver punto2.parsers).
+    """
+    from punto2.parsers import charset_from_content_type
+
     s3_client = get_s3_client()
     try:
-        response = s3_client.get_object(Bucket=bucket, Key=key)
-        return response['Body'].read().decode('utf-8')
+        with telemetry.span("download"):
+            response = s3_client.get_object(Bucket=bucket, Key=key)
+            return open_s3_body(response).read(), charset_from_content_type(response.get('ContentType'))
     except Exception as e:
-        print(f"Error al descargar s3://{bucket}/{key}: {e}")
-        return None
+        telemetry.error("Error al descargar de S3", bucket=bucket, key=key, error=str(e))
+        return None, None
 
-def extract_news_data(html_content, base_url, newspaper_name):
+def read_local_raw(key, root=None):
     """
-    Extrae la categoría, titular y enlace de las noticias de un contenido HTML
-    basado en el nombre del periódico.
+    Lee la página cruda `key` del almacén local sin decodificarla. Retorna (bytes, None)
+    o (None, None) si no se puede leer.
+    """
+    path = os.path.join(root or RAW_STORE_PATH, *key.split('/'))
+    try:
+        with open(path, 'rb') as f:
+            return f.read(), None
+    except OSError as e:
+        telemetry.error("Error al leer del almacén local", path=path, error=str(e))
+        return None, None
+
+def read_raw_page(bucket, key):
+    """Página cruda sin decodificar y su charset: del almacén local si hay RAW_STORE_PATH o de S3."""
+    if RAW_STORE_PATH:
+        return read_local_raw(key)
+    return download_from_s3(bucket, key)
+
+def extract_elespectador_card(card, broad_selector, base_url):
+    """
+    Extrae categoría, titular y enlace de una tarjeta de El Espectador. Retorna None si la
+    tarjeta no tiene titular o enlace. `broad_selector` activa la búsqueda de enlaces
+    principales (Prioridad 3) para contenedores genéricos como div.card-body.
     """
-    soup = BeautifulSoup(html_content, 'html.parser')
-    news_items = []
+    title = None
+    link = None
+    current_category_for_card = "Sin Categoría"
+
+    # --- Extraer Título y Enlace ---
+    # Prioridad 1: h2 con clases específicas (ej. Card-Title, Promo-title) conteniendo un <a>
+    title_tag_h2 = card.find('h2', class_=lambda c: c and ('Card-Title' in c or 'Promo-title' in c))
+    title_link_tag = None
+    if title_tag_h2:
+        title_link_tag = title_tag_h2.find('a', href=True)
+
+    # Prioridad 2: Cualquier h1, h2, h3, h4 que contenga un <a>
+    if not title_link_tag:
+        heading_tag = card.find(['h1', 'h2', 'h3', 'h4'])
+        if heading_tag:
+            title_link_tag = heading_tag.find('a', href=True)
+
+    # Prioridad 3: Para 'div.card-body' o contenedores similares, buscar enlaces principales
+    if not title_link_tag and broad_selector:
+        # Intentar encontrar el enlace principal que no sea un pie de página o de navegación
+        candidate_links = card.find_all('a', href=True)
+        # Filtrar enlaces que parezcan ser de artículos (ej. tienen texto significativo)
+        for link_candidate in candidate_links:
+            link_text = link_candidate.get_text(strip=True)
+            # Excluir enlaces cortos, solo números o que son claramente de navegación
+            if link_text and len(link_text) > 10 and not link_text.isdigit() and not link_candidate.find_parent(class_=lambda c: c and ('footer' in c or 'nav' in c)):
+                # Si el enlace está dentro de un h-tag o es el único enlace principal
+                if link_candidate.find_parent(['h1', 'h2', 'h3', 'h4']) or \
+                   (len(candidate_links) == 1 and link_candidate.get_text(strip=True)):
+                    title_link_tag = link_candidate
+                    break
+        # Si aún no se encontró, tomar el primer enlace con texto significativo
+        if not title_link_tag and candidate_links:
+            for link_candidate in candidate_links:
+                if link_candidate.get_text(strip=True) and not link_candidate.get_text(strip=True).isdigit():
+                    title_link_tag = link_candidate
+                    break
+
+    if title_link_tag:
+        title_text_candidate = title_link_tag.get_text(strip=True)
+        # Si el texto del enlace está vacío pero su padre h-tag tiene texto, usar el del padre
+        if not title_text_candidate and title_link_tag.parent and title_link_tag.parent.name.startswith(('h1', 'h2', 'h3', 'h4')):
+            title_text_candidate = title_link_tag.parent.get_text(strip=True)
+
+        if title_text_candidate:
+            title = title_text_candidate
+            link_href = title_link_tag.get('href')
+            if link_href:
+                link = urljoin(base_url, link_href)
+
+    # --- Extraer Categoría ---
+    # Prioridad 1: Div contenedor de sección con h4 y enlace
+    section_container_div = card.find('div', class_='Card-SectionContainer')
+    if section_container_div:
+        category_h4_tag = section_container_div.find('h4', class_='Card-Section')
+        if category_h4_tag:
+            category_a_tag = category_h4_tag.find('a')
+            if category_a_tag:
+                category_text = category_a_tag.get_text(strip=True)
+                if category_text:
+                    current_category_for_card = category_text
+
+    # Prioridad 2: h4.Card-Section directo con enlace (si no se encontró por P1)
+    if current_category_for_card == "Sin Categoría":
+        direct_category_h4 = card.find('h4', class_='Card-Section')
+        if direct_category_h4:
+            category_a_tag = direct_category_h4.find('a')
+            if category_a_tag:
+                category_text = category_a_tag.get_text(strip=True)
+                if category_text:
+                    current_category_for_card = category_text
+
+    # Prioridad 3: span.section-name (si no se encontró por P1 o P2)
+    if current_category_for_card == "Sin Categoría":
+        category_span_tag = card.find('span', class_='section-name')
+        if category_span_tag:
+            category_text = category_span_tag.get_text(strip=True)
+            if category_text:
+                current_category_for_card = category_text
+
+    # Prioridad 4: atributo data-category en la tarjeta (si no se encontró antes)
+    if current_category_for_card == "Sin Categoría":
+        data_category_attr = card.get('data-category')
+        if data_category_attr:
+            category_text = data_category_attr.strip()
+            if category_text and category_text != "Sin Categoría":
+                current_category_for_card = category_text
+
+    if title and link:
+        return {
+            'category': current_category_for_card,
+            'title': title,
+            'link': link
+        }
+    return None
+
+def iter_news_data(html_content, base_url, newspaper_name, backend=None, partial=None, encoding=None,
+                   rules=None, profile=None):
+    """
+    Generador de las noticias (categoría, titular y enlace) de un contenido HTML (str o
+    bytes) según el periódico, en el mismo orden y sin duplicados, a medida que se encuentran.
+    `backend` elige el parser (ver punto2.parsers), `partial` (por defecto PARTIAL_PARSE)
+    activa el parseo parcial por contenedores y `encoding` es el charset de los metadatos.
+    `rules` reemplaza las reglas en uso (ver active_rules) y con `profile` (un dict) se
+    acumulan por regla las coincidencias, filas y segundos (ver punto2.selector_profile).
+    """
+    from punto2.parsers import parse_html # bs4 se carga solo si hay algo que extraer
+
+    rules = rules or active_rules()
+    partial = PARTIAL_PARSE if partial is None else partial
+    containers = PARTIAL_PARSE_CONTAINERS.get(newspaper_name) if partial else None
+    with telemetry.span("parse"):
+        soup = parse_html(html_content, backend, containers, encoding)
     processed_links = set() # Usar un set para evitar duplicados de manera eficiente
 
     if newspaper_name == "eltiempo":
+        link_classes = rules["eltiempo"]["link_classes"]
         # (Lógica para El Tiempo se mantiene igual, omitida aquí por brevedad pero presente en el script completo)
         # Nuevo enfoque para El Tiempo: buscar elementos <article> con data-category
+        section_start = time.perf_counter() if profile is not None else 0
         articles = soup.find_all('article', attrs={'data-category': True})
         for article in articles:
             category_text = article.get('data-category', "Sin Categoría").strip()
@@ -62,11 +398,16 @@ def extract_news_data(html_content, base_url, newspaper_name):
                 pass # La categoría se usa directamente.
             category = category_text if category_text else "Sin Categoría"
 
-            title_link_tag = article.find('a', class_='c-articulo__titulo__txt', href=True)
-            if not title_link_tag:
-                title_link_tag = article.find('a', class_='c-article-block__title-link', href=True)
-            if not title_link_tag:
-                title_link_tag = article.find('a', class_='c-main-section__card__title', href=True)
+            # Se prueba cada clase de enlace en orden hasta encontrar una
+            title_link_tag = None
+            for link_class in link_classes:
+                find_start = time.perf_counter() if profile is not None else 0
+                title_link_tag = article.find('a', class_=link_class, href=True)
+                if profile is not None:
+                    profile_rule(profile, f"eltiempo link {link_class}", matches=int(title_link_tag is not None),
+                                 tries=1, seconds=time.perf_counter() - find_start)
+                if title_link_tag:
+                    break
 
             if title_link_tag:
                 title = title_link_tag.get_text(strip=True)
@@ -74,14 +415,21 @@ def extract_news_data(html_content, base_url, newspaper_name):
                 if title and link_href:
                     link = urljoin(base_url, link_href)
                     if link not in processed_links:
-                        news_items.append({
+                        processed_links.add(link)
+                        if profile is not None:
+                            profile_rule(profile, f"eltiempo link {link_class}", rows=1)
+                            profile_rule(profile, "eltiempo article[data-category]", rows=1)
+                        yield {
                             'category': category,
                             'title': title,
                             'link': link
-                        })
-                        processed_links.add(link)
+                        }
+        if profile is not None:
+            profile_rule(profile, "eltiempo article[data-category]", matches=len(articles),
+                         seconds=time.perf_counter() - section_start)
                         
         # Patrones adicionales para El Tiempo para mayor cobertura
+        section_start = time.perf_counter() if profile is not None else 0
         article_content_blocks = soup.find_all('div', class_='c-article-block__content')
         for block in article_content_blocks:
             category = "Sin Categoría"
@@ -98,13 +446,19 @@ def extract_news_data(html_content, base_url, newspaper_name):
                 if title and link_href:
                     link = urljoin(base_url, link_href)
                     if link not in processed_links:
-                        news_items.append({
+                        processed_links.add(link)
+                        if profile is not None:
+                            profile_rule(profile, "eltiempo div.c-article-block__content", rows=1)
+                        yield {
                             'category': category,
                             'title': title,
                             'link': link
-                        })
-                        processed_links.add(link)
+                        }
+        if profile is not None:
+            profile_rule(profile, "eltiempo div.c-article-block__content", matches=len(article_content_blocks),
+                         seconds=time.perf_counter() - section_start)
                         
+        section_start = time.perf_counter() if profile is not None else 0
         main_section_cards = soup.find_all('div', class_='c-main-section__cards__item')
         for card_el_tiempo in main_section_cards: # Renombrada la variable card para evitar conflicto
             category = "Sin Categoría"
@@ -121,244 +475,496 @@ def extract_news_data(html_content, base_url, newspaper_name):
                 if title and link_href:
                     link = urljoin(base_url, link_href)
                     if link not in processed_links:
-                        news_items.append({
+                        processed_links.add(link)
+                        if profile is not None:
+                            profile_rule(profile, "eltiempo div.c-main-section__cards__item", rows=1)
+                        yield {
                             'category': category,
                             'title': title,
                             'link': link
-                        })
-                        processed_links.add(link)
+                        }
+        if profile is not None:
+            profile_rule(profile, "eltiempo div.c-main-section__cards__item", matches=len(main_section_cards),
+                         seconds=time.perf_counter() - section_start)
 
     elif newspaper_name == "elespectador":
         # --- Lógica de Extracción para El Espectador (Mejorada con más selectores) ---
-        
-        card_selectors = [
-            "div.CardLayout-Container",
-            "div.Card",
-            "div.Teaser-container",
-            "article.Content",
-            "div.card-body",
-            # Nuevos selectores añadidos para cubrir más patrones de diseño
-            "div[data-pf-type='BlockArticle']",  # Común en sitios que usan Piano Publisher Framework
-            "div[data-pf-type='BlockPromo']",    # Otro tipo de bloque de contenido
-            "div.promo-container",               # Contenedor genérico para promociones/noticias
-            "div.article-container",             # Contenedor genérico para artículos
-            "div.news-item",                     # Contenedor genérico para ítems de noticias
-            "div.story-card",                    # Un patrón común para tarjetas de noticias
-            "div.headline-card",                 # Otro patrón para tarjetas de titulares
-            "section.main-content article",      # Artículos dentro de la sección principal de contenido
-            "div.section-body .row .col-md-4",   # Patrón común en diseños de cuadrícula
-            "div.listing-item",                  # Elementos en listados de noticias
-            "div.news-card"                      # Otro nombre común para tarjetas de noticias
-        ]
-        
-        for selector in card_selectors:
-            article_cards = soup.select(selector)
-            
+        # Un solo recorrido del DOM para todos los selectores (ver punto2.extraction_plan).
+        # Se conserva el orden selector por selector para que gane la primera coincidencia.
+        card_selectors = rules["elespectador"]["card_selectors"]
+        if profile is not None:
+            # Lo que costaría cada selector con su propio recorrido del documento
+            for selector in card_selectors:
+                select_start = time.perf_counter()
+                soup.select(selector)
+                profile_rule(profile, f"elespectador {selector}", select_seconds=time.perf_counter() - select_start)
+        matches = match_selectors(soup, card_selectors, selector_plan(card_selectors))
+        card_results = {} # Una tarjeta que cumple varios selectores se procesa una sola vez
+        log_rows = telemetry.enabled_for("DEBUG") # El log por fila solo se paga en DEBUG
+        for selector, article_cards in zip(card_selectors, matches):
+            broad_selector = is_broad_selector(selector)
+            selector_rows = 0
+            selector_start = time.perf_counter() if profile is not None else 0
             for card in article_cards:
-                title = None
-                link = None
-                current_category_for_card = "Sin Categoría"
-                
-                # --- Extraer Título y Enlace ---
-                # Prioridad 1: h2 con clases específicas (ej. Card-Title, Promo-title) conteniendo un <a>
-                title_tag_h2 = card.find('h2', class_=lambda c: c and ('Card-Title' in c or 'Promo-title' in c))
-                title_link_tag = None
-                if title_tag_h2:
-                    title_link_tag = title_tag_h2.find('a', href=True)
-                
-                # Prioridad 2: Cualquier h1, h2, h3, h4 que contenga un <a>
-                if not title_link_tag:
-                    heading_tag = card.find(['h1', 'h2', 'h3', 'h4'])
-                    if heading_tag:
-                        title_link_tag = heading_tag.find('a', href=True)
-                
-                # Prioridad 3: Para 'div.card-body' o contenedores similares, buscar enlaces principales
-                if not title_link_tag and ('card-body' in selector or 'container' in selector or 'item' in selector):
-                    # Intentar encontrar el enlace principal que no sea un pie de página o de navegación
-                    candidate_links = card.find_all('a', href=True)
-                    # Filtrar enlaces que parezcan ser de artículos (ej. tienen texto significativo)
-                    for link_candidate in candidate_links:
-                        link_text = link_candidate.get_text(strip=True)
-                        # Excluir enlaces cortos, solo números o que son claramente de navegación
-                        if link_text and len(link_text) > 10 and not link_text.isdigit() and not link_candidate.find_parent(class_=lambda c: c and ('footer' in c or 'nav' in c)):
-                            # Si el enlace está dentro de un h-tag o es el único enlace principal
-                            if link_candidate.find_parent(['h1', 'h2', 'h3', 'h4']) or \
-                               (len(candidate_links) == 1 and link_candidate.get_text(strip=True)):
-                                title_link_tag = link_candidate
-                                break
-                    # Si aún no se encontró, tomar el primer enlace con texto significativo
-                    if not title_link_tag and candidate_links:
-                        for link_candidate in candidate_links:
-                            if link_candidate.get_text(strip=True) and not link_candidate.get_text(strip=True).isdigit():
-                                title_link_tag = link_candidate
-                                break
-                
-                
-                if title_link_tag:
-                    title_text_candidate = title_link_tag.get_text(strip=True)
-                    # Si el texto del enlace está vacío pero su padre h-tag tiene texto, usar el del padre
-                    if not title_text_candidate and title_link_tag.parent and title_link_tag.parent.name.startswith(('h1', 'h2', 'h3', 'h4')):
-                        title_text_candidate = title_link_tag.parent.get_text(strip=True)
-                    
-                    if title_text_candidate:
-                        title = title_text_candidate
-                        link_href = title_link_tag.get('href')
-                        if link_href:
-                            link = urljoin(base_url, link_href)
-                
-                # --- Extraer Categoría ---
-                # Prioridad 1: Div contenedor de sección con h4 y enlace
-                section_container_div = card.find('div', class_='Card-SectionContainer')
-                if section_container_div:
-                    category_h4_tag = section_container_div.find('h4', class_='Card-Section')
-                    if category_h4_tag:
-                        category_a_tag = category_h4_tag.find('a')
-                        if category_a_tag:
-                            category_text = category_a_tag.get_text(strip=True)
-                            if category_text:
-                                current_category_for_card = category_text
-                
-                # Prioridad 2: h4.Card-Section directo con enlace (si no se encontró por P1)
-                if current_category_for_card == "Sin Categoría":
-                    direct_category_h4 = card.find('h4', class_='Card-Section')
-                    if direct_category_h4:
-                        category_a_tag = direct_category_h4.find('a')
-                        if category_a_tag:
-                            category_text = category_a_tag.get_text(strip=True)
-                            if category_text:
-                                current_category_for_card = category_text
-                
-                # Prioridad 3: span.section-name (si no se encontró por P1 o P2)
-                if current_category_for_card == "Sin Categoría":
-                    category_span_tag = card.find('span', class_='section-name')
-                    if category_span_tag:
-                        category_text = category_span_tag.get_text(strip=True)
-                        if category_text:
-                            current_category_for_card = category_text
-                
-                # Prioridad 4: atributo data-category en la tarjeta (si no se encontró antes)
-                if current_category_for_card == "Sin Categoría":
-                    data_category_attr = card.get('data-category')
-                    if data_category_attr:
-                        category_text = data_category_attr.strip()
-                        if category_text and category_text != "Sin Categoría":
-                            current_category_for_card = category_text
-                
+                cache_key = (id(card), broad_selector)
+                if cache_key not in card_results:
+                    card_results[cache_key] = extract_elespectador_card(card, broad_selector, base_url)
+                card_item = card_results[cache_key]
+
                 # Añadir a news_items si es válido y no duplicado
-                if title and link and link not in processed_links:
-                    news_item = {
-                        'category': current_category_for_card,
-                        'title': title,
-                        'link': link
-                    }
-                    news_items.append(news_item)
-                    processed_links.add(link)
-                    # Imprime cada noticia extraída
-                    print(f"Noticia extraída: Categoría: '{news_item['category']}', Título: '{news_item['title']}', Enlace: '{news_item['link']}'")
-            
-        # Al finalizar la extracción para el periódico, imprime el total
-        print(f"Número total de noticias extraídas para El Espectador: {len(news_items)}")
-        
-    return news_items
+                if card_item and card_item['link'] not in processed_links:
+                    news_item = dict(card_item)
+                    processed_links.add(news_item['link'])
+                    selector_rows += 1
+                    if log_rows:
+                        telemetry.debug("Noticia extraída", **news_item)
+                    yield news_item
+            # Filas que aportó cada selector (también los que no aportan ninguna)
+            telemetry.count("rows", selector_rows, Newspaper=newspaper_name, Selector=selector)
+            if profile is not None:
+                profile_rule(profile, f"elespectador {selector}", matches=len(article_cards), rows=selector_rows,
+                             seconds=time.perf_counter() - selector_start)
 
-def handler(event, context):
+        telemetry.info("Noticias extraídas de El Espectador", rows=len(processed_links))
+
+def extract_news_data(html_content, base_url, newspaper_name, backend=None, partial=None, encoding=None,
+                      rules=None, profile=None):
     """
-    Función principal que se activa por un evento de S3 (cuando un archivo HTML llega a 'raw').
+    Extrae la categoría, titular y enlace de las noticias de un contenido HTML
+    basado en el nombre del periódico. Retorna la lista completa (ver iter_news_data).
     """
-    print(f"Evento S3 recibido: {event}")
+    return list(iter_news_data(html_content, base_url, newspaper_name, backend, partial, encoding, rules, profile))
 
-    for record in event['Records']:
-        bucket_name_event = record['s3']['bucket']['name']
-        object_key = record['s3']['object']['key']
-        
-        print(f"Procesando archivo: s3://{bucket_name_event}/{object_key}")
+def rows_to_csv(news_data):
+    """Serializa las noticias como CSV delimitado por '>' (con is_new si las filas lo traen)."""
+    csv_buffer = StringIO()
+    fieldnames = CSV_FIELDNAMES + ['is_new'] if news_data and 'is_new' in news_data[0] else CSV_FIELDNAMES
+    # *** CAMBIO AQUÍ: Usar delimiter='>' ***
+    writer = csv.DictWriter(csv_buffer, fieldnames=fieldnames, delimiter='>') 
+    writer.writeheader()
+    for row in news_data:
+        writer.writerow(row)
+    return csv_buffer.getvalue()
+
+def rows_to_table(news_data):
+    """Tabla de pyarrow con las noticias, con `category` codificada como diccionario."""
+    import pyarrow as pa
 
-        if not object_key.startswith(f"{S3_FINAL_PREFIX}/") and object_key.endswith('.html') and object_key.startswith(f"{S3_RAW_PREFIX}/"):
+    columns = {
+        'category': pa.array([row['category'] for row in news_data], type=pa.string()).dictionary_encode(),
+        'title': pa.array([row['title'] for row in news_data], type=pa.string()),
+        'link': pa.array([row['link'] for row in news_data], type=pa.string()),
+    }
+    if news_data and 'is_new' in news_data[0]:
+        columns['is_new'] = pa.array([row['is_new'] for row in news_data], type=pa.bool_())
+    return pa.table(columns)
+
+def rows_to_parquet(news_data):
+    """
+    Serializa las noticias como Parquet comprimido (snappy) con `category` codificada
+    como diccionario. Las columnas de partición quedan solo en la ruta, como en el CSV.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = pa.BufferOutputStream()
+    pq.write_table(rows_to_table(news_data), sink, compression='snappy', use_dictionary=['category'])
+    return sink.getvalue().to_pybytes()
+
+SERIALIZERS = {
+    'csv': (S3_FINAL_PREFIX, rows_to_csv),
+    'parquet': (S3_PARQUET_PREFIX, rows_to_parquet),
+}
+STREAM_WRITERS = {
+    'csv': lambda sink, first_row: streaming.CsvStreamWriter(
+        sink, CSV_FIELDNAMES + ['is_new'] if 'is_new' in first_row else CSV_FIELDNAMES),
+    'parquet': lambda sink, first_row: streaming.ParquetStreamWriter(sink, rows_to_table),
+}
+
+def output_formats():
+    """Formatos de salida válidos; si pyarrow no está instalado se omite Parquet."""
+    formats = []
+    for output_format in OUTPUT_FORMATS:
+        if output_format not in SERIALIZERS:
+            telemetry.warning("Formato de salida desconocido. Se omite.", output_format=output_format)
+            continue
+        if output_format == 'parquet':
             try:
-                html_content = download_from_s3(bucket_name_event, object_key) 
-                if html_content is None:
-                    print(f"No se pudo descargar {object_key}, saltando procesamiento.")
-                    continue
-
-                parts = object_key.split('/')
-                filename = parts[-1]
-                
-                periodico_name_raw = filename.split('-')[0] 
-                
-                base_url = ""
-                periodico = "" 
-                
-                if "eltiempo" in periodico_name_raw:
-                    periodico = "eltiempo"
-                    base_url = "https://www.eltiempo.com/"
-                    print(f"\nIniciando extracción para El Tiempo: {filename}") # Added for clarity
-                elif "elespectador" in periodico_name_raw:
-                    periodico = "elespectador"
-                    base_url = "https://www.elespectador.com/"
-                    print(f"\nIniciando extracción para El Espectador: {filename}") # Added for clarity
-                elif "publimetro" in periodico_name_raw: 
-                    periodico = "publimetro"
-                    base_url = "https://www.publimetro.co/"
-                else:
-                    print(f"Periódico desconocido en el nombre del archivo: {filename}. Saltando.")
-                    continue
-
-                news_data = extract_news_data(html_content, base_url, periodico) 
-                print(f"Noticias extraídas para {periodico} ({len(news_data)}): {(news_data[:2] if news_data else 'Ninguna')}...") 
-                
-                if not news_data:
-                    print(f"No se extrajeron noticias para {object_key}. No se generará CSV.")
-                    continue
-
-                csv_buffer = StringIO()
-                fieldnames = ['category', 'title', 'link']
-                # *** CAMBIO AQUÍ: Usar delimiter='>' ***
-                writer = csv.DictWriter(csv_buffer, fieldnames=fieldnames, delimiter='>') 
-                writer.writeheader()
+                import pyarrow # noqa: F401
+            except ImportError:
+                telemetry.warning("pyarrow no está instalado. Se omite la salida Parquet.")
+                continue
+        formats.append(output_format)
+    return formats or ['csv']
+
+def final_object_key(periodico, year, month, day, output_format='csv', part=None, prefixes=None):
+    """
+    Ruta con particiones Hive (periodico=/year=/month=/day=) del archivo final.
+    `part` identifica los archivos incrementales de una misma partición y `prefixes`
+    ({formato: prefijo}) cambia la raíz, por ejemplo para headlines/new.
+    """
+    prefix = (prefixes or {}).get(output_format) or SERIALIZERS[output_format][0]
+    suffix = f"-{part}" if part else ""
+    return (
+        f"{prefix}/periodico={periodico}/year={year}/month={month}/day={day}/"
+        f"{periodico}-headlines-{year}-{month}-{day}{suffix}.{output_format}"
+    )
+
+def write_partition_files(news_data, periodico, year, month, day, part=None, prefixes=None):
+    """Sube las filas en cada formato de salida. Retorna las rutas escritas o None si falla una."""
+    output_keys = []
+    for output_format in output_formats():
+        output_key = final_object_key(periodico, year, month, day, output_format, part, prefixes)
+        with telemetry.span("serialize"):
+            content = SERIALIZERS[output_format][1](news_data)
+        if not upload_to_s3(content, output_key):
+            telemetry.error("Fallo al subir un archivo final", output_format=output_format, key=output_key)
+            delete_from_s3(output_keys)
+            return None
+        output_keys.append(output_key)
+    return output_keys
+
+def stream_partition_files(rows, periodico, year, month, day):
+    """
+    Versión en streaming de write_partition_files: consume `rows` (un iterador) una sola vez
+    y lo escribe en todos los formatos a la vez, subiendo por partes (ver punto2.streaming).
+    Retorna (filas escritas, rutas); las rutas son None si falló alguna subida.
+    """
+    rows = iter(rows)
+    first_row = next(rows, None)
+    if first_row is None:
+        return 0, []
+    s3_client = get_s3_client()
+    targets = []
+    for output_format in output_formats():
+        output_key = final_object_key(periodico, year, month, day, output_format)
+        sink = streaming.S3MultipartWriter(s3_client, S3_BUCKET_NAME, output_key, content_type_for(output_key),
+                                           MULTIPART_PART_SIZE, put=lambda body, key: upload_to_s3(body, key))
+        targets.append((output_key, sink, STREAM_WRITERS[output_format](sink, first_row)))
+
+    row_count = 0
+    written = []
+    try:
+        for row in itertools.chain([first_row], rows):
+            for _, _, writer in targets:
+                writer.write(row)
+            row_count += 1
+        for output_key, sink, writer in targets:
+            with telemetry.span("serialize"):
+                writer.close()
+            if not sink.complete():
+                raise RuntimeError(f"fallo al subir {output_key}")
+            written.append(output_key)
+    except Exception as e:
+        telemetry.error("Fallo la escritura en streaming de los archivos finales", periodico=periodico, error=str(e))
+        for _, sink, _ in targets:
+            sink.abort()
+        delete_from_s3(written)
+        return row_count, None
+    return row_count, written
+
+def merge_into_partition(news_data, periodico, year, month, day):
+    """
+    Agrega a la partición solo las noticias cuyo enlace no se haya escrito antes ese día.
+    Retorna (filas nuevas, rutas escritas); las rutas son None si falló la escritura.
+    """
+    s3_client = get_s3_client()
+    key = incremental.index_key(periodico, year, month, day)
+    for _ in range(MERGE_MAX_ATTEMPTS):
+        seen, etag = incremental.load_partition_index(s3_client, S3_BUCKET_NAME, key)
+        new_rows, new_hashes = incremental.unseen_rows(news_data, seen)
+        if not new_rows:
+            return [], []
+        part = f"{datetime.now().strftime('%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        output_keys = write_partition_files(new_rows, periodico, year, month, day, part)
+        if output_keys is None:
+            return new_rows, None
+        if incremental.save_partition_index(s3_client, S3_BUCKET_NAME, key, seen | new_hashes, etag):
+            telemetry.info("Noticias nuevas agregadas a la partición", periodico=periodico, date=f"{year}-{month}-{day}",
+                           new_rows=len(new_rows), rows=len(news_data))
+            return new_rows, output_keys
+        # Otra ejecución actualizó el índice: se descarta lo escrito y se vuelve a calcular
+        telemetry.warning("El índice de la partición cambió durante la escritura. Reintentando.", key=key)
+        delete_from_s3(output_keys)
+    return new_rows, None
+
+def mark_new_headlines(news_data, periodico, year, month, day):
+    """
+    Marca cada fila con is_new según el índice de enlaces vistos del periódico.
+    Retorna las entradas que hay que registrar en el índice después de escribir.
+    """
+    index = seen_index.load_seen_index(get_s3_client(), S3_BUCKET_NAME, periodico)
+    return seen_index.tag_new_rows(news_data, index, int(f"{year}{month}{day}"))
+
+def write_new_headlines(news_data, periodico, year, month, day):
+    """Escribe el archivo del día en headlines/new con solo los titulares nuevos."""
+    new_rows = [{field: row[field] for field in CSV_FIELDNAMES} for row in news_data if row['is_new']]
+    if not new_rows:
+        return []
+    return write_partition_files(new_rows, periodico, year, month, day, prefixes=S3_NEW_PREFIXES)
+
+def record_result(object_key, status, rows=0, output_keys=None, error=None):
+    """Resultado del procesamiento de un registro del evento S3."""
+    return {'key': object_key, 'status': status, 'rows': rows, 'output_keys': output_keys or [], 'error': error}
+
+def cache_settings():
+    """Configuración que cambia la salida y por lo tanto forma parte de la versión de la caché."""
+    return {
+        'rules': EXTRACTION_RULES_VERSION,
+        'formats': OUTPUT_FORMATS,
+        'write_mode': WRITE_MODE,
+        'seen_index': SEEN_INDEX_MODE,
+        'backend': os.environ.get("HTML_PARSER_BACKEND", ""), # Sin importar bs4 en un acierto
+        'partial': PARTIAL_PARSE,
+        'selector_rules': active_rules(),
+    }
+
+def cached_result(bucket, object_key):
+    """
+    Consulta la caché de resultados antes de descargar. Retorna (fuente, resultado): el
+    resultado es None si hay que procesar y la fuente es None si no se pudo consultar.
+    """
+    s3_client = get_s3_client()
+    try:
+        with telemetry.span("result_cache"):
+            source = result_cache.source_id(s3_client, bucket, object_key)
+            version = result_cache.rules_version(cache_settings())
+            entry = result_cache.lookup(s3_client, bucket, object_key, source, version)
+    except Exception as e:
+        telemetry.warning("No se pudo consultar la caché de resultados.", key=object_key, error=str(e))
+        return None, None
+    if entry is None:
+        telemetry.count("result_cache_misses")
+        return source, None
+    telemetry.count("result_cache_hits")
+    telemetry.info("El resultado de este contenido ya está escrito. Se omite.", key=object_key,
+                   output_keys=entry['output_keys'])
+    return source, record_result(object_key, 'skipped', output_keys=entry['output_keys'], error='sin cambios (caché)')
+
+def remember_result(bucket, object_key, source, result):
+    """Registra en la caché un resultado 'ok' de `source`. Retorna `result`."""
+    if source is None or result['status'] != 'ok':
+        return result
+    try:
+        result_cache.store(get_s3_client(), bucket, object_key, source, result_cache.rules_version(cache_settings()),
+                           result['rows'], result['output_keys'])
+    except Exception as e:
+        telemetry.warning("No se pudo guardar la entrada de caché.", key=object_key, error=str(e))
+    return result
+
+def process_record(record, extract=extract_news_data):
+    """
+    Procesa un registro del evento S3: descarga, extracción, CSV y subida.
+    Con RESULT_CACHE primero consulta la caché de resultados (ver punto2.result_cache).
+    Nunca lanza excepciones; retorna un resultado con status 'ok', 'skipped' o 'error'.
+    """
+    bucket_name_event = record['s3']['bucket']['name']
+    object_key = record['s3']['object']['key']
+    
+    telemetry.info("Procesando archivo", bucket=bucket_name_event, key=object_key)
+
+    eligible = not object_key.startswith(f"{S3_FINAL_PREFIX}/") and object_key.endswith('.html') and object_key.startswith(f"{S3_RAW_PREFIX}/")
+    if not eligible:
+        telemetry.info(f"Archivo no elegible para procesamiento (no es HTML bajo {S3_RAW_PREFIX}/ o ya está en {S3_FINAL_PREFIX}/).", key=object_key)
+        return record_result(object_key, 'skipped', error='no elegible')
+
+    cache_source = None
+    if RESULT_CACHE and not RAW_STORE_PATH:
+        cache_source, cached = cached_result(bucket_name_event, object_key)
+        if cached is not None:
+            return cached
+
+    try:
+        html_content, encoding = read_raw_page(bucket_name_event, object_key)
+        if html_content is None:
+            telemetry.error("No se pudo descargar el archivo, saltando procesamiento.", key=object_key)
+            return record_result(object_key, 'error', error='descarga fallida')
+
+        parts = object_key.split('/')
+        filename = parts[-1]
+        
+        periodico_name_raw = filename.split('-')[0] 
+        
+        base_url = ""
+        periodico = "" 
+        
+        if "eltiempo" in periodico_name_raw:
+            periodico = "eltiempo"
+            base_url = "https://www.eltiempo.com/"
+            telemetry.debug("Iniciando extracción para El Tiempo", filename=filename)
+        elif "elespectador" in periodico_name_raw:
+            periodico = "elespectador"
+            base_url = "https://www.elespectador.com/"
+            telemetry.debug("Iniciando extracción para El Espectador", filename=filename)
+        elif "publimetro" in periodico_name_raw: 
+            periodico = "publimetro"
+            base_url = "https://www.publimetro.co/"
+        else:
+            telemetry.warning("Periódico desconocido en el nombre del archivo. Saltando.", filename=filename)
+            return record_result(object_key, 'skipped', error='periódico desconocido')
+
+        # Solo el extractor en el mismo proceso produce filas a medida que las encuentra
+        stream_output = STREAM_OUTPUT and extract is extract_news_data and WRITE_MODE != "merge" \
+            and SEEN_INDEX_MODE not in ("tag", "stream")
+        with telemetry.span("extract"): # Incluye el parseo; ver el docstring del handler
+            if stream_output:
+                rows = iter_news_data(html_content, base_url, periodico, encoding=encoding)
+                news_data = list(itertools.islice(rows, 1)) # El resto se consume al escribir
+            else:
+                news_data = extract(html_content, base_url, periodico, None, None, encoding)
+                telemetry.info("Noticias extraídas", periodico=periodico, rows=len(news_data))
+                telemetry.debug("Primeras noticias extraídas", sample=news_data[:2])
+
+        if not news_data:
+            telemetry.warning("No se extrajeron noticias. No se generará CSV.", key=object_key)
+            return record_result(object_key, 'skipped', error='sin noticias')
+
+        try:
+            date_parts_match = filename.replace('.html', '').split('-')
+            if len(date_parts_match) >= 4: 
+                year = date_parts_match[-3]
+                month = date_parts_match[-2]
+                day = date_parts_match[-1]
+                if not (year.isdigit() and len(year) == 4 and \
+                        month.isdigit() and 1 <= int(month) <= 12 and \
+                        day.isdigit() and 1 <= int(day) <= 31):
+                    raise ValueError("Formato de fecha inválido en el nombre del archivo.")
+            else:
+                raise ValueError("No se pudieron extraer suficientes partes de fecha del nombre del archivo.")
+
+        except (IndexError, ValueError) as e_date:
+            telemetry.warning("No se pudo parsear la fecha del nombre del archivo. Usando fecha actual para el path S3.",
+                              filename=filename, error=str(e_date))
+            now = datetime.now()
+            year = now.strftime("%Y")
+            month = now.strftime("%m")
+            day = now.strftime("%d")
+
+        if stream_output:
+            with telemetry.span("stream_write"): # Extracción, serialización y subida intercaladas
+                row_count, output_keys = stream_partition_files(itertools.chain(news_data, rows), periodico, year, month, day)
+            if output_keys is None:
+                return record_result(object_key, 'error', row_count, error='subida fallida')
+            telemetry.info("Noticias extraídas", periodico=periodico, rows=row_count)
+            return remember_result(bucket_name_event, object_key, cache_source,
+                                   record_result(object_key, 'ok', row_count, output_keys))
+
+        seen_entries = None
+        new_stream_keys = []
+        if SEEN_INDEX_MODE in ("tag", "stream"):
+            seen_entries = mark_new_headlines(news_data, periodico, year, month, day)
+            if SEEN_INDEX_MODE == "stream":
+                new_stream_keys = write_new_headlines(news_data, periodico, year, month, day)
                 for row in news_data:
-                    writer.writerow(row)
-                
-                csv_content = csv_buffer.getvalue()
-
-                try:
-                    date_parts_match = filename.replace('.html', '').split('-')
-                    if len(date_parts_match) >= 4: 
-                        year = date_parts_match[-3]
-                        month = date_parts_match[-2]
-                        day = date_parts_match[-1]
-                        if not (year.isdigit() and len(year) == 4 and \
-                                month.isdigit() and 1 <= int(month) <= 12 and \
-                                day.isdigit() and 1 <= int(day) <= 31):
-                            raise ValueError("Formato de fecha inválido en el nombre del archivo.")
-                    else:
-                        raise ValueError("No se pudieron extraer suficientes partes de fecha del nombre del archivo.")
-
-                except (IndexError, ValueError) as e_date:
-                    print(f"Advertencia: No se pudo parsear la fecha del nombre del archivo '{filename}' ({e_date}). Usando fecha actual para el path S3.")
-                    now = datetime.now()
-                    year = now.strftime("%Y")
-                    month = now.strftime("%m")
-                    day = now.strftime("%d")
-
-                s3_csv_object_key = (
-                    f"{S3_FINAL_PREFIX}/periodico={periodico}/year={year}/month={month}/day={day}/"
-                    f"{periodico}-headlines-{year}-{month}-{day}.csv"
-                )
-
-                upload_success = upload_to_s3(csv_content, s3_csv_object_key)
-                if not upload_success:
-                    print(f"Fallo al subir el CSV para {object_key}")
-
-            except Exception as e:
-                print(f"Error procesando {object_key}: {e}")
+                    del row['is_new'] # La salida principal no cambia de esquema
+                if new_stream_keys is None:
+                    return record_result(object_key, 'error', len(news_data), error='subida fallida (headlines/new)')
+
+        if WRITE_MODE == "merge":
+            news_data, output_keys = merge_into_partition(news_data, periodico, year, month, day)
         else:
-            print(f"Archivo {object_key} no elegible para procesamiento (no es HTML bajo {S3_RAW_PREFIX}/ o ya está en {S3_FINAL_PREFIX}/).")
+            output_keys = write_partition_files(news_data, periodico, year, month, day)
+        if output_keys is None:
+            telemetry.error("Fallo al subir los archivos finales", key=object_key)
+            return record_result(object_key, 'error', len(news_data), error='subida fallida')
+
+        # Los enlaces se registran como vistos solo cuando la salida ya quedó escrita
+        if seen_entries and not seen_index.record_links(get_s3_client(), S3_BUCKET_NAME, periodico, seen_entries):
+            telemetry.warning("No se pudo actualizar el índice de enlaces vistos.", periodico=periodico)
+
+        if not output_keys:
+            telemetry.info("No hay noticias nuevas para la partición del día.", key=object_key)
+            return record_result(object_key, 'skipped', output_keys=new_stream_keys, error='sin noticias nuevas')
+        return remember_result(bucket_name_event, object_key, cache_source,
+                               record_result(object_key, 'ok', len(news_data), output_keys + new_stream_keys))
+
+    except Exception as e:
+        telemetry.error("Error procesando el archivo", key=object_key, error=str(e))
+        return record_result(object_key, 'error', error=str(e))
 
+def create_process_pool(max_workers):
+    """
+    Crea el pool de procesos para extract_news_data. Retorna None si el entorno no lo
+    permite (AWS Lambda no tiene /dev/shm, así que multiprocessing falla con OSError).
+
+    Los procesos se inician con "spawn" y no con el "fork" por defecto de Linux: el pool
+    lanza sus procesos desde los hilos de registros, y un fork con otros hilos vivos copia
+    locks tomados (logging, el caché de clientes, urllib3) que el hijo nunca libera.
+    """
+    import multiprocessing # Solo si se usa el pool
+    from concurrent.futures import ProcessPoolExecutor
+
+    try:
+        return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+    except (OSError, NotImplementedError) as e:
+        telemetry.warning("No se pudo crear el pool de procesos. La extracción se hará en los hilos.", error=str(e))
+        return None
+
+def summarize_results(results):
+    """Resume los resultados por registro en la respuesta del handler."""
+    summary = {'ok': 0, 'skipped': 0, 'error': 0, 'rows': 0}
+    for result in results:
+        summary[result['status']] += 1
+        summary['rows'] += result['rows']
+    for status in ('ok', 'skipped', 'error'):
+        telemetry.count(f"records_{status}", summary[status])
+    telemetry.count("rows_written", summary['rows'])
+    telemetry.info("Resumen del procesamiento", **summary)
+    if summary['error']:
+        return {
+            'statusCode': 500,
+            'body': 'Hubo errores procesando uno o más archivos HTML.',
+            'summary': summary,
+            'results': results
+        }
     return {
         'statusCode': 200,
-        'body': 'Procesamiento de archivos HTML completado.'
+        'body': 'Procesamiento de archivos HTML completado.',
+        'summary': summary,
+        'results': results
     }
 
+def handler(event, context):
+    """
+    Función principal que se activa por un evento de S3 (cuando un archivo HTML llega a 'raw').
+    Los registros se procesan en paralelo (RECORD_WORKERS hilos) y, con EXTRACT_WORKERS > 0,
+    la extracción se hace en un pool de procesos. Un registro con error no afecta a los demás.
+
+    Al final se emiten las métricas de la invocación en formato EMF (ver common.telemetry):
+    download_ms, extract_ms (incluye parse_ms), serialize_ms y upload_ms, más las filas por
+    selector. Con el pool de procesos, parse_ms y las filas por selector se miden en los
+    procesos hijos y no llegan a la invocación; extract_ms sí.
+    """
+    records = event.get('Records', [])
+    telemetry.info("Evento S3 recibido", records=len(records))
+    telemetry.debug("Contenido del evento S3", event=event)
+
+    process_pool = None
+    extract = extract_news_data
+    if EXTRACT_WORKERS > 0 and len(records) > 1:
+        process_pool = create_process_pool(min(EXTRACT_WORKERS, len(records)))
+        if process_pool is not None:
+            extract = lambda *args: process_pool.submit(extract_news_data, *args).result()
+
+    try:
+        workers = max(1, min(RECORD_WORKERS, len(records)))
+        if workers == 1:
+            results = [process_record(record, extract) for record in records]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(lambda record: process_record(record, extract), records))
+    finally:
+        if process_pool is not None:
+            process_pool.shutdown()
+
+    response = summarize_results(results)
+    telemetry.flush_metrics(Function="punto2")
+    return response
+
+if clients.PREWARM:
+    get_s3_client()
+    import punto2.parsers # noqa: F401  (bs4)
+
 if __name__ == '__main__':
     print(f"Ejecutando localmente la función Lambda de procesamiento, usando el bucket S3 real: {S3_BUCKET_NAME}...")
     
@@ -0,0 +1,146 @@
+"""
+Reprocesamiento masivo (backfill) de los HTML crudos bajo headlines/raw/.
+
+Lista el prefijo con paginación, filtra por periódico y rango de fechas y pasa cada objeto
+por process_record (la misma lógica del handler) con un pool de hilos. El progreso se guarda
+en un manifiesto JSON local: si la ejecución se cae, al repetir el mismo comando se continúa
+desde donde quedó. Los objetos con error no se marcan como completados y se reintentan.
+
+Uso:
+    python -m punto2.backfill --newspaper eltiempo --since 2024-01-01 --until 2024-12-31 \\
+        --workers 16 --processes 4 --manifest backfill-manifest.json
+"""
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from punto2 import app
+
+RAW_FILENAME_RE = re.compile(r"^(?P<periodico>[a-z]+)-(?P<date>\d{4}-\d{2}-\d{2})\.html$")
+CHECKPOINT_EVERY = 25 # Registros completados entre escrituras del manifiesto
+
+
+def parse_raw_key(key):
+    """Retorna (periódico, fecha) de una llave headlines/raw/<periodico>-AAAA-MM-DD.html, o None."""
+    match = RAW_FILENAME_RE.match(key.rsplit('/', 1)[-1])
+    if not match:
+        return None
+    try:
+        return match.group('periodico'), date.fromisoformat(match.group('date'))
+    except ValueError:
+        return None
+
+
+def list_raw_keys(s3_client, bucket, newspapers=None, since=None, until=None):
+    """Lista (con paginación) las llaves de headlines/raw/ que cumplen los filtros, en orden."""
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket, Prefix=f"{app.S3_RAW_PREFIX}/"):
+        for obj in page.get('Contents', []):
+            parsed = parse_raw_key(obj['Key'])
+            if parsed is None:
+                continue
+            periodico, snapshot_date = parsed
+            if newspapers and periodico not in newspapers:
+                continue
+            if (since and snapshot_date < since) or (until and snapshot_date > until):
+                continue
+            yield obj['Key']
+
+
+class Manifest:
+    """Manifiesto de progreso: llaves completadas y errores, guardado de forma atómica."""
+
+    def __init__(self, path):
+        self.path = path
+        self.completed = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+        self._pending_writes = 0
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            self.completed = data.get('completed', {})
+            self.errors = data.get('errors', {})
+
+    def is_done(self, key):
+        return key in self.completed
+
+    def record(self, result):
+        with self._lock:
+            if result['status'] == 'error':
+                self.errors[result['key']] = result['error']
+            else:
+                self.completed[result['key']] = result['status']
+                self.errors.pop(result['key'], None)
+            self._pending_writes += 1
+            if self._pending_writes >= CHECKPOINT_EVERY:
+                self._save()
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        self._pending_writes = 0
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'completed': self.completed, 'errors': self.errors}, f, sort_keys=True)
+        os.replace(tmp_path, self.path) # Reemplazo atómico: nunca queda un manifiesto a medias
+
+
+def run_backfill(bucket=app.S3_BUCKET_NAME, newspapers=None, since=None, until=None,
+                 workers=8, processes=0, manifest_path="backfill-manifest.json"):
+    """Ejecuta el backfill y retorna el resumen (mismo formato que el handler)."""
+    manifest = Manifest(manifest_path)
+    keys = [key for key in list_raw_keys(app.get_s3_client(), bucket, newspapers, since, until) if not manifest.is_done(key)]
+    print(f"Backfill: {len(keys)} objetos por procesar ({len(manifest.completed)} ya completados).")
+
+    process_pool = app.create_process_pool(processes) if processes > 0 else None
+    extract = app.extract_news_data
+    if process_pool is not None:
+        extract = lambda *args: process_pool.submit(app.extract_news_data, *args).result()
+
+    def process(key):
+        record = {'s3': {'bucket': {'name': bucket}, 'object': {'key': key}}}
+        result = app.process_record(record, extract)
+        manifest.record(result)
+        return result
+
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            results = list(executor.map(process, keys))
+    finally:
+        manifest.save()
+        if process_pool is not None:
+            process_pool.shutdown()
+    elapsed = time.perf_counter() - start
+    print(f"Backfill terminado en {elapsed:.1f}s ({len(keys) / elapsed if elapsed else 0:.1f} objetos/s).")
+    return app.summarize_results(results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reprocesa los HTML crudos de headlines/raw/.")
+    parser.add_argument('--bucket', default=app.S3_BUCKET_NAME)
+    parser.add_argument('--newspaper', action='append', dest='newspapers', help="Periódico a incluir (repetible)")
+    parser.add_argument('--since', type=date.fromisoformat, help="Fecha inicial AAAA-MM-DD (inclusive)")
+    parser.add_argument('--until', type=date.fromisoformat, help="Fecha final AAAA-MM-DD (inclusive)")
+    parser.add_argument('--workers', type=int, default=8, help="Hilos para E/S con S3")
+    parser.add_argument('--processes', type=int, default=0, help="Procesos para la extracción (0 = en los hilos)")
+    parser.add_argument('--manifest', default="backfill-manifest.json", help="Archivo de progreso para reanudar")
+    args = parser.parse_args(argv)
+
+    response = run_backfill(args.bucket, args.newspapers, args.since, args.until,
+                            args.workers, args.processes, args.manifest)
+    return 0 if response['statusCode'] == 200 else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
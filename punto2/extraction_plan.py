@@ -0,0 +1,132 @@
+"""
+Plan de extracción compilado: aplica una lista de selectores CSS con un solo recorrido del DOM.
+
+`soup.select(selector)` recorre todo el documento una vez por selector. El plan indexa los
+selectores por etiqueta, filtra cada elemento con una comparación barata de clases y
+atributos sobre el último compuesto del selector, y solo usa el motor CSS completo para
+los selectores con combinadores de descendencia. Funciona con BeautifulSoup y con LexborTag.
+"""
+import re
+
+# Compuesto simple: etiqueta opcional, clases y atributos ([attr], [attr='valor'] o [attr*='valor'])
+_COMPOUND_RE = re.compile(
+    r"^(?P<tag>[a-zA-Z][\w-]*|\*)?"
+    r"(?P<classes>(?:\.[\w-]+)*)"
+    r"(?P<attrs>(?:\[[\w-]+(?:\*?=(?:'[^']*'|\"[^\"]*\"|[^\]'\"]*))?\])*)$"
+)
+_ATTR_RE = re.compile(r"\[([\w-]+)(?:(\*?=)(?:'([^']*)'|\"([^\"]*)\"|([^\]'\"]*)))?\]")
+
+
+class SelectorRule:
+    """Un selector compilado: prefiltro sobre el último compuesto y verificación opcional."""
+
+    __slots__ = ("index", "selector", "tag", "classes", "attrs", "needs_full_match")
+
+    def __init__(self, index, selector, tag, classes, attrs, needs_full_match):
+        self.index = index
+        self.selector = selector
+        self.tag = tag
+        self.classes = classes
+        self.attrs = attrs
+        self.needs_full_match = needs_full_match
+
+    def matches(self, element, element_classes):
+        if not self.classes.issubset(element_classes):
+            return False
+        if not attributes_match(self.attrs, element.get):
+            return False
+        return not self.needs_full_match or css_match(element, self.selector)
+
+
+def attributes_match(attrs, get_attribute):
+    """Evalúa los filtros (nombre, operador, valor) de un compuesto con `get_attribute(nombre)`."""
+    for name, operator, value in attrs:
+        actual = get_attribute(name)
+        if actual is None:
+            return False
+        if not isinstance(actual, str): # BeautifulSoup entrega la clase como lista
+            actual = " ".join(actual)
+        if operator == "=" and actual != value:
+            return False
+        if operator == "*=" and value not in actual:
+            return False
+    return True
+
+
+def css_match(element, selector):
+    """Verifica un selector completo sobre un elemento con el motor CSS del backend."""
+    node = getattr(element, "node", None)
+    if node is not None: # LexborTag
+        return node.css_matches(selector)
+    return element.css.match(selector)
+
+
+def parse_compound(compound):
+    """
+    Descompone un selector simple en (etiqueta, clases, atributos). Retorna None si usa
+    sintaxis no soportada. Cada atributo es (nombre, operador, valor) con operador None,
+    "=" o "*=".
+    """
+    match = _COMPOUND_RE.match(compound)
+    if not match:
+        return None
+    tag = match.group("tag") or "*"
+    classes = frozenset(c for c in match.group("classes").split(".") if c)
+    attrs = []
+    for attr_match in _ATTR_RE.finditer(match.group("attrs")):
+        name, operator, *values = attr_match.groups()
+        values = [v for v in values if v is not None]
+        attrs.append((name, operator, values[0] if values else None))
+    return tag.lower(), classes, tuple(attrs)
+
+
+def compile_selectors(selectors):
+    """
+    Compila la lista de selectores. Los que no se puedan prefiltrar (combinadores >, +, ~ o
+    sintaxis no soportada) se verifican sobre todos los elementos con el motor CSS.
+    """
+    rules_by_tag = {}
+    for index, selector in enumerate(selectors):
+        parts = selector.split()
+        parsed = None if any(p in (">", "+", "~") or p[0] in ">+~" for p in parts) else parse_compound(parts[-1])
+        if parsed is None:
+            rule = SelectorRule(index, selector, "*", frozenset(), (), True)
+        else:
+            tag, classes, attrs = parsed
+            rule = SelectorRule(index, selector, tag, classes, attrs, len(parts) > 1)
+        rules_by_tag.setdefault(rule.tag, []).append(rule)
+    return rules_by_tag
+
+
+def _element_classes(element):
+    """Normaliza la clase de BeautifulSoup (lista) y de LexborTag (cadena) a un frozenset."""
+    value = element.get("class")
+    if not value:
+        return frozenset()
+    if isinstance(value, str):
+        return frozenset(value.split())
+    return frozenset(value)
+
+
+def match_selectors(soup, selectors, rules_by_tag=None):
+    """
+    Recorre el documento una vez y retorna una lista por selector con los elementos que
+    cumplen cada uno, en orden de documento (el mismo resultado que soup.select(selector)).
+    """
+    if rules_by_tag is None:
+        rules_by_tag = compile_selectors(selectors)
+    generic_rules = rules_by_tag.get("*", [])
+    results = [[] for _ in selectors]
+
+    for element in soup.find_all(True):
+        rules = rules_by_tag.get(element.name)
+        if rules is None and not generic_rules:
+            continue
+        element_classes = _element_classes(element)
+        for rule in rules or ():
+            if rule.matches(element, element_classes):
+                results[rule.index].append(element)
+        for rule in generic_rules:
+            if rule.matches(element, element_classes):
+                results[rule.index].append(element)
+    return results
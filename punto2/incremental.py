@@ -0,0 +1,84 @@
+"""
+Escritura incremental de particiones diarias (WRITE_MODE=merge).
+
+Cada partición periodico=/year=/month=/day= tiene un índice compacto con el hash de 64 bits
+de cada enlace ya escrito (8 bytes por enlace). Cada ejecución agrega a la partición un
+archivo con solo los titulares nuevos, así el trabajo es proporcional a lo nuevo y no al día
+completo. El índice se actualiza con escrituras condicionales de S3 (If-Match/If-None-Match)
+para que dos ejecuciones simultáneas no pierdan enlaces.
+"""
+import hashlib
+import sys
+from array import array
+
+from botocore.exceptions import ClientError
+
+# Fuera de headlines/final para que el crawler no lo catalogue
+S3_INDEX_PREFIX = "headlines/state/partition-index"
+CONFLICT_ERROR_CODES = ("PreconditionFailed", "ConditionalRequestConflict")
+
+
+def link_hash(link):
+    """Hash de 64 bits (blake2b) de un enlace."""
+    return int.from_bytes(hashlib.blake2b(link.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def index_key(periodico, year, month, day):
+    """Ruta del índice de enlaces de una partición diaria."""
+    return f"{S3_INDEX_PREFIX}/periodico={periodico}/{periodico}-{year}-{month}-{day}.idx"
+
+
+def encode_hashes(hashes):
+    """Serializa los hashes como enteros de 64 bits little-endian, ordenados."""
+    values = array("Q", sorted(hashes))
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tobytes()
+
+
+def decode_hashes(data):
+    """Inverso de encode_hashes."""
+    values = array("Q")
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def load_partition_index(s3_client, bucket, key):
+    """Retorna (set de hashes, ETag). Si el índice no existe retorna (set(), None)."""
+    try:
+        response = s3_client.get_object(Bucket=bucket, Key=key)
+    except ClientError as e:
+        if e.response['Error']['Code'] in ("NoSuchKey", "404"):
+            return set(), None
+        raise
+    return set(decode_hashes(response['Body'].read())), response['ETag']
+
+
+def save_partition_index(s3_client, bucket, key, hashes, etag):
+    """
+    Guarda el índice solo si nadie lo modificó desde que se leyó (ETag). Retorna False si
+    hubo un conflicto y hay que volver a leerlo.
+    """
+    condition = {'IfMatch': etag} if etag else {'IfNoneMatch': '*'}
+    try:
+        s3_client.put_object(Bucket=bucket, Key=key, Body=encode_hashes(hashes),
+                             ContentType='application/octet-stream', **condition)
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] in CONFLICT_ERROR_CODES:
+            return False
+        raise
+
+
+def unseen_rows(news_data, seen_hashes):
+    """Retorna (filas nuevas, hashes de esas filas) respecto a `seen_hashes`."""
+    rows = []
+    hashes = set()
+    for row in news_data:
+        row_hash = link_hash(row['link'])
+        if row_hash not in seen_hashes and row_hash not in hashes:
+            rows.append(row)
+            hashes.add(row_hash)
+    return rows, hashes
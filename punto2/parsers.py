@@ -0,0 +1,286 @@
+"""
+Backends de parseo HTML para extract_news_data.
+
+- "html.parser": BeautifulSoup con el parser de la librería estándar (referencia, el más lento).
+- "lxml": BeautifulSoup con el tree builder de lxml (en C).
+- "selectolax": parser lexbor de selectolax. Sus nodos se envuelven en LexborTag, que
+  expone la misma API reducida de BeautifulSoup que usa el extractor (find, find_all,
+  find_parent, select, get, get_text, parent, name), así las reglas se escriben una sola vez.
+
+El backend se elige con la variable de entorno HTML_PARSER_BACKEND o con el argumento `backend`.
+
+Parseo parcial: con `containers` (lista de selectores simples) los backends de BeautifulSoup
+solo construyen los subárboles cuya raíz cumple alguno de ellos; el resto del documento
+(scripts, estilos, anuncios, pie de página) se descarta durante la tokenización. selectolax
+siempre construye el árbol completo, que en lexbor ya es barato.
+
+Entrada en bytes: parse_html también recibe el cuerpo crudo del objeto (bytes, bytearray,
+memoryview) sin decodificar. La codificación se resuelve como en el HTML Standard
+(detect_encoding): BOM, charset del Content-Type, <meta charset> en el primer KB y, si no hay
+nada, UTF-8. lxml y lexbor decodifican en C, así que no se crea la copia en str de la página.
+"""
+import codecs
+import os
+import re
+
+from bs4 import BeautifulSoup, FeatureNotFound, SoupStrainer
+
+from common import telemetry
+
+from punto2.extraction_plan import attributes_match, parse_compound
+
+DEFAULT_BACKEND = "html.parser"
+HTML_PARSER_BACKEND = os.environ.get("HTML_PARSER_BACKEND", DEFAULT_BACKEND)
+BACKENDS = ("html.parser", "lxml", "selectolax")
+
+# Etiquetas cuyo texto BeautifulSoup no incluye en get_text()
+NON_TEXT_TAGS = frozenset(["script", "style", "template"])
+
+DEFAULT_ENCODING = "utf-8"
+PRESCAN_BYTES = 1024 # El HTML Standard solo busca el <meta charset> en el primer KB
+BOMS = ((codecs.BOM_UTF8, "utf-8"), (codecs.BOM_UTF16_LE, "utf-16-le"), (codecs.BOM_UTF16_BE, "utf-16-be"))
+META_CHARSET_RE = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([a-zA-Z0-9_.:-]+)""", re.IGNORECASE)
+CHARSET_PARAM_RE = re.compile(r"""charset\s*=\s*["']?([^"';\s]+)""", re.IGNORECASE)
+
+
+def available_backends():
+    """Retorna los backends cuyas dependencias están instaladas."""
+    available = ["html.parser"]
+    try:
+        import lxml # noqa: F401
+        available.append("lxml")
+    except ImportError:
+        pass
+    try:
+        import selectolax.lexbor # noqa: F401
+        available.append("selectolax")
+    except ImportError:
+        pass
+    return available
+
+
+def charset_from_content_type(content_type):
+    """Charset del encabezado Content-Type ("text/html; charset=ISO-8859-1"), o None."""
+    match = CHARSET_PARAM_RE.search(content_type or "")
+    return match.group(1) if match else None
+
+
+def _normalize_encoding(name):
+    """Nombre canónico del codec, o None si Python no lo conoce o no es de texto."""
+    if isinstance(name, bytes):
+        name = name.decode("ascii", errors="ignore")
+    try:
+        info = codecs.lookup(name.strip())
+    except (LookupError, AttributeError):
+        return None
+    return info.name if getattr(info, "_is_text_encoding", True) else None
+
+
+def detect_encoding(markup, hint=None):
+    """
+    Codificación de un HTML en bytes: BOM, luego `hint` (el charset de los metadatos HTTP),
+    luego <meta charset> en los primeros PRESCAN_BYTES y por último UTF-8.
+    """
+    head = bytes(markup[:PRESCAN_BYTES])
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+    encoding = _normalize_encoding(hint) if hint else None
+    if encoding:
+        return encoding
+    match = META_CHARSET_RE.search(head)
+    if match:
+        encoding = _normalize_encoding(match.group(1))
+        # Un <meta> que dice UTF-16 en un documento sin BOM es un error del sitio
+        if encoding and not encoding.startswith("utf-16"):
+            return encoding
+    return DEFAULT_ENCODING
+
+
+def _as_buffer(markup):
+    """
+    bytearray y memoryview a bytes: ni BeautifulSoup ni lexbor los aceptan. Es la única
+    copia; no hay decodificación.
+    """
+    if isinstance(markup, bytes):
+        return markup
+    return bytes(markup)
+
+
+class ContainerStrainer(SoupStrainer):
+    """
+    SoupStrainer que conserva solo los subárboles cuyo elemento raíz cumple alguno de los
+    selectores simples de `containers` (etiqueta, clases y [attr], [attr='v'], [attr*='v']).
+    """
+
+    def __init__(self, containers):
+        super().__init__()
+        self.containers = tuple(containers)
+        self.rules = []
+        for selector in self.containers:
+            parsed = parse_compound(selector)
+            if parsed is None:
+                raise ValueError(f"Selector de contenedor no soportado: {selector}")
+            self.rules.append(parsed)
+
+    @property
+    def includes_everything(self):
+        return False
+
+    @property
+    def excludes_everything(self):
+        return not self.rules
+
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        attrs = attrs or {}
+        classes = attrs.get("class") or ""
+        classes = set(classes.split() if isinstance(classes, str) else classes)
+        for tag, rule_classes, rule_attrs in self.rules:
+            if tag != "*" and tag != name:
+                continue
+            if rule_classes.issubset(classes) and attributes_match(rule_attrs, attrs.get):
+                return True
+        return False
+
+    def allow_string_creation(self, string):
+        return False # El texto fuera de los contenedores no interesa
+
+
+def parse_html(html_content, backend=None, containers=None, encoding=None):
+    """
+    Parsea el HTML (str o bytes) con el backend pedido y retorna la raíz del documento.
+    Si el backend no existe o no está instalado, usa html.parser.
+    Con `containers` se hace un parseo parcial (ver ContainerStrainer). `encoding` es el
+    charset de los metadatos del objeto; solo se usa con bytes (ver detect_encoding).
+    """
+    backend = backend or HTML_PARSER_BACKEND
+    parse_only = ContainerStrainer(containers) if containers else None
+    options = {"parse_only": parse_only}
+    if not isinstance(html_content, str):
+        html_content = _as_buffer(html_content)
+        encoding = detect_encoding(html_content, encoding)
+        options["from_encoding"] = encoding
+    if backend == "selectolax":
+        try:
+            from selectolax.lexbor import LexborHTMLParser
+        except ImportError:
+            telemetry.warning("selectolax no está instalado. Usando html.parser.")
+            return BeautifulSoup(html_content, DEFAULT_BACKEND, **options)
+        if isinstance(html_content, bytes) and encoding != DEFAULT_ENCODING:
+            html_content = html_content.decode(encoding, errors="replace") # lexbor solo lee UTF-8
+        tree = LexborHTMLParser(html_content)
+        return LexborTag(tree.root.parent if tree.root is not None else tree.root)
+    if backend not in BACKENDS:
+        telemetry.warning(f"Backend de parseo desconocido. Usando {DEFAULT_BACKEND}.", backend=backend)
+        backend = DEFAULT_BACKEND
+    try:
+        return BeautifulSoup(html_content, backend, **options)
+    except FeatureNotFound:
+        telemetry.warning(f"El backend no está instalado. Usando {DEFAULT_BACKEND}.", backend=backend)
+        return BeautifulSoup(html_content, DEFAULT_BACKEND, **options)
+
+
+def _match_rule(rule, value, multi_valued=False):
+    """Replica cómo BeautifulSoup compara un filtro (True, str o función) con un atributo."""
+    if rule is None:
+        return True
+    if rule is True:
+        return value is not None
+    if value is None:
+        return callable(rule) and bool(rule(None))
+    candidates = [value]
+    if multi_valued:
+        tokens = value.split()
+        candidates = tokens + [" ".join(tokens)] if len(tokens) > 1 else tokens
+    if callable(rule):
+        return any(rule(candidate) for candidate in candidates)
+    return rule in candidates
+
+
+class LexborTag:
+    """Envoltura de un nodo de selectolax con la API de BeautifulSoup que usa el extractor."""
+
+    __slots__ = ("node",)
+
+    def __init__(self, node):
+        self.node = node
+
+    def __eq__(self, other):
+        return isinstance(other, LexborTag) and self.node.mem_id == other.node.mem_id
+
+    def __hash__(self):
+        return self.node.mem_id
+
+    @property
+    def name(self):
+        return "[document]" if self.node.is_document_node else self.node.tag
+
+    @property
+    def parent(self):
+        parent = self.node.parent
+        return LexborTag(parent) if parent is not None else None
+
+    def get(self, key, default=None):
+        attributes = self.node.attributes
+        if key not in attributes:
+            return default
+        value = attributes[key]
+        return "" if value is None else value
+
+    def get_text(self, strip=False):
+        parts = []
+        for child in self.node.traverse(include_text=True):
+            if not child.is_text_node:
+                continue
+            parent = child.parent
+            if parent is not None and parent.tag in NON_TEXT_TAGS:
+                continue
+            text = child.text_content or ""
+            if strip:
+                text = text.strip()
+                if not text:
+                    continue
+            parts.append(text)
+        return "".join(parts)
+
+    def select(self, selector):
+        own_id = self.node.mem_id
+        return [LexborTag(n) for n in self.node.css(selector) if n.mem_id != own_id]
+
+    def find_all(self, name=None, attrs=None, class_=None, **kwargs):
+        attrs = dict(attrs or {}, **kwargs)
+        if class_ is not None:
+            attrs["class"] = class_
+        if name is True or name is None:
+            names = ["*"]
+        else:
+            names = [name] if isinstance(name, str) else list(name)
+        # Los filtros de presencia (True) van en el selector CSS; el resto se verifica en Python
+        presence = "".join(f"[{key}]" for key, rule in attrs.items() if rule is True)
+        other_rules = [(key, rule) for key, rule in attrs.items() if rule is not True]
+        selector = ", ".join(f"{tag}{presence}" for tag in names)
+
+        results = []
+        for tag in self.select(selector):
+            attributes = tag.node.attributes
+            if all(_match_rule(rule, attributes.get(key), key == "class") for key, rule in other_rules):
+                results.append(tag)
+        return results
+
+    def find(self, name=None, attrs=None, class_=None, **kwargs):
+        results = self.find_all(name, attrs, class_, **kwargs)
+        return results[0] if results else None
+
+    def find_parent(self, name=None, attrs=None, class_=None, **kwargs):
+        attrs = dict(attrs or {}, **kwargs)
+        if class_ is not None:
+            attrs["class"] = class_
+        names = None if name is None else ({name} if isinstance(name, str) else set(name))
+        parent = self.node.parent
+        while parent is not None and not parent.is_document_node:
+            if names is None or parent.tag in names:
+                attributes = parent.attributes
+                if all(_match_rule(rule, attributes.get(key), key == "class") for key, rule in attrs.items()):
+                    return LexborTag(parent)
+            parent = parent.parent
+        return None
@@ -0,0 +1,106 @@
+"""
+Caché idempotente de resultados de punto2 (RESULT_CACHE=1).
+
+Las notificaciones de S3 llegan al menos una vez y punto1 suele subir páginas idénticas; en
+ambos casos el resultado de procesar la página ya está escrito. Por cada llave de
+headlines/raw/ se guarda una entrada pequeña con la fuente que se procesó (el sha256 que
+punto1 deja en los metadatos del objeto o, si no está, su ETag), la versión de las reglas de
+extracción y las rutas que se escribieron. Antes de descargar se consulta head_object del
+objeto crudo y la entrada; si coinciden y los archivos de salida siguen existiendo, el
+registro termina sin descargar, parsear ni reescribir nada.
+
+La versión de las reglas es un hash del código de extracción (ver RULES_MODULES) y de la
+configuración que cambia la salida, así que modificar un selector o una regla invalida la
+caché sin tener que acordarse de subir un número.
+"""
+import hashlib
+import json
+import os
+import threading
+
+from botocore.exceptions import ClientError
+
+from common import telemetry
+
+# Fuera de headlines/final para que el crawler no lo catalogue
+S3_RESULTS_PREFIX = "headlines/state/results"
+# Módulos cuyo código define la salida de punto2
+RULES_MODULES = ("app.py", "parsers.py", "extraction_plan.py", "streaming.py")
+NOT_FOUND_CODES = ("NoSuchKey", "404", "NotFound")
+
+_versions = {} # configuración -> versión; el código se lee una vez por contenedor
+_lock = threading.Lock()
+
+
+def rules_version(settings):
+    """
+    Versión de las reglas: hash de los módulos de RULES_MODULES y de `settings` (dict con
+    la configuración que afecta la salida, p. ej. formatos o modo de escritura).
+    """
+    settings_key = json.dumps(settings, sort_keys=True)
+    with _lock:
+        if settings_key not in _versions:
+            digest = hashlib.blake2b(settings_key.encode("utf-8"), digest_size=8)
+            package_dir = os.path.dirname(os.path.abspath(__file__))
+            for module in RULES_MODULES:
+                with open(os.path.join(package_dir, module), "rb") as f:
+                    digest.update(f.read())
+            _versions[settings_key] = digest.hexdigest()
+        return _versions[settings_key]
+
+
+def entry_key(raw_key):
+    """Ruta de la entrada de caché de una llave de headlines/raw/."""
+    return f"{S3_RESULTS_PREFIX}/{raw_key.rsplit('/', 1)[-1]}.json"
+
+
+def source_id(s3_client, bucket, key):
+    """Identificador del contenido del objeto crudo: sha256 de punto1 o, si no está, el ETag."""
+    response = s3_client.head_object(Bucket=bucket, Key=key)
+    content_hash = response.get('Metadata', {}).get('sha256')
+    if content_hash:
+        return f"sha256:{content_hash}"
+    return "etag:" + response['ETag'].strip('"')
+
+
+def _exists(s3_client, bucket, key):
+    try:
+        s3_client.head_object(Bucket=bucket, Key=key)
+    except ClientError as e:
+        if e.response['Error']['Code'] in NOT_FOUND_CODES:
+            return False
+        raise
+    return True
+
+
+def lookup(s3_client, bucket, raw_key, source, version):
+    """
+    Retorna la entrada ({'source', 'version', 'rows', 'output_keys'}) si el resultado de
+    (`source`, `version`) para `raw_key` ya está escrito, o None.
+    """
+    try:
+        response = s3_client.get_object(Bucket=bucket, Key=entry_key(raw_key))
+    except ClientError as e:
+        if e.response['Error']['Code'] in NOT_FOUND_CODES:
+            return None
+        raise
+    entry = json.loads(response['Body'].read())
+    if entry.get('source') != source or entry.get('version') != version:
+        return None
+    # Alguien pudo borrar la salida (p. ej. una compactación): entonces se reprocesa
+    if not all(_exists(s3_client, bucket, key) for key in entry['output_keys']):
+        telemetry.info("La entrada de caché apunta a archivos que ya no existen.", key=raw_key)
+        return None
+    return entry
+
+
+def store(s3_client, bucket, raw_key, source, version, rows, output_keys):
+    """Guarda la entrada de caché de `raw_key` después de escribir su salida."""
+    body = json.dumps({'source': source, 'version': version, 'rows': rows, 'output_keys': output_keys})
+    s3_client.put_object(Bucket=bucket, Key=entry_key(raw_key), Body=body, ContentType='application/json')
+
+
+def clear_cache():
+    """Descarta las versiones calculadas (útil en pruebas)."""
+    with _lock:
+        _versions.clear()
@@ -0,0 +1,171 @@
+"""
+Índice persistente de enlaces vistos por periódico, para marcar titulares nuevos entre días.
+
+Por cada enlace se guarda su hash de 64 bits y el primer día en que apareció (AAAAMMDD), en
+dos arreglos alineados y ordenados por hash: 12 bytes por enlace, búsqueda binaria y sin
+objetos de Python por entrada, así millones de enlaces caben en pocos MB. Un titular es
+nuevo si su primer día es el de la partición, lo que hace el marcado idempotente al
+reprocesar el mismo día.
+
+El índice se carga una vez por contenedor (se revalida con If-None-Match) y se actualiza
+con escrituras condicionales de S3, reintentando si otra ejecución lo cambió.
+"""
+import sys
+import threading
+from array import array
+from bisect import bisect_left
+
+from botocore.exceptions import ClientError
+
+from common import telemetry
+
+from punto2.incremental import CONFLICT_ERROR_CODES, link_hash
+
+S3_SEEN_PREFIX = "headlines/state/seen-links"
+MAX_UPDATE_ATTEMPTS = 5
+
+_cache = {} # periodico -> SeenLinkIndex
+_lock = threading.Lock()
+
+
+class SeenLinkIndex:
+    """Arreglos ordenados de hashes y del primer día en que se vio cada enlace."""
+
+    def __init__(self, hashes=None, days=None, etag=None):
+        self.hashes = hashes if hashes is not None else array("Q")
+        self.days = days if days is not None else array("I")
+        self.etag = etag
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def first_seen(self, hash_value):
+        """Retorna el día (AAAAMMDD) en que se vio el hash por primera vez, o None."""
+        position = bisect_left(self.hashes, hash_value)
+        if position < len(self.hashes) and self.hashes[position] == hash_value:
+            return self.days[position]
+        return None
+
+    def merged_with(self, new_entries):
+        """
+        Retorna un índice nuevo con `new_entries` ({hash: día}) agregadas. Si un hash ya
+        existe se conserva el día más antiguo. Es una mezcla lineal de dos listas ordenadas.
+        """
+        hashes, days = array("Q"), array("I")
+        pending = sorted(new_entries.items())
+        i = j = 0
+        while i < len(self.hashes) or j < len(pending):
+            if j == len(pending) or (i < len(self.hashes) and self.hashes[i] < pending[j][0]):
+                hashes.append(self.hashes[i])
+                days.append(self.days[i])
+                i += 1
+            elif i == len(self.hashes) or pending[j][0] < self.hashes[i]:
+                hashes.append(pending[j][0])
+                days.append(pending[j][1])
+                j += 1
+            else:
+                hashes.append(self.hashes[i])
+                days.append(min(self.days[i], pending[j][1]))
+                i += 1
+                j += 1
+        return SeenLinkIndex(hashes, days, self.etag)
+
+    def to_bytes(self):
+        hashes, days = array("Q", self.hashes), array("I", self.days)
+        if sys.byteorder == "big":
+            hashes.byteswap()
+            days.byteswap()
+        return hashes.tobytes() + days.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data, etag=None):
+        if len(data) % 12:
+            raise ValueError("Índice de enlaces corrupto: el tamaño no es múltiplo de 12 bytes.")
+        count = len(data) // 12
+        hashes, days = array("Q"), array("I")
+        hashes.frombytes(data[:count * 8])
+        days.frombytes(data[count * 8:])
+        if sys.byteorder == "big":
+            hashes.byteswap()
+            days.byteswap()
+        return cls(hashes, days, etag)
+
+
+def seen_key(periodico):
+    return f"{S3_SEEN_PREFIX}/{periodico}.idx"
+
+
+def load_seen_index(s3_client, bucket, periodico, refresh=True):
+    """
+    Retorna el índice del periódico. La primera vez lo descarga; después solo lo revalida
+    con If-None-Match (un 304 cuesta poco) si `refresh` es True.
+    """
+    with _lock:
+        cached = _cache.get(periodico)
+    if cached is not None and not refresh:
+        return cached
+    request = {'Bucket': bucket, 'Key': seen_key(periodico)}
+    if cached is not None and cached.etag:
+        request['IfNoneMatch'] = cached.etag
+    try:
+        response = s3_client.get_object(**request)
+        index = SeenLinkIndex.from_bytes(response['Body'].read(), response['ETag'])
+    except ClientError as e:
+        code = e.response['Error']['Code']
+        if code in ("304", "NotModified"):
+            return cached
+        if code not in ("NoSuchKey", "404"):
+            raise
+        index = SeenLinkIndex()
+    with _lock:
+        _cache[periodico] = index
+    return index
+
+
+def save_seen_index(s3_client, bucket, periodico, index):
+    """Guarda el índice solo si no cambió desde que se leyó. Retorna False si hubo conflicto."""
+    condition = {'IfMatch': index.etag} if index.etag else {'IfNoneMatch': '*'}
+    try:
+        response = s3_client.put_object(Bucket=bucket, Key=seen_key(periodico), Body=index.to_bytes(),
+                                        ContentType='application/octet-stream', **condition)
+    except ClientError as e:
+        if e.response['Error']['Code'] in CONFLICT_ERROR_CODES:
+            return False
+        raise
+    index.etag = response.get('ETag')
+    with _lock:
+        _cache[periodico] = index
+    return True
+
+
+def tag_new_rows(news_data, index, day):
+    """
+    Agrega 'is_new' a cada fila: True si el enlace no se había visto antes de `day`
+    (AAAAMMDD). Retorna las entradas {hash: día} que hay que registrar en el índice.
+    """
+    entries = {}
+    for row in news_data:
+        row_hash = link_hash(row['link'])
+        first_seen = index.first_seen(row_hash)
+        row['is_new'] = first_seen is None or first_seen >= day
+        if first_seen is None or first_seen > day:
+            entries[row_hash] = day
+    return entries
+
+
+def record_links(s3_client, bucket, periodico, entries):
+    """Registra las entradas en el índice del periódico, reintentando ante conflictos."""
+    if not entries:
+        return True
+    for _ in range(MAX_UPDATE_ATTEMPTS):
+        index = load_seen_index(s3_client, bucket, periodico)
+        if save_seen_index(s3_client, bucket, periodico, index.merged_with(entries)):
+            return True
+        telemetry.warning("El índice de enlaces cambió durante la escritura. Reintentando.", periodico=periodico)
+    return False
+
+
+def clear_cache():
+    """Descarta los índices en memoria (útil en pruebas)."""
+    with _lock:
+        _cache.clear()
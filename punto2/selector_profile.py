@@ -0,0 +1,207 @@
+"""
+Perfil de las reglas de extracción sobre capturas guardadas y poda verificada.
+
+Las listas de selectores de El Espectador y las clases de enlace de El Tiempo crecieron a
+tanteo. Este módulo corre extract_news_data en modo perfil sobre muchas capturas de
+headlines/raw/ (del bucket o de un directorio local con el mismo árbol de llaves) y reporta
+por regla en cuántas capturas coincide, cuántas tarjetas encuentra, cuántas filas aporta y
+cuánto tiempo cuesta (`select_seconds` es lo que costaría su propio recorrido del documento).
+
+Con los totales propone reglas optimizadas:
+- sin los selectores de El Espectador que no aportaron filas en ninguna captura (quitar uno
+  así no cambia la salida, porque una regla sin filas no agrega enlaces a los ya vistos);
+- con las clases de enlace de El Tiempo que nunca acertaron quitadas y el resto ordenado por
+  aciertos, así la mayoría de tarjetas se resuelven con la primera búsqueda.
+
+Antes de escribir el archivo de reglas (ver SELECTOR_RULES_PATH en punto2.app) se extrae cada
+captura con las reglas completas y con las propuestas y se exige la misma salida, fila por
+fila y en el mismo orden. Si el orden nuevo cambia alguna salida se prueba solo la poda, y
+si eso también la cambia no se escribe nada.
+
+Uso:
+    python -m punto2.selector_profile --local ./capturas --report perfil.json \\
+        --write-rules punto2/selector_rules.json
+    python -m punto2.selector_profile --newspaper elespectador --since 2025-01-01 --report perfil.json
+"""
+import argparse
+import json
+import os
+import time
+from datetime import date
+
+from punto2 import app
+from punto2.backfill import list_raw_keys, parse_raw_key
+
+BASE_URLS = {
+    "eltiempo": "https://www.eltiempo.com/",
+    "elespectador": "https://www.elespectador.com/",
+}
+MIN_SNAPSHOTS = 20 # Menos capturas que esto no alcanzan para podar con confianza
+
+
+def iter_local_snapshots(root, newspapers=None, since=None, until=None):
+    """Capturas (llave, periódico, contenido, charset) de un directorio con el árbol de llaves."""
+    raw_dir = os.path.join(root, *app.S3_RAW_PREFIX.split('/'))
+    for filename in sorted(os.listdir(raw_dir)):
+        parsed = parse_raw_key(filename)
+        if parsed is None or parsed[0] not in BASE_URLS:
+            continue
+        periodico, snapshot_date = parsed
+        if (newspapers and periodico not in newspapers) or (since and snapshot_date < since) \
+                or (until and snapshot_date > until):
+            continue
+        key = f"{app.S3_RAW_PREFIX}/{filename}"
+        content, encoding = app.read_local_raw(key, root=root)
+        if content is not None:
+            yield key, periodico, content, encoding
+
+
+def iter_s3_snapshots(bucket, newspapers=None, since=None, until=None):
+    """Capturas (llave, periódico, contenido, charset) del bucket."""
+    for key in list_raw_keys(app.get_s3_client(), bucket, newspapers, since, until):
+        periodico = parse_raw_key(key)[0]
+        if periodico not in BASE_URLS:
+            continue
+        content, encoding = app.download_from_s3(bucket, key)
+        if content is not None:
+            yield key, periodico, content, encoding
+
+
+def profile_snapshots(snapshots, backend=None):
+    """
+    Perfila las reglas completas sobre `snapshots`. Retorna (reporte, salidas por llave);
+    el reporte tiene por regla los totales y en cuántas capturas coincidió y aportó filas.
+    """
+    rules = app.default_rules()
+    totals, outputs = {}, {}
+    pages = {}
+    for key, periodico, content, encoding in snapshots:
+        profile = {}
+        outputs[key] = app.extract_news_data(content, BASE_URLS[periodico], periodico, backend, None, encoding,
+                                             rules, profile)
+        pages[periodico] = pages.get(periodico, 0) + 1
+        for rule, stats in profile.items():
+            total = totals.setdefault(rule, {'matches': 0, 'rows': 0, 'seconds': 0.0,
+                                             'pages_matched': 0, 'pages_with_rows': 0})
+            for name, value in stats.items():
+                total[name] = total.get(name, 0) + value
+            total['pages_matched'] += int(stats['matches'] > 0)
+            total['pages_with_rows'] += int(stats['rows'] > 0)
+    return {'snapshots': len(outputs), 'pages': pages, 'rules': totals}, outputs
+
+
+def propose_rules(report, order=True):
+    """Reglas optimizadas a partir del reporte (ver el docstring del módulo)."""
+    rules = app.default_rules()
+    stats = report['rules']
+    if report['pages'].get('elespectador'):
+        rules['elespectador']['card_selectors'] = [
+            selector for selector in rules['elespectador']['card_selectors']
+            if stats.get(f"elespectador {selector}", {}).get('rows', 0) > 0
+        ]
+    if report['pages'].get('eltiempo'):
+        hits = {cls: stats.get(f"eltiempo link {cls}", {}).get('matches', 0) for cls in rules['eltiempo']['link_classes']}
+        kept = [cls for cls in rules['eltiempo']['link_classes'] if hits[cls] > 0]
+        rules['eltiempo']['link_classes'] = sorted(kept, key=lambda cls: -hits[cls]) if order else kept
+    return rules
+
+
+def verify_rules(snapshots, outputs, rules, backend=None):
+    """
+    Extrae cada captura con `rules` y la compara con su salida con las reglas completas.
+    Retorna (llaves con salida distinta, segundos con las reglas completas, segundos con `rules`).
+    """
+    full_rules = app.default_rules()
+    mismatches = []
+    full_seconds = rules_seconds = 0.0
+    for key, periodico, content, encoding in snapshots:
+        start = time.perf_counter()
+        app.extract_news_data(content, BASE_URLS[periodico], periodico, backend, None, encoding, full_rules)
+        middle = time.perf_counter()
+        rows = app.extract_news_data(content, BASE_URLS[periodico], periodico, backend, None, encoding, rules)
+        rules_seconds += time.perf_counter() - middle
+        full_seconds += middle - start
+        if rows != outputs.get(key):
+            mismatches.append(key)
+    return mismatches, full_seconds, rules_seconds
+
+
+def optimize(load_snapshots, backend=None):
+    """
+    Perfila, propone y verifica. `load_snapshots()` debe retornar un iterador nuevo de
+    capturas en cada llamada. Retorna el reporte con las reglas aceptadas (o None).
+    """
+    report, outputs = profile_snapshots(load_snapshots(), backend)
+    report['accepted'] = None
+    report['candidates'] = []
+    for order in (True, False):
+        rules = propose_rules(report, order)
+        if rules == app.default_rules():
+            break # Nada que podar ni reordenar
+        mismatches, full_seconds, rules_seconds = verify_rules(load_snapshots(), outputs, rules, backend)
+        report['candidates'].append({'rules': rules, 'mismatches': mismatches,
+                                     'full_seconds': full_seconds, 'rules_seconds': rules_seconds})
+        if not mismatches:
+            report['accepted'] = rules
+            break
+    return report
+
+
+def rules_file(report):
+    """Contenido del archivo de SELECTOR_RULES_PATH para las reglas aceptadas del reporte."""
+    return dict(report['accepted'], baseline=app.default_rules(), snapshots=report['snapshots'],
+                generated_at=date.today().isoformat())
+
+
+def print_report(report):
+    print(f"Capturas: {report['snapshots']} {report['pages']}")
+    print(f"{'regla':<62}{'capturas':>9}{'coincid.':>9}{'filas':>8}{'s':>9}{'select s':>10}")
+    for rule, stats in sorted(report['rules'].items()):
+        select_seconds = f"{stats['select_seconds']:.3f}" if 'select_seconds' in stats else "-"
+        print(f"{rule:<62}{stats['pages_matched']:>9}{stats['matches']:>9}{stats['rows']:>8}"
+              f"{stats['seconds']:>9.3f}{select_seconds:>10}")
+    for candidate in report['candidates']:
+        speedup = candidate['full_seconds'] / candidate['rules_seconds'] if candidate['rules_seconds'] else 0
+        print(f"Candidato: {len(candidate['mismatches'])} capturas con salida distinta, "
+              f"{candidate['full_seconds']:.2f}s -> {candidate['rules_seconds']:.2f}s ({speedup:.2f}x)")
+    print("Reglas aceptadas:" if report['accepted'] else "Sin reglas aceptadas.", report['accepted'] or "")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perfila las reglas de extracción y propone reglas podadas.")
+    parser.add_argument('--bucket', default=app.S3_BUCKET_NAME)
+    parser.add_argument('--local', help="Directorio con el árbol headlines/raw/ (en vez del bucket)")
+    parser.add_argument('--newspaper', action='append', dest='newspapers', help="Periódico a incluir (repetible)")
+    parser.add_argument('--since', type=date.fromisoformat, help="Fecha inicial AAAA-MM-DD (inclusive)")
+    parser.add_argument('--until', type=date.fromisoformat, help="Fecha final AAAA-MM-DD (inclusive)")
+    parser.add_argument('--backend', help="Backend de parseo (por defecto HTML_PARSER_BACKEND)")
+    parser.add_argument('--report', help="Archivo JSON donde guardar el reporte")
+    parser.add_argument('--write-rules', help="Archivo de reglas a escribir si la verificación pasa")
+    parser.add_argument('--min-snapshots', type=int, default=MIN_SNAPSHOTS)
+    args = parser.parse_args(argv)
+
+    if args.local:
+        load_snapshots = lambda: iter_local_snapshots(args.local, args.newspapers, args.since, args.until)
+    else:
+        load_snapshots = lambda: iter_s3_snapshots(args.bucket, args.newspapers, args.since, args.until)
+    report = optimize(load_snapshots, args.backend)
+    print_report(report)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.write_rules:
+        if report['accepted'] is None:
+            print("No se escriben reglas: ninguna propuesta conserva la salida.")
+            return 1
+        if report['snapshots'] < args.min_snapshots:
+            print(f"No se escriben reglas: {report['snapshots']} capturas (mínimo {args.min_snapshots}).")
+            return 1
+        with open(args.write_rules, 'w', encoding='utf-8') as f:
+            json.dump(rules_file(report), f, ensure_ascii=False, indent=2)
+        print(f"Reglas escritas en {args.write_rules}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,140 @@
+"""
+Escritura en streaming de los archivos finales: filas -> serializador -> S3 por partes.
+
+S3MultipartWriter es un archivo de solo escritura que acumula bytes y sube una parte de
+multipart upload cada vez que junta `part_size` bytes, así la memoria queda acotada a una
+parte por archivo y los primeros bytes llegan a S3 mientras el extractor sigue produciendo
+filas. Si el archivo nunca llega a una parte completa (el caso normal de una portada) se sube
+con un solo put, sin el costo de crear y completar un multipart upload.
+
+CsvStreamWriter y ParquetStreamWriter reciben filas una a una y escriben en el sink el mismo
+contenido que rows_to_csv y rows_to_parquet generan de una vez.
+"""
+import csv
+import io
+from io import StringIO
+
+from common import telemetry
+
+MIN_PART_SIZE = 5 * 1024 * 1024 # S3 rechaza partes menores (salvo la última)
+CSV_CHUNK_SIZE = 64 * 1024 # Texto CSV que se acumula antes de pasarlo al sink
+PARQUET_ROW_GROUP_SIZE = 10_000
+
+
+class S3MultipartWriter(io.RawIOBase):
+    """
+    Archivo de escritura sobre un objeto S3. `put(cuerpo, llave)` sube el objeto completo
+    cuando cabe en una parte y debe retornar True si tuvo éxito.
+    """
+
+    def __init__(self, s3_client, bucket, key, content_type, part_size, put):
+        super().__init__()
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.content_type = content_type
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self.put = put
+        self.upload_id = None
+        self.parts = []
+        self._buffer = bytearray()
+        self._written = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._buffer += data
+        self._written += len(data)
+        if len(self._buffer) >= self.part_size:
+            self._upload_part()
+        return len(data)
+
+    def tell(self):
+        return self._written
+
+    def _upload_part(self):
+        if self.upload_id is None:
+            response = self.s3_client.create_multipart_upload(Bucket=self.bucket, Key=self.key, ContentType=self.content_type)
+            self.upload_id = response['UploadId']
+        part_number = len(self.parts) + 1
+        with telemetry.span("upload"):
+            response = self.s3_client.upload_part(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+                                                  PartNumber=part_number, Body=bytes(self._buffer))
+        self.parts.append({'ETag': response['ETag'], 'PartNumber': part_number})
+        self._buffer = bytearray()
+
+    def complete(self):
+        """Termina la subida. Retorna True si el objeto quedó escrito."""
+        if self.upload_id is None:
+            return self.put(bytes(self._buffer), self.key)
+        if self._buffer:
+            self._upload_part()
+        self.s3_client.complete_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+                                                 MultipartUpload={'Parts': self.parts})
+        telemetry.info("Archivo subido a S3 por partes", key=self.key, parts=len(self.parts), bytes=self._written)
+        return True
+
+    def abort(self):
+        """Descarta las partes subidas (no deja un multipart upload huérfano cobrando)."""
+        if self.upload_id is not None:
+            try:
+                self.s3_client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+            except Exception as e:
+                telemetry.error("No se pudo abortar el multipart upload", key=self.key, error=str(e))
+            self.upload_id = None
+
+
+class CsvStreamWriter:
+    """CSV delimitado por '>' escrito por bloques en el sink (mismo formato que rows_to_csv)."""
+
+    def __init__(self, sink, fieldnames):
+        self.sink = sink
+        self.buffer = StringIO()
+        self.writer = csv.DictWriter(self.buffer, fieldnames=fieldnames, delimiter='>')
+        self.writer.writeheader()
+
+    def write(self, row):
+        self.writer.writerow(row)
+        if self.buffer.tell() >= CSV_CHUNK_SIZE:
+            self._drain()
+
+    def _drain(self):
+        self.sink.write(self.buffer.getvalue().encode('utf-8'))
+        self.buffer.seek(0)
+        self.buffer.truncate()
+
+    def close(self):
+        self._drain()
+
+
+class ParquetStreamWriter:
+    """Parquet escrito por grupos de filas; `to_table` convierte una lista de filas en tabla."""
+
+    def __init__(self, sink, to_table, row_group_size=PARQUET_ROW_GROUP_SIZE):
+        self.sink = sink
+        self.to_table = to_table
+        self.row_group_size = row_group_size
+        self.rows = []
+        self.writer = None
+
+    def write(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        import pyarrow.parquet as pq
+
+        if not self.rows:
+            return
+        table = self.to_table(self.rows)
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.sink, table.schema, compression='snappy', use_dictionary=['category'])
+        self.writer.write_table(table)
+        self.rows = []
+
+    def close(self):
+        self._flush()
+        if self.writer is not None:
+            self.writer.close()
@@ -1,23 +1,115 @@
-import boto3
+import os
+
 from botocore.exceptions import ClientError
 
+from common import clients, telemetry
+from punto3 import crawler, partitions
+
 # Nombre del crawler que quieres ejecutar
 CRAWLER_NAME = 'parcial3'
+# "crawler": cada evento ejecuta el crawler completo (comportamiento original).
+# "partitions": registra en Glue solo las particiones de los archivos que escribió punto2
+# (ver punto3.partitions) y deja el crawler para cambios de esquema.
+REGISTRATION_MODE = os.environ.get("REGISTRATION_MODE", "crawler").lower()
+GLUE_DATABASE = os.environ.get("GLUE_DATABASE", "parcial3")
+# Segundos que una invocación puede esperar a que termine el crawler en curso para lanzar la
+# re-ejecución pendiente (ver punto3.crawler). Se recorta al tiempo que le queda a la Lambda.
+CRAWLER_WAIT_BUDGET = int(os.environ.get("CRAWLER_WAIT_BUDGET", "840"))
+SAFETY_MARGIN_SECONDS = 15
+S3_BUCKET_NAME = "parcial3luis"
+# Prefijo de salida de punto2 -> tabla que el crawler creó para él
+PARTITION_TABLES = {
+    "headlines/final": os.environ.get("GLUE_TABLE", "final"),
+    "headlines/parquet": os.environ.get("GLUE_PARQUET_TABLE", "parquet"),
+}
+
+def get_glue_client():
+    """Retorna el cliente Glue compartido del contenedor."""
+    return clients.get_client('glue')
+
+def get_s3_client():
+    """Retorna el cliente S3 compartido (el bucket está en sa-east-1, como en punto2)."""
+    return clients.get_client('s3', region_name='sa-east-1')
+
+def start_crawler(crawler_name):
+    """Inicia el crawler. Retorna True si quedó corriendo (también si ya lo estaba)."""
+    glue_client = get_glue_client()
 
-def handler(crawler_name):
-    glue_client = boto3.client('glue')
-    
     try:
         # Inicia el crawler
-        glue_client.start_crawler(Name=crawler_name)
-        print(f"Crawler '{crawler_name}' iniciado exitosamente.")
+        with telemetry.span("start_crawler"):
+            glue_client.start_crawler(Name=crawler_name)
+        telemetry.info("Crawler iniciado", crawler=crawler_name)
+        return True
     except ClientError as e:
         if e.response['Error']['Code'] == 'CrawlerRunningException':
-            print(f"El crawler '{crawler_name}' ya está en ejecución.")
-        else:
-            print(f"Error al ejecutar el crawler: {e}")
+            telemetry.info("El crawler ya está en ejecución", crawler=crawler_name)
+            return True
+        telemetry.error("Error al ejecutar el crawler", crawler=crawler_name, error=str(e))
     except Exception as e:
-        print(f"Error inesperado: {e}")
+        telemetry.error("Error inesperado al ejecutar el crawler", crawler=crawler_name, error=str(e))
+    return False
+
+def wait_budget(context):
+    """Segundos disponibles para esperar al crawler en esta invocación."""
+    budget = CRAWLER_WAIT_BUDGET
+    if context is not None and hasattr(context, 'get_remaining_time_in_millis'):
+        budget = min(budget, context.get_remaining_time_in_millis() / 1000 - SAFETY_MARGIN_SECONDS)
+    return max(budget, 0)
+
+def schedule_crawl(context=None):
+    """Pide una ejecución del crawler coalesciendo disparos. Retorna el resultado de request_crawl."""
+    try:
+        outcome = crawler.request_crawl(get_glue_client(), get_s3_client(), S3_BUCKET_NAME,
+                                        CRAWLER_NAME, wait_budget(context))
+    except Exception as e:
+        telemetry.error("Error al programar el crawler", crawler=CRAWLER_NAME, error=str(e))
+        return "error"
+    telemetry.info("Solicitud de ejecución del crawler", crawler=CRAWLER_NAME, outcome=outcome)
+    return outcome
+
+def register_from_event(event, context=None):
+    """
+    Registra las particiones de las llaves del evento y, si hace falta (tabla inexistente,
+    cambio de esquema o errores de Glue), ejecuta el crawler como respaldo.
+    """
+    bucket, keys = partitions.keys_from_event(event)
+    try:
+        with telemetry.span("register_partitions"):
+            result = partitions.register_partitions(get_glue_client(), get_s3_client(), GLUE_DATABASE,
+                                                     bucket or S3_BUCKET_NAME, keys, PARTITION_TABLES)
+    except Exception as e:
+        telemetry.error("Error registrando particiones. Se usará el crawler.", error=str(e))
+        result = {'registered': 0, 'existing': 0, 'errors': [str(e)], 'needs_crawler': True}
+    telemetry.info("Registro de particiones", keys=len(keys), registered=result['registered'],
+                   existing=result['existing'], needs_crawler=result['needs_crawler'])
+    telemetry.count("partitions_registered", result['registered'])
+    telemetry.count("partitions_existing", result['existing'])
+
+    result['crawler'] = None
+    if result['needs_crawler']:
+        result['crawler'] = schedule_crawl(context)
+        partitions.clear_cache() # El crawler puede cambiar el esquema de la tabla
+    return result
+
+def handler(event=CRAWLER_NAME, context=None):
+    """
+    Con un nombre de crawler (uso local) inicia ese crawler. Con el evento S3 de
+    headlines/final/ pide una ejecución coalescida del crawler o, con
+    REGISTRATION_MODE="partitions", registra las particiones.
+    """
+    if isinstance(event, str):
+        start_crawler(event)
+        result = None
+    elif REGISTRATION_MODE == "partitions":
+        result = register_from_event(event, context)
+    else:
+        result = {'crawler': schedule_crawl(context)}
+    telemetry.flush_metrics(Function="punto3")
+    return result
+
+if clients.PREWARM:
+    get_glue_client()
 
 if __name__ == '__main__':
     handler(CRAWLER_NAME)
@@ -0,0 +1,329 @@
+"""
+Compactación mensual de los archivos diarios de headlines/final/.
+
+punto2 escribe un CSV pequeño por periódico y día (y uno por ejecución con WRITE_MODE=merge),
+así que un año son cientos de objetos por periódico y Athena pasa más tiempo abriendo archivos
+y listando particiones que leyendo datos. Este trabajo junta los archivos de cada
+(periódico, mes) en un solo archivo con una columna `day`, sin enlaces repetidos (se conserva
+la primera aparición), en CSV delimitado por '>' o en Parquet:
+
+    headlines/monthly/periodico=/year=/month=/<periodico>-headlines-AAAA-MM.csv -> tabla "monthly"
+    headlines/monthly_parquet/... .parquet                                       -> tabla "monthly_parquet"
+
+Glue no admite particiones diarias y mensuales en la misma tabla, por eso el resultado va a su
+propia tabla (se crea si no existe) y su partición se registra con batch_create_partition,
+igual que punto3.partitions. El archivo mensual se reemplaza con un solo put (quien lo lea ve el
+anterior o el nuevo, nunca uno a medias).
+
+Con --drop-daily, después de escribir y registrar el mes se borran los CSV diarios y sus
+particiones de la tabla "final". El estado de cada mes (headlines/state/compaction/) guarda los
+archivos de origen con su ETag y si ya se borraron los diarios: al repetir el comando se omiten
+los meses sin cambios y, si los diarios se borraron (aunque sea en parte), el mes se recalcula
+sobre el archivo mensual existente más los diarios que queden, así que cortar la ejecución en
+cualquier punto no pierde filas. Los meses se procesan en paralelo.
+
+Uso:
+    python -m punto3.compaction --newspaper eltiempo --since 2024-01 --until 2024-12 \\
+        --format parquet --workers 8 [--drop-daily]
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+from botocore.exceptions import ClientError
+
+from common import telemetry
+from punto3 import app, partitions
+
+SOURCE_PREFIX = "headlines/final"
+STATE_PREFIX = "headlines/state/compaction"
+# Formato -> (prefijo de salida, tabla de Glue)
+MONTHLY_OUTPUTS = {
+    'csv': ("headlines/monthly", os.environ.get("GLUE_MONTHLY_TABLE", "monthly")),
+    'parquet': ("headlines/monthly_parquet", os.environ.get("GLUE_MONTHLY_PARQUET_TABLE", "monthly_parquet")),
+}
+COLUMNS = ['category', 'title', 'link', 'day']
+PARTITION_KEYS = ['periodico', 'year', 'month']
+MAX_BATCH_DELETE = 25 # Límite de batch_delete_partition por llamada
+NOT_FOUND_CODES = ("NoSuchKey", "404", "NotFound")
+TABLE_FORMATS = {
+    'csv': {
+        'InputFormat': "org.apache.hadoop.mapred.TextInputFormat",
+        'OutputFormat': "org.apache.hadoop.hive.ql.io.HiveIgnoreKeyTextOutputFormat",
+        'SerdeInfo': {'SerializationLibrary': "org.apache.hadoop.hive.serde2.lazy.LazySimpleSerDe",
+                      'Parameters': {'field.delim': partitions.CSV_DELIMITER}},
+    },
+    'parquet': {
+        'InputFormat': "org.apache.hadoop.hive.ql.io.parquet.MapredParquetInputFormat",
+        'OutputFormat': "org.apache.hadoop.hive.ql.io.parquet.MapredParquetOutputFormat",
+        'SerdeInfo': {'SerializationLibrary': "org.apache.hadoop.hive.ql.io.parquet.serde.ParquetHiveSerDe"},
+    },
+}
+
+_table_lock = threading.Lock() # Varios meses pueden intentar crear la tabla a la vez
+
+
+def month_label(value):
+    """Valida un mes AAAA-MM (para argparse)."""
+    return datetime.strptime(value, "%Y-%m").strftime("%Y-%m")
+
+
+def last_closed_month(today=None):
+    """Mes anterior al actual: el mes en curso todavía recibe archivos de punto2."""
+    return ((today or date.today()).replace(day=1) - timedelta(days=1)).strftime("%Y-%m")
+
+
+def list_daily_files(s3_client, bucket, newspapers=None, since=None, until=None):
+    """
+    Agrupa los CSV diarios de headlines/final/ por mes.
+    Retorna {(periodico, año, mes): {llave: ETag}}.
+    """
+    months = {}
+    paginator = s3_client.get_paginator('list_objects_v2')
+    prefixes = [f"{SOURCE_PREFIX}/periodico={name}/" for name in newspapers] if newspapers else [f"{SOURCE_PREFIX}/"]
+    for prefix in prefixes:
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                match = partitions.PARTITION_KEY_RE.match(obj['Key'])
+                if not match or match.group('prefix') != SOURCE_PREFIX or not obj['Key'].endswith('.csv'):
+                    continue
+                label = f"{match.group('year')}-{match.group('month')}"
+                if (since and label < since) or (until and label > until):
+                    continue
+                month = (match.group('periodico'), match.group('year'), match.group('month'))
+                months.setdefault(month, {})[obj['Key']] = obj['ETag'].strip('"')
+    return months
+
+
+def monthly_key(periodico, year, month, output_format='csv'):
+    """Ruta del archivo compactado de un mes."""
+    prefix = MONTHLY_OUTPUTS[output_format][0]
+    return (f"{prefix}/periodico={periodico}/year={year}/month={month}/"
+            f"{periodico}-headlines-{year}-{month}.{output_format}")
+
+
+def state_key(periodico, year, month, output_format='csv'):
+    """Ruta del estado de compactación de un mes."""
+    return f"{STATE_PREFIX}/{periodico}-{year}-{month}.{output_format}.json"
+
+
+def _get_object(s3_client, bucket, key):
+    """Cuerpo del objeto en bytes, o None si no existe."""
+    try:
+        return s3_client.get_object(Bucket=bucket, Key=key)['Body'].read()
+    except ClientError as e:
+        if e.response['Error']['Code'] in NOT_FOUND_CODES:
+            return None
+        raise
+
+
+def read_daily_rows(body, day):
+    """Filas (category, title, link, day) de un CSV diario de punto2."""
+    reader = csv.DictReader(io.StringIO(body.decode('utf-8')), delimiter=partitions.CSV_DELIMITER)
+    return [{'category': row['category'], 'title': row['title'], 'link': row['link'], 'day': day} for row in reader]
+
+
+def read_monthly_rows(body, output_format):
+    """Filas de un archivo mensual ya compactado."""
+    if output_format == 'parquet':
+        import pyarrow.parquet as pq
+
+        return pq.read_table(io.BytesIO(body), columns=COLUMNS).to_pylist()
+    return list(csv.DictReader(io.StringIO(body.decode('utf-8')), delimiter=partitions.CSV_DELIMITER))
+
+
+def merge_rows(sources):
+    """
+    Junta las filas de `sources` (listas en orden de lectura) ordenadas por día y sin enlaces
+    repetidos: se conserva la primera aparición. Retorna (filas, duplicados descartados).
+    """
+    ordered = sorted((row['day'], position, row) for position, row in
+                     enumerate(row for rows in sources for row in rows))
+    seen, merged = set(), []
+    for _, _, row in ordered:
+        if row['link'] in seen:
+            continue
+        seen.add(row['link'])
+        merged.append(row)
+    return merged, len(ordered) - len(merged)
+
+
+def serialize(rows, output_format):
+    """Contenido del archivo mensual en el formato pedido."""
+    if output_format == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.table({
+            'category': pa.array([row['category'] for row in rows], type=pa.string()).dictionary_encode(),
+            'title': pa.array([row['title'] for row in rows], type=pa.string()),
+            'link': pa.array([row['link'] for row in rows], type=pa.string()),
+            'day': pa.array([row['day'] for row in rows], type=pa.string()),
+        })
+        sink = pa.BufferOutputStream()
+        pq.write_table(table, sink, compression='snappy', use_dictionary=['category'])
+        return sink.getvalue().to_pybytes()
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=COLUMNS, delimiter=partitions.CSV_DELIMITER)
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue().encode('utf-8')
+
+
+def ensure_table(glue_client, database, bucket, output_format):
+    """Crea la tabla mensual del formato si no existe. Retorna su StorageDescriptor."""
+    prefix, table = MONTHLY_OUTPUTS[output_format]
+    with _table_lock:
+        descriptor = partitions.table_descriptor(glue_client, database, table)
+        if descriptor is not None:
+            return descriptor
+        table_input = {
+            'Name': table,
+            'TableType': 'EXTERNAL_TABLE',
+            'PartitionKeys': [{'Name': name, 'Type': 'string'} for name in PARTITION_KEYS],
+            'StorageDescriptor': dict(
+                TABLE_FORMATS[output_format],
+                Columns=[{'Name': name, 'Type': 'string'} for name in COLUMNS],
+                Location=f"s3://{bucket}/{prefix}/",
+            ),
+            'Parameters': {'classification': output_format},
+        }
+        if output_format == 'csv':
+            table_input['Parameters']['skip.header.line.count'] = '1'
+        try:
+            glue_client.create_table(DatabaseName=database, TableInput=table_input)
+            telemetry.info("Tabla mensual creada en Glue", database=database, table=table)
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'AlreadyExistsException':
+                raise
+        return partitions.table_descriptor(glue_client, database, table)
+
+
+def register_month(glue_client, database, bucket, output_format, values):
+    """Registra la partición (periodico, año, mes) de la tabla mensual. Retorna True si es nueva."""
+    prefix, table = MONTHLY_OUTPUTS[output_format]
+    descriptor = ensure_table(glue_client, database, bucket, output_format)
+    if partitions.existing_partitions(glue_client, database, table, [values]):
+        return False
+    location = f"s3://{bucket}/{prefix}/periodico={values[0]}/year={values[1]}/month={values[2]}/"
+    response = glue_client.batch_create_partition(
+        DatabaseName=database, TableName=table,
+        PartitionInputList=[{'Values': list(values), 'StorageDescriptor': dict(descriptor, Location=location)}],
+    )
+    errors = [e for e in response.get('Errors', []) if e['ErrorDetail']['ErrorCode'] != 'AlreadyExistsException']
+    if errors:
+        raise RuntimeError(f"Glue rechazó la partición {values}: {errors[0]['ErrorDetail']}")
+    return not response.get('Errors')
+
+
+def drop_daily_files(s3_client, glue_client, database, bucket, keys):
+    """Borra los CSV diarios ya compactados y sus particiones de la tabla diaria."""
+    keys = sorted(keys)
+    for start in range(0, len(keys), 1000):
+        s3_client.delete_objects(Bucket=bucket, Delete={'Objects': [{'Key': key} for key in keys[start:start + 1000]]})
+    table = app.PARTITION_TABLES[SOURCE_PREFIX]
+    values_list = sorted({partitions.partition_from_key(key, bucket, app.PARTITION_TABLES)[1] for key in keys})
+    for start in range(0, len(values_list), MAX_BATCH_DELETE):
+        glue_client.batch_delete_partition(
+            DatabaseName=database, TableName=table,
+            PartitionsToDelete=[{'Values': list(values)} for values in values_list[start:start + MAX_BATCH_DELETE]],
+        )
+
+
+def compaction_result(month, status, rows=0, duplicates=0, files=0, output_key=None, error=None):
+    """Resultado de compactar un mes."""
+    return {'month': month, 'status': status, 'rows': rows, 'duplicates': duplicates, 'files': files,
+            'output_key': output_key, 'error': error}
+
+
+def compact_month(s3_client, glue_client, database, bucket, month, daily, output_format='csv', drop_daily=False):
+    """
+    Compacta los archivos diarios `daily` ({llave: ETag}) del mes (periodico, año, mes):
+    escribe el archivo mensual, registra su partición, guarda el estado y, si se pide, borra
+    los diarios. Retorna el resultado (ver compaction_result).
+    """
+    periodico, year, month_number = month
+    label = f"{periodico}/{year}-{month_number}"
+    output_key = monthly_key(periodico, year, month_number, output_format)
+    entry_key = state_key(periodico, year, month_number, output_format)
+    try:
+        state_body = _get_object(s3_client, bucket, entry_key)
+        state = json.loads(state_body) if state_body else {}
+        existing = _get_object(s3_client, bucket, output_key)
+        if state.get('sources') == daily and not state.get('dropped') and existing is not None:
+            return compaction_result(label, 'skipped', state.get('rows', 0), output_key=output_key)
+
+        sources = []
+        # Si algún diario ya se borró, el archivo mensual es la única copia de esas filas
+        if state.get('dropped') and existing is not None:
+            sources.append(read_monthly_rows(existing, output_format))
+        # El archivo del día va antes de sus partes incrementales (-HHMMSS-...), en orden de escritura
+        for key in sorted(daily, key=lambda key: key.rsplit('.', 1)[0]):
+            day = partitions.PARTITION_KEY_RE.match(key).group('day')
+            sources.append(read_daily_rows(_get_object(s3_client, bucket, key) or b"", day))
+        rows, duplicates = merge_rows(sources)
+
+        with telemetry.span("upload"):
+            s3_client.put_object(Bucket=bucket, Key=output_key, Body=serialize(rows, output_format))
+        with telemetry.span("register_partitions"):
+            register_month(glue_client, database, bucket, output_format, (periodico, year, month_number))
+        dropped = drop_daily or bool(state.get('dropped'))
+        s3_client.put_object(Bucket=bucket, Key=entry_key, ContentType='application/json', Body=json.dumps(
+            {'sources': daily, 'rows': len(rows), 'output_key': output_key, 'dropped': dropped}))
+        if drop_daily:
+            drop_daily_files(s3_client, glue_client, database, bucket, daily)
+    except Exception as e:
+        telemetry.error("Error compactando el mes", month=label, error=str(e))
+        return compaction_result(label, 'error', files=len(daily), output_key=output_key, error=str(e))
+    telemetry.info("Mes compactado", month=label, files=len(daily), rows=len(rows), duplicates=duplicates,
+                   output_format=output_format)
+    return compaction_result(label, 'ok', len(rows), duplicates, len(daily), output_key)
+
+
+def run_compaction(bucket=app.S3_BUCKET_NAME, newspapers=None, since=None, until=None, output_format='csv',
+                   workers=8, drop_daily=False, database=app.GLUE_DATABASE):
+    """Compacta los meses que cumplen los filtros. Retorna el resumen y los resultados por mes."""
+    s3_client = app.get_s3_client()
+    glue_client = app.get_glue_client()
+    months = list_daily_files(s3_client, bucket, newspapers, since, until or last_closed_month())
+    print(f"Compactación: {len(months)} meses, {sum(len(files) for files in months.values())} archivos diarios.")
+
+    compact = lambda item: compact_month(s3_client, glue_client, database, bucket, item[0], item[1],
+                                         output_format, drop_daily)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        results = list(executor.map(compact, sorted(months.items())))
+
+    summary = {status: sum(1 for r in results if r['status'] == status) for status in ('ok', 'skipped', 'error')}
+    summary.update(rows=sum(r['rows'] for r in results if r['status'] == 'ok'),
+                   duplicates=sum(r['duplicates'] for r in results),
+                   files=sum(r['files'] for r in results if r['status'] == 'ok'))
+    telemetry.info("Compactación terminada", **summary)
+    telemetry.flush_metrics(Function="compaction")
+    return {'summary': summary, 'results': results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compacta los CSV diarios de headlines/final/ en archivos mensuales.")
+    parser.add_argument('--bucket', default=app.S3_BUCKET_NAME)
+    parser.add_argument('--newspaper', action='append', dest='newspapers', help="Periódico a incluir (repetible)")
+    parser.add_argument('--since', type=month_label, help="Mes inicial AAAA-MM (inclusive)")
+    parser.add_argument('--until', type=month_label, help="Mes final AAAA-MM (inclusive; por defecto el mes anterior)")
+    parser.add_argument('--format', dest='output_format', choices=sorted(MONTHLY_OUTPUTS), default='csv')
+    parser.add_argument('--workers', type=int, default=8, help="Meses compactados a la vez")
+    parser.add_argument('--drop-daily', action='store_true',
+                        help="Borra los CSV diarios y sus particiones después de compactar")
+    args = parser.parse_args(argv)
+
+    response = run_compaction(args.bucket, args.newspapers, args.since, args.until, args.output_format,
+                              args.workers, args.drop_daily)
+    print(json.dumps(response['summary']))
+    return 0 if response['summary']['error'] == 0 else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
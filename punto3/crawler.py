@@ -0,0 +1,135 @@
+"""
+Coalescencia de ejecuciones del crawler de Glue.
+
+Si llega un disparo mientras el crawler corre, los datos nuevos no se pierden: se deja una
+marca de re-ejecución pendiente en S3 y una sola invocación (la dueña de la marca) consulta
+get_crawler con backoff exponencial hasta que el crawler termina, y entonces lanza exactamente
+una ejecución más. Una ráfaga de N disparos cuesta como máximo dos ejecuciones: la que estaba
+en curso y la de seguimiento.
+
+La marca se crea con escritura condicional (If-None-Match), así solo una invocación espera, y
+guarda hasta cuándo espera (`poll_until`). Si el tiempo se acaba antes de que el crawler
+termine, la marca queda y el siguiente disparo toma el relevo. La marca se borra antes de
+iniciar el crawler: lo que llegue después de borrarla genera su propia marca.
+"""
+import json
+import time
+
+from botocore.exceptions import ClientError
+
+from common import telemetry
+
+PENDING_PREFIX = "headlines/state/crawler-pending"
+INITIAL_POLL_SECONDS = 5
+MAX_POLL_SECONDS = 60
+BACKOFF_FACTOR = 2
+CONFLICT_ERROR_CODES = ("PreconditionFailed", "ConditionalRequestConflict", "412", "409")
+
+
+def pending_key(crawler_name):
+    return f"{PENDING_PREFIX}/{crawler_name}.json"
+
+
+def crawler_state(glue_client, crawler_name):
+    """Estado del crawler: READY, RUNNING o STOPPING."""
+    return glue_client.get_crawler(Name=crawler_name)['Crawler']['State']
+
+
+def try_start(glue_client, crawler_name):
+    """Inicia el crawler. Retorna True si arrancó y False si ya estaba corriendo."""
+    try:
+        glue_client.start_crawler(Name=crawler_name)
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'CrawlerRunningException':
+            return False
+        raise
+    telemetry.count("crawler_starts")
+    return True
+
+
+def read_marker(s3_client, bucket, key):
+    """Retorna (marca, etag), o (None, None) si no hay re-ejecución pendiente."""
+    try:
+        response = s3_client.get_object(Bucket=bucket, Key=key)
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+            return None, None
+        raise
+    return json.loads(response['Body'].read()), response['ETag']
+
+
+def claim_marker(s3_client, bucket, key, poll_until, etag=None):
+    """
+    Crea la marca (o reemplaza una cuyo plazo venció, con su `etag`). Retorna el ETag nuevo,
+    o None si otra invocación se adelantó.
+    """
+    condition = {'IfMatch': etag} if etag else {'IfNoneMatch': '*'}
+    body = json.dumps({'poll_until': poll_until, 'requested_at': time.time()})
+    try:
+        response = s3_client.put_object(Bucket=bucket, Key=key, Body=body,
+                                        ContentType='application/json', **condition)
+    except ClientError as e:
+        if e.response['Error']['Code'] in CONFLICT_ERROR_CODES:
+            return None
+        raise
+    return response['ETag']
+
+
+def clear_marker(s3_client, bucket, key):
+    s3_client.delete_object(Bucket=bucket, Key=key)
+
+
+def wait_until_ready(glue_client, s3_client, bucket, crawler_name, etag, deadline,
+                     sleep=time.sleep, clock=time.monotonic):
+    """
+    Espera con backoff exponencial a que el crawler quede READY. Retorna "ready", "handled"
+    si otra invocación ya atendió la marca, o "timeout" si se acabó el plazo.
+    """
+    delay = INITIAL_POLL_SECONDS
+    while True:
+        if crawler_state(glue_client, crawler_name) == 'READY':
+            return "ready"
+        if clock() + delay > deadline:
+            return "timeout"
+        sleep(delay)
+        delay = min(delay * BACKOFF_FACTOR, MAX_POLL_SECONDS)
+        _, current_etag = read_marker(s3_client, bucket, pending_key(crawler_name))
+        if current_etag != etag:
+            return "handled"
+
+
+def request_crawl(glue_client, s3_client, bucket, crawler_name, budget_seconds,
+                  sleep=time.sleep, clock=time.monotonic):
+    """
+    Pide una ejecución del crawler coalesciendo con la que esté en curso. Retorna:
+    "started" (arrancó ya), "coalesced" (otra invocación se encarga), "follow_up_started"
+    (arrancó la ejecución de seguimiento) o "pending" (la marca queda para el siguiente disparo).
+    """
+    deadline = clock() + budget_seconds
+    key = pending_key(crawler_name)
+    marker, etag = read_marker(s3_client, bucket, key)
+
+    if crawler_state(glue_client, crawler_name) == 'READY':
+        if marker is not None:
+            clear_marker(s3_client, bucket, key) # Esta ejecución cubre lo pendiente
+        if try_start(glue_client, crawler_name):
+            return "started"
+        marker, etag = read_marker(s3_client, bucket, key) # Otro disparo lo inició primero
+
+    if marker is not None and marker['poll_until'] > time.time():
+        telemetry.count("crawler_coalesced")
+        return "coalesced"
+    etag = claim_marker(s3_client, bucket, key, time.time() + budget_seconds, etag)
+    if etag is None:
+        telemetry.count("crawler_coalesced")
+        return "coalesced"
+
+    with telemetry.span("crawler_wait"):
+        outcome = wait_until_ready(glue_client, s3_client, bucket, crawler_name, etag, deadline, sleep, clock)
+    if outcome == "handled":
+        return "coalesced"
+    if outcome == "timeout":
+        telemetry.warning("El crawler sigue en ejecución. La re-ejecución queda pendiente.", crawler=crawler_name)
+        return "pending"
+    clear_marker(s3_client, bucket, key)
+    return "follow_up_started" if try_start(glue_client, crawler_name) else "coalesced"
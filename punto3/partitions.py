@@ -0,0 +1,146 @@
+"""
+Registro directo de particiones en el catálogo de Glue a partir de las llaves que escribe punto2.
+
+punto2 ya sabe qué partición periodico=/year=/month=/day= escribió, así que en vez de que el
+crawler recorra todo headlines/final/ se crea solo esa partición con batch_create_partition,
+copiando el StorageDescriptor de la tabla (SerDe, delimitador '>', columnas) y cambiando la
+ubicación. Las particiones que ya existen se omiten. Si la tabla no existe o el encabezado del
+CSV no coincide con sus columnas (cambio de esquema), el llamador debe ejecutar el crawler.
+"""
+import re
+from urllib.parse import unquote_plus
+
+from botocore.exceptions import ClientError
+
+from common import telemetry
+
+PARTITION_KEY_RE = re.compile(
+    r"^(?P<prefix>.+?)/periodico=(?P<periodico>[^/]+)/year=(?P<year>\d{4})/"
+    r"month=(?P<month>\d{2})/day=(?P<day>\d{2})/[^/]+$"
+)
+MAX_BATCH_CREATE = 100 # Límite de batch_create_partition por llamada
+MAX_BATCH_GET = 1000 # Límite de batch_get_partition por llamada
+CSV_DELIMITER = '>'
+HEADER_RANGE = "bytes=0-4095" # El encabezado del CSV cabe de sobra en los primeros 4 KB
+
+_table_descriptors = {} # (base de datos, tabla) -> StorageDescriptor; se lee una vez por contenedor
+
+
+def keys_from_event(event):
+    """
+    Retorna (bucket, llaves) del evento: registros de S3 (llaves URL-encoded, por eso el
+    unquote) o una invocación directa {"bucket": ..., "keys": [...]}.
+    """
+    if 'keys' in event:
+        return event.get('bucket'), list(event['keys'])
+    bucket, keys = None, []
+    for record in event.get('Records', []):
+        bucket = record['s3']['bucket']['name']
+        keys.append(unquote_plus(record['s3']['object']['key']))
+    return bucket, keys
+
+
+def partition_from_key(key, bucket, tables):
+    """
+    Retorna (tabla, valores, ubicación) de la partición de `key`, o None si la llave no es
+    de un prefijo con tabla en `tables` ({prefijo: tabla}).
+    """
+    match = PARTITION_KEY_RE.match(key)
+    if not match or match.group('prefix') not in tables:
+        return None
+    values = (match.group('periodico'), match.group('year'), match.group('month'), match.group('day'))
+    location = f"s3://{bucket}/{key.rsplit('/', 1)[0]}/"
+    return tables[match.group('prefix')], values, location
+
+
+def table_descriptor(glue_client, database, table):
+    """StorageDescriptor de la tabla, o None si la tabla no existe todavía."""
+    cache_key = (database, table)
+    if cache_key not in _table_descriptors:
+        try:
+            response = glue_client.get_table(DatabaseName=database, Name=table)
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'EntityNotFoundException':
+                return None
+            raise
+        _table_descriptors[cache_key] = response['Table']['StorageDescriptor']
+    return _table_descriptors[cache_key]
+
+
+def csv_header(s3_client, bucket, key):
+    """Columnas del encabezado del CSV, leyendo solo el comienzo del objeto."""
+    response = s3_client.get_object(Bucket=bucket, Key=key, Range=HEADER_RANGE)
+    first_line = response['Body'].read().decode('utf-8', errors='replace').split('\n', 1)[0]
+    return [column.strip().lower() for column in first_line.split(CSV_DELIMITER)]
+
+
+def schema_matches(descriptor, s3_client, bucket, key):
+    """Indica si el archivo tiene las columnas de la tabla (el Parquet trae su propio esquema)."""
+    if not key.endswith('.csv'):
+        return True
+    return csv_header(s3_client, bucket, key) == [column['Name'].lower() for column in descriptor.get('Columns', [])]
+
+
+def existing_partitions(glue_client, database, table, values_list):
+    """Subconjunto de `values_list` que ya está registrado en la tabla."""
+    existing = set()
+    for start in range(0, len(values_list), MAX_BATCH_GET):
+        entries = [{'Values': list(values)} for values in values_list[start:start + MAX_BATCH_GET]]
+        response = glue_client.batch_get_partition(DatabaseName=database, TableName=table, PartitionsToGet=entries)
+        existing.update(tuple(partition['Values']) for partition in response.get('Partitions', []))
+    return existing
+
+
+def register_partitions(glue_client, s3_client, database, bucket, keys, tables):
+    """
+    Registra las particiones de `keys` que falten. Retorna un resumen con las particiones
+    registradas, las que ya existían, los errores y si hace falta correr el crawler.
+    """
+    result = {'registered': 0, 'existing': 0, 'errors': [], 'needs_crawler': False}
+    pending = {} # tabla -> {valores: (ubicación, llave)}
+    for key in keys:
+        partition = partition_from_key(key, bucket, tables)
+        if partition is not None:
+            table, values, location = partition
+            pending.setdefault(table, {}).setdefault(values, (location, key))
+
+    for table, partitions in pending.items():
+        descriptor = table_descriptor(glue_client, database, table)
+        if descriptor is None:
+            telemetry.warning("La tabla no existe en Glue. Se necesita el crawler.", database=database, table=table)
+            result['needs_crawler'] = True
+            continue
+
+        existing = existing_partitions(glue_client, database, table, list(partitions))
+        result['existing'] += len(existing)
+        missing = [(values, location, key) for values, (location, key) in partitions.items() if values not in existing]
+        if any(not schema_matches(descriptor, s3_client, bucket, key) for _, _, key in missing):
+            telemetry.warning("Las columnas del archivo no coinciden con la tabla. Se necesita el crawler.", table=table)
+            result['needs_crawler'] = True
+            continue
+
+        for start in range(0, len(missing), MAX_BATCH_CREATE):
+            batch = missing[start:start + MAX_BATCH_CREATE]
+            response = glue_client.batch_create_partition(
+                DatabaseName=database,
+                TableName=table,
+                PartitionInputList=[
+                    {'Values': list(values), 'StorageDescriptor': dict(descriptor, Location=location)}
+                    for values, location, _ in batch
+                ],
+            )
+            errors = response.get('Errors', [])
+            # Otra invocación pudo registrar la misma partición entre el get y el create
+            raced = [e for e in errors if e['ErrorDetail']['ErrorCode'] == 'AlreadyExistsException']
+            result['existing'] += len(raced)
+            result['registered'] += len(batch) - len(errors)
+            result['errors'].extend(e for e in errors if e not in raced)
+
+    if result['errors']:
+        result['needs_crawler'] = True
+    return result
+
+
+def clear_cache():
+    """Descarta los StorageDescriptor en memoria (útil en pruebas o tras correr el crawler)."""
+    _table_descriptors.clear()
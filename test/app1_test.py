@@ -1,12 +1,59 @@
+import json
 import pytest
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import patch, MagicMock
 from punto1 import app
 
+# Servidor HTTP local que simula las portadas con una latencia fija
+RESPONSE_DELAY = 0.3
+
+class SlowPageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(RESPONSE_DELAY)
+        if self.path.startswith("/grande-"):
+            # Página de N MB enviada por bloques, sin tenerla completa en memoria
+            size = int(self.path.split("-")[1]) * 1024 * 1024
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(size))
+            self.end_headers()
+            chunk = b"<p>titular</p>" * 4681 + b"xx" # 64 KB
+            for _ in range(size // len(chunk)):
+                self.wfile.write(chunk)
+            return
+        etag = f'"{self.path}"'
+        if self.path.startswith("/etag") and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = f"<html>{self.path}</html>".encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        if self.path.startswith("/etag"):
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def local_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowPageHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
 # Test 1: Verifica que se sube correctamente a S3
-@patch("punto1.app.boto3.client")
-def test_upload_to_s3_success(mock_boto_client):
+@patch("punto1.app.get_s3_client")
+def test_upload_to_s3_success(mock_get_s3_client):
     mock_s3 = MagicMock()
-    mock_boto_client.return_value = mock_s3
+    mock_get_s3_client.return_value = mock_s3
     mock_s3.put_object.return_value = {}
 
     result = app.upload_to_s3("contenido de prueba", "ruta/archivo.html")
@@ -15,17 +62,202 @@ def test_upload_to_s3_success(mock_boto_client):
     assert result == True
 
 # Test 2: Verifica que se descarga correctamente una página
-@patch("punto1.app.requests.get")
+@patch("punto1.app.get_http_session")
 @patch("punto1.app.upload_to_s3")
-def test_download_and_save_page_success(mock_upload, mock_requests_get):
+def test_download_and_save_page_success(mock_upload, mock_get_session):
     mock_response = MagicMock()
     mock_response.status_code = 200
     mock_response.text = "<html>Hola mundo</html>"
-    mock_requests_get.return_value = mock_response
+    mock_response.content = b"<html>Hola mundo</html>"
+    mock_get_session.return_value.get.return_value = mock_response
     mock_upload.return_value = True
 
     result = app.download_and_save_page("https://www.ejemplo.com", "sitio")
 
-    mock_requests_get.assert_called_once_with("https://www.ejemplo.com")
+    mock_get_session.return_value.get.assert_called_once_with("https://www.ejemplo.com", timeout=app.DEFAULT_TIMEOUT, headers={}, stream=False)
     mock_upload.assert_called_once()
     assert result == True
+
+# Test 3: El tiempo total se mantiene plano al aumentar el número de sitios
+@patch("punto1.app.upload_to_s3", return_value=True)
+def test_fetch_sites_runtime_stays_flat(mock_upload, local_server):
+    def run(n_sites):
+        sites = [{"name": f"sitio{i}", "url": f"{local_server}/{i}", "timeout": 5} for i in range(n_sites)]
+        start = time.perf_counter()
+        results = app.fetch_sites(sites, max_workers=16)
+        assert results == {site["name"]: True for site in sites}
+        return time.perf_counter() - start
+
+    single = run(1)
+    many = run(16)
+
+    # En serie serían 16 * RESPONSE_DELAY; en paralelo debe quedar cerca del sitio más lento
+    assert many < 16 * RESPONSE_DELAY / 3
+    assert many < single + 4 * RESPONSE_DELAY
+    assert mock_upload.call_count == 17
+
+# Test 4: Un sitio caído o lento no afecta el resultado de los demás
+@patch("punto1.app.upload_to_s3", return_value=True)
+def test_fetch_sites_reports_per_site(mock_upload, local_server):
+    sites = [
+        {"name": "bueno", "url": f"{local_server}/ok", "timeout": 5},
+        {"name": "lento", "url": f"{local_server}/lento", "timeout": RESPONSE_DELAY / 3},
+        {"name": "caido", "url": "http://127.0.0.1:1/", "timeout": 1},
+    ]
+
+    results = app.fetch_sites(sites)
+
+    assert results == {"bueno": True, "lento": False, "caido": False}
+
+# Test 5: El handler usa el registro de sitios y reporta el resultado de cada uno
+@patch("punto1.app.load_fetch_state", return_value={})
+@patch("punto1.app.fetch_sites", return_value={"eltiempo": True, "elespectador": False})
+def test_handler_reports_failures(mock_fetch, mock_load_state):
+    response = app.handler(None, None)
+
+    names = [site["name"] for site in mock_fetch.call_args[0][0]]
+    assert names == ["eltiempo", "elespectador"]
+    assert response["statusCode"] == 500
+    assert response["results"] == {"eltiempo": True, "elespectador": False}
+
+# Test 6: Con ETag guardado, la segunda descarga es un 304 y no se sube nada
+@patch("punto1.app.upload_to_s3", return_value=True)
+def test_conditional_get_skips_upload(mock_upload, local_server):
+    state = {}
+    url = f"{local_server}/etag-portada"
+
+    assert app.download_and_save_page(url, "sitio", state=state) is True
+    assert state["sitio"]["etag"] == '"/etag-portada"'
+    assert app.download_and_save_page(url, "sitio", state=state) is True
+
+    assert mock_upload.call_count == 1
+
+# Test 7: Sin validadores HTTP, el hash del contenido evita la subida repetida
+@patch("punto1.app.upload_to_s3", return_value=True)
+def test_same_content_hash_skips_upload(mock_upload, local_server):
+    state = {}
+    url = f"{local_server}/sin-etag"
+
+    app.download_and_save_page(url, "sitio", state=state)
+    app.download_and_save_page(url, "sitio", state=state)
+
+    assert "sha256" in state["sitio"]
+    assert mock_upload.call_count == 1
+
+# Test 8: El estado se puede guardar y cargar desde un archivo local
+def test_fetch_state_local_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "FETCH_STATE_PATH", str(tmp_path / "state.json"))
+
+    assert app.load_fetch_state() == {}
+    assert app.save_fetch_state({"sitio": {"etag": "abc", "sha256": "123"}}) is True
+    assert app.load_fetch_state() == {"sitio": {"etag": "abc", "sha256": "123"}}
+
+# Test 9: Con compresión gzip se sube el HTML comprimido con su Content-Encoding
+@patch("punto1.app.get_s3_client")
+def test_upload_to_s3_gzip(mock_get_s3_client):
+    import gzip
+    mock_s3 = MagicMock()
+    mock_get_s3_client.return_value = mock_s3
+    html = "<html>" + "titular " * 1000 + "</html>"
+
+    assert app.upload_to_s3(html, "headlines/raw/sitio.html", compression="gzip") is True
+
+    kwargs = mock_s3.put_object.call_args.kwargs
+    assert kwargs["ContentEncoding"] == "gzip"
+    assert kwargs["Metadata"]["uncompressed-size"] == str(len(html))
+    assert gzip.decompress(kwargs["Body"]).decode("utf-8") == html
+    assert len(kwargs["Body"]) < len(html) / 5
+
+# Test 10: En modo streaming la memoria pico no crece con el tamaño de la página
+@patch("punto1.app.get_s3_client")
+def test_stream_upload_bounded_memory(mock_get_s3_client, local_server, monkeypatch):
+    import hashlib
+    import tracemalloc
+    monkeypatch.setattr(app, "SPOOL_MAX_BYTES", 1024 * 1024)
+    uploaded = {}
+
+    def fake_upload_fileobj(fileobj, bucket, key, ExtraArgs=None, Config=None):
+        digest = hashlib.sha256()
+        size = 0
+        for chunk in iter(lambda: fileobj.read(256 * 1024), b""):
+            digest.update(chunk)
+            size += len(chunk)
+        uploaded[key] = (size, digest.hexdigest())
+
+    mock_get_s3_client.return_value.upload_fileobj.side_effect = fake_upload_fileobj
+
+    def peak_for(size_mb):
+        tracemalloc.start()
+        try:
+            assert app.download_and_save_page(f"{local_server}/grande-{size_mb}", f"sitio{size_mb}", stream=True) is True
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    small_peak = peak_for(4)
+    large_peak = peak_for(32)
+
+    sizes = sorted(size for size, _ in uploaded.values())
+    assert sizes == [4 * 1024 * 1024, 32 * 1024 * 1024]
+    assert large_peak < 4 * 1024 * 1024
+    assert large_peak < small_peak * 2
+
+# Test 11: El modo streaming también evita subir contenido repetido
+@patch("punto1.app.upload_fileobj_to_s3", return_value=True)
+def test_stream_upload_skips_same_hash(mock_upload, local_server):
+    state = {}
+    url = f"{local_server}/grande-1"
+
+    app.download_and_save_page(url, "sitio", state=state, stream=True)
+    app.download_and_save_page(url, "sitio", state=state, stream=True)
+
+    assert mock_upload.call_count == 1
+    assert "sha256" in state["sitio"]
+
+# Test 12: El Content-Type del HTML crudo declara el charset para que punto2 lea los bytes
+@patch("punto1.app.get_s3_client")
+def test_raw_content_type_declares_charset(mock_get_s3_client):
+    s3 = mock_get_s3_client.return_value
+
+    app.upload_to_s3("<html>Política</html>", "headlines/raw/sitio.html", compression="")
+    assert s3.put_object.call_args.kwargs["ContentType"] == "text/html; charset=utf-8"
+
+    fileobj = MagicMock()
+    app.upload_fileobj_to_s3(fileobj, "headlines/raw/sitio.html", charset="ISO-8859-1")
+    assert s3.upload_fileobj.call_args.kwargs["ExtraArgs"]["ContentType"] == "text/html; charset=ISO-8859-1"
+
+    response = MagicMock(headers={"Content-Type": 'text/html; charset="windows-1252"'})
+    assert app.response_charset(response) == "windows-1252"
+    assert app.response_charset(MagicMock(headers={"Content-Type": "text/html"})) is None
+
+# Test 13: Una entrada mal configurada en SCRAPER_SITES se descarta sin afectar a las demás
+def test_load_sites_drops_invalid_entries(monkeypatch):
+    monkeypatch.setenv("SCRAPER_SITES", json.dumps([
+        {"name": "bueno", "url": "https://bueno.co/"},
+        {"url": "https://sin-nombre.co/"},
+        None,
+        "eltiempo",
+        {"name": "sin-url"},
+        {"name": "bueno", "url": "https://repetido.co/"},
+        {"name": "apagado", "url": "https://apagado.co/", "enabled": False},
+    ]))
+
+    assert app.load_sites() == [{"name": "bueno", "url": "https://bueno.co/"}]
+
+    monkeypatch.setenv("SCRAPER_SITES", json.dumps({"name": "bueno", "url": "https://bueno.co/"}))
+    assert [site["name"] for site in app.load_sites()] == ["eltiempo", "elespectador"]
+
+# Test 14: El sha256 de la metadata (caché de punto2) y el del estado son el mismo aunque la página no sea UTF-8
+@patch("punto1.app.get_s3_client")
+@patch("punto1.app.get_http_session")
+def test_page_hash_is_shared_by_state_and_metadata(mock_get_session, mock_get_s3_client):
+    import hashlib
+    content = "<html>Política</html>".encode("latin-1")
+    mock_get_session.return_value.get.return_value = MagicMock(
+        status_code=200, content=content, text=content.decode("latin-1"), headers={})
+    state = {}
+
+    assert app.download_and_save_page("https://www.ejemplo.com", "sitio", state=state, stream=False) is True
+
+    metadata = mock_get_s3_client.return_value.put_object.call_args.kwargs["Metadata"]
+    assert metadata["sha256"] == state["sitio"]["sha256"] == hashlib.sha256(content).hexdigest()
@@ -4,7 +4,8 @@ from punto2.app import (
     extract_news_data,
     upload_to_s3,
     download_from_s3,
-    get_s3_client
+    get_s3_client,
+    handler
 )
 
 # Muestra de HTML para test de El Tiempo
@@ -58,9 +59,156 @@ def test_upload_to_s3(mock_get_s3_client):
 def test_download_from_s3(mock_get_s3_client):
     mock_s3 = MagicMock()
     mock_get_s3_client.return_value = mock_s3
-    mock_response = {'Body': MagicMock(read=lambda: b"contenido de prueba")}
+    mock_response = {'Body': MagicMock(read=lambda: b"contenido de prueba"), 'ContentType': 'text/html; charset=ISO-8859-1'}
     mock_s3.get_object.return_value = mock_response
     
     result = download_from_s3("parcial3luis", "headlines/raw/test.html")
-    assert result == "contenido de prueba"
+    assert result == (b"contenido de prueba", "ISO-8859-1")
     mock_s3.get_object.assert_called_once()
+
+@pytest.mark.parametrize("compression", ["gzip", "zstd"])
+@patch('punto2.app.get_s3_client')
+def test_download_from_s3_compressed(mock_get_s3_client, compression):
+    from io import BytesIO
+    from punto1.app import compress_content
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    html = "<html>Política y más titulares</html>" * 100
+    body, content_encoding = compress_content(html, compression)
+    mock_s3 = MagicMock()
+    mock_get_s3_client.return_value = mock_s3
+    mock_s3.get_object.return_value = {'Body': BytesIO(body), 'ContentEncoding': content_encoding}
+
+    result = download_from_s3("parcial3luis", "headlines/raw/test.html")
+    assert result == (html.encode('utf-8'), None)
+
+def s3_event(*keys):
+    return {"Records": [{"s3": {"bucket": {"name": "parcial3luis"}, "object": {"key": key}}} for key in keys]}
+
+@patch('punto2.app.upload_to_s3', return_value=True)
+@patch('punto2.app.download_from_s3')
+def test_handler_isolates_record_errors(mock_download, mock_upload):
+    def fake_download(bucket, key):
+        if "roto" in key:
+            raise RuntimeError("S3 caído")
+        return SAMPLE_HTML_EL_TIEMPO, None
+
+    mock_download.side_effect = fake_download
+    event = s3_event(
+        "headlines/raw/eltiempo-2025-01-01.html",
+        "headlines/raw/eltiempo-roto-2025-01-02.html",
+        "headlines/raw/desconocido-2025-01-01.html",
+        "headlines/final/otro.csv",
+    )
+
+    response = handler(event, None)
+
+    assert response["statusCode"] == 500
+    assert response["summary"] == {"ok": 1, "skipped": 2, "error": 1, "rows": 1}
+    assert [r["status"] for r in response["results"]] == ["ok", "error", "skipped", "skipped"]
+    assert response["results"][0]["output_keys"] == ["headlines/final/periodico=eltiempo/year=2025/month=01/day=01/eltiempo-headlines-2025-01-01.csv"]
+    mock_upload.assert_called_once()
+
+@patch('punto2.app.upload_to_s3', return_value=True)
+@patch('punto2.app.download_from_s3')
+def test_handler_overlaps_record_io(mock_download, mock_upload, monkeypatch):
+    import time
+    monkeypatch.setattr('punto2.app.RECORD_WORKERS', 8)
+
+    def slow_download(bucket, key):
+        time.sleep(0.2)
+        return SAMPLE_HTML_EL_TIEMPO, None
+
+    mock_download.side_effect = slow_download
+    event = s3_event(*[f"headlines/raw/eltiempo-2025-01-{day:02d}.html" for day in range(1, 9)])
+
+    start = time.perf_counter()
+    response = handler(event, None)
+    elapsed = time.perf_counter() - start
+
+    assert response["statusCode"] == 200
+    assert response["summary"]["ok"] == 8
+    assert elapsed < 8 * 0.2 / 2
+
+@patch('punto2.app.upload_to_s3', return_value=True)
+@patch('punto2.app.download_from_s3', return_value=(SAMPLE_HTML_EL_ESPECTADOR, None))
+def test_handler_process_pool_extraction(mock_download, mock_upload, monkeypatch):
+    from punto2 import app
+    # Espía sobre el pool real: la extracción tiene que pasar por él y no caer a los hilos
+    create_process_pool = app.create_process_pool
+    pools, submitted = [], []
+    def spy_pool(max_workers):
+        pool = create_process_pool(max_workers)
+        submit = pool.submit
+        pool.submit = lambda fn, *args: submitted.append(fn) or submit(fn, *args)
+        pools.append(pool)
+        return pool
+    monkeypatch.setattr('punto2.app.create_process_pool', spy_pool)
+    monkeypatch.setattr('punto2.app.EXTRACT_WORKERS', 2)
+    event = s3_event("headlines/raw/elespectador-2025-01-01.html", "headlines/raw/elespectador-2025-01-02.html")
+
+    response = handler(event, None)
+
+    assert response["summary"] == {"ok": 2, "skipped": 0, "error": 0, "rows": 2}
+    assert len(pools) == 1
+    assert submitted == [extract_news_data, extract_news_data]
+
+def test_process_pool_extracts_in_spawned_children():
+    import os
+    from punto2.app import create_process_pool
+    base_url = "https://www.elespectador.com"
+    pool = create_process_pool(1)
+    try:
+        assert pool.submit(os.getpid).result() != os.getpid()
+        rows = pool.submit(extract_news_data, SAMPLE_HTML_EL_ESPECTADOR, base_url, "elespectador").result()
+    finally:
+        pool.shutdown()
+
+    assert pool._mp_context.get_start_method() == "spawn"
+    assert rows == extract_news_data(SAMPLE_HTML_EL_ESPECTADOR, base_url, "elespectador")
+
+def test_rows_to_parquet_round_trip():
+    pq = pytest.importorskip("pyarrow.parquet")
+    import io
+    from punto2.app import rows_to_parquet
+    rows = [
+        {"category": "Política", "title": "Título con > delimitador", "link": "https://www.eltiempo.com/a"},
+        {"category": "Política", "title": "Otro", "link": "https://www.eltiempo.com/b"},
+    ]
+
+    table = pq.read_table(io.BytesIO(rows_to_parquet(rows)))
+
+    assert table.to_pylist() == rows
+    assert str(table.schema.field("category").type) == "dictionary<values=string, indices=int32, ordered=0>"
+
+@patch('punto2.app.upload_to_s3', return_value=True)
+@patch('punto2.app.download_from_s3', return_value=(SAMPLE_HTML_EL_TIEMPO, None))
+def test_handler_writes_csv_and_parquet(mock_download, mock_upload, monkeypatch):
+    pytest.importorskip("pyarrow")
+    monkeypatch.setattr('punto2.app.OUTPUT_FORMATS', ['csv', 'parquet'])
+
+    response = handler(s3_event("headlines/raw/eltiempo-2025-01-01.html"), None)
+
+    assert response["results"][0]["output_keys"] == [
+        "headlines/final/periodico=eltiempo/year=2025/month=01/day=01/eltiempo-headlines-2025-01-01.csv",
+        "headlines/parquet/periodico=eltiempo/year=2025/month=01/day=01/eltiempo-headlines-2025-01-01.parquet",
+    ]
+    assert mock_upload.call_args_list[1].args[0][:4] == b"PAR1"
+
+@patch('punto2.app.upload_to_s3', return_value=True)
+@patch('punto2.app.download_from_s3')
+def test_handler_reads_local_raw_store(mock_download, mock_upload, tmp_path, monkeypatch):
+    raw_dir = tmp_path / "headlines" / "raw"
+    raw_dir.mkdir(parents=True)
+    html = SAMPLE_HTML_EL_TIEMPO.replace("<html>", '<html><head><meta charset="iso-8859-1"></head>', 1) \
+        .replace("Noticia de prueba", "Noticia de prueba en Bogotá")
+    (raw_dir / "eltiempo-2025-01-01.html").write_bytes(html.encode("iso-8859-1"))
+    (raw_dir / "eltiempo-2025-01-02.html").write_bytes(b"")
+    monkeypatch.setattr('punto2.app.RAW_STORE_PATH', str(tmp_path))
+
+    response = handler(s3_event("headlines/raw/eltiempo-2025-01-01.html", "headlines/raw/eltiempo-2025-01-02.html",
+                                "headlines/raw/eltiempo-2025-01-03.html"), None)
+
+    assert [r["status"] for r in response["results"]] == ["ok", "skipped", "error"]
+    mock_download.assert_not_called()
+    assert "Bogotá" in mock_upload.call_args.args[0].decode("utf-8")
@@ -1,52 +1,59 @@
+import json
 import pytest
 from unittest.mock import patch, MagicMock
 from botocore.exceptions import ClientError
+from common import telemetry
 from punto3.app import handler 
 
 CRAWLER_NAME = 'parcial3'
 
-@patch('punto3.app.boto3.client')
-def test_handler_success(mock_boto_client, capsys):
+@pytest.fixture(autouse=True)
+def json_logs(monkeypatch):
+    monkeypatch.setattr(telemetry, "LOG_FORMAT", "json")
+
+def logged(capsys):
+    """Mensaje y crawler de cada línea escrita (los documentos EMF no traen mensaje)."""
+    entries = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line]
+    return [(entry.get("message"), entry.get("crawler")) for entry in entries]
+
+@patch('punto3.app.get_glue_client')
+def test_handler_success(mock_get_glue_client, capsys):
     mock_glue = MagicMock()
-    mock_boto_client.return_value = mock_glue
+    mock_get_glue_client.return_value = mock_glue
     
     handler(CRAWLER_NAME)
     
     mock_glue.start_crawler.assert_called_once_with(Name=CRAWLER_NAME)
     
-    captured = capsys.readouterr()
-    assert f"Crawler '{CRAWLER_NAME}' iniciado exitosamente." in captured.out
+    assert ("Crawler iniciado", CRAWLER_NAME) in logged(capsys)
 
-@patch('punto3.app.boto3.client')
-def test_handler_crawler_running_exception(mock_boto_client, capsys):
+@patch('punto3.app.get_glue_client')
+def test_handler_crawler_running_exception(mock_get_glue_client, capsys):
     mock_glue = MagicMock()
     error_response = {'Error': {'Code': 'CrawlerRunningException'}}
     mock_glue.start_crawler.side_effect = ClientError(error_response, 'StartCrawler')
-    mock_boto_client.return_value = mock_glue
+    mock_get_glue_client.return_value = mock_glue
     handler(CRAWLER_NAME)
     
-    captured = capsys.readouterr()
-    assert f"El crawler '{CRAWLER_NAME}' ya está en ejecución." in captured.out
+    assert ("El crawler ya está en ejecución", CRAWLER_NAME) in logged(capsys)
 
-@patch('punto3.app.boto3.client')
-def test_handler_other_client_error(mock_boto_client, capsys):
+@patch('punto3.app.get_glue_client')
+def test_handler_other_client_error(mock_get_glue_client, capsys):
     mock_glue = MagicMock()
     error_response = {'Error': {'Code': 'SomeOtherError'}}
     mock_glue.start_crawler.side_effect = ClientError(error_response, 'StartCrawler')
-    mock_boto_client.return_value = mock_glue
+    mock_get_glue_client.return_value = mock_glue
     
     handler(CRAWLER_NAME)
     
-    captured = capsys.readouterr()
-    assert "Error al ejecutar el crawler:" in captured.out
+    assert ("Error al ejecutar el crawler", CRAWLER_NAME) in logged(capsys)
 
-@patch('punto3.app.boto3.client')
-def test_handler_unexpected_exception(mock_boto_client, capsys):
+@patch('punto3.app.get_glue_client')
+def test_handler_unexpected_exception(mock_get_glue_client, capsys):
     mock_glue = MagicMock()
     mock_glue.start_crawler.side_effect = Exception("Error inesperado")
-    mock_boto_client.return_value = mock_glue
+    mock_get_glue_client.return_value = mock_glue
     
     handler(CRAWLER_NAME)
     
-    captured = capsys.readouterr()
-    assert "Error inesperado:" in captured.out
+    assert ("Error inesperado al ejecutar el crawler", CRAWLER_NAME) in logged(capsys)
@@ -0,0 +1,184 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from punto1 import articles
+
+# Servidor local que simula las páginas de las noticias con una latencia fija
+RESPONSE_DELAY = 0.1
+FINAL_KEY = "headlines/final/periodico=eltiempo/year=2025/month=01/day=31/eltiempo-headlines-2025-01-31.csv"
+
+class ArticleHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((time.perf_counter(), self.path))
+            attempts = server.attempts[self.path] = server.attempts.get(self.path, 0) + 1
+        time.sleep(RESPONSE_DELAY)
+        etag = f'"{self.path}"'
+        if self.path == "/caido":
+            return self.reply(404)
+        if self.path.startswith("/inestable") and attempts <= 2:
+            return self.reply(503, headers={"Retry-After": "0"})
+        if self.path == "/cortado" and attempts == 1: # Anuncia más bytes de los que envía
+            self.send_response(200)
+            self.send_header("Content-Length", "1000")
+            self.end_headers()
+            self.wfile.write(b"<html>")
+            self.close_connection = True
+            return
+        if self.headers.get("If-None-Match") == etag:
+            return self.reply(304)
+        self.reply(200, f"<html><body>Cuerpo de {self.path}</body></html>".encode("utf-8"),
+                   {"ETag": etag, "Content-Type": "text/html; charset=utf-8"})
+
+    def reply(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def article_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ArticleHandler)
+    server.lock, server.requests, server.attempts = threading.Lock(), [], {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def write_final(s3, links):
+    rows = "".join(f"Política>Titular {i}>{link}\n" for i, link in enumerate(links))
+    s3.put_object(Bucket="parcial3luis", Key=FINAL_KEY, Body=f"category>title>link\n{rows}".encode("utf-8"))
+
+FAST = {"host_rate": 1000, "host_burst": 1000, "backoff_base": 0.01}
+
+def test_token_bucket_limits_rate():
+    async def take(n):
+        bucket = articles.TokenBucket(rate=20, burst=5)
+        start = time.perf_counter()
+        for _ in range(n):
+            await bucket.acquire()
+        return time.perf_counter() - start
+
+    assert asyncio.run(take(5)) < 0.05
+    assert asyncio.run(take(15)) >= 0.45 # 10 tokens más a 20 por segundo
+
+def test_interleave_by_host():
+    links = [("a", "https://a.com/1"), ("a", "https://a.com/2"), ("b", "https://b.com/1")]
+
+    assert articles.interleave_by_host(links) == [links[0], links[2], links[1]]
+
+def test_backoff_respects_retry_after():
+    assert 0 <= articles.backoff_delay(3, base=0.5) <= 2
+    assert articles.backoff_delay(1, base=0.5, retry_after=4) == 4
+    assert articles.retry_after_seconds("7") == 7 and articles.retry_after_seconds("x") is None
+
+def test_concurrent_crawl_with_retries_and_conditional_requests(s3_bucket, article_server):
+    links = [f"{article_server.url}/articulo-{i}" for i in range(30)]
+    write_final(s3_bucket, links + [links[0], "/relativo", f"{article_server.url}/inestable", f"{article_server.url}/caido"])
+
+    summary, results = articles.run("parcial3luis", [FINAL_KEY], concurrency=16, **FAST)
+
+    assert (summary["ok"], summary["unchanged"], summary["error"]) == (31, 0, 1)
+    # En serie serían 32 * RESPONSE_DELAY (más un head_object por enlace para leer su estado)
+    assert summary["seconds"] < 32 * RESPONSE_DELAY / 2
+    by_link = {r["link"]: r for r in results}
+    assert by_link[f"{article_server.url}/inestable"]["attempts"] == 3
+    assert by_link[f"{article_server.url}/caido"]["attempts"] == 1 # Un 404 no se reintenta
+    body = s3_bucket.get_object(Bucket="parcial3luis", Key=articles.article_key("eltiempo", links[3]))
+    assert body["Body"].read() == b"<html><body>Cuerpo de /articulo-3</body></html>"
+    assert body["ContentType"] == "text/html; charset=utf-8"
+    assert body["Metadata"]["source-etag"] == '"/articulo-3"' and body["Metadata"]["link"] == links[3]
+    assert "Contents" not in s3_bucket.list_objects_v2(Bucket="parcial3luis", Prefix="headlines/state/")
+
+    summary, _ = articles.run("parcial3luis", [FINAL_KEY], concurrency=16, **FAST)
+
+    assert (summary["ok"], summary["unchanged"], summary["error"]) == (0, 31, 1)
+
+def test_host_rate_limit_is_respected(s3_bucket, article_server):
+    write_final(s3_bucket, [f"{article_server.url}/articulo-{i}" for i in range(12)])
+
+    summary, _ = articles.run("parcial3luis", [FINAL_KEY], concurrency=12, host_rate=10, host_burst=2)
+
+    times = sorted(t for t, _ in article_server.requests)
+    assert summary["ok"] == 12
+    assert times[-1] - times[0] >= (12 - 2) / 10 * 0.9
+    assert max(sum(1 for t in times if start <= t < start + 0.5) for start in times) <= 2 + 6
+
+def test_handler_reads_s3_event(s3_bucket, article_server):
+    write_final(s3_bucket, [f"{article_server.url}/articulo-1"])
+    event = {"Records": [{"s3": {"bucket": {"name": "parcial3luis"}, "object": {"key": FINAL_KEY.replace("=", "%3D")}}}]}
+
+    response = articles.handler(event, None)
+
+    assert response["statusCode"] == 200 and response["summary"]["ok"] == 1
+
+def test_progress_survives_an_interrupted_crawl(s3_bucket, article_server):
+    links = [("eltiempo", f"{article_server.url}/articulo-{i}") for i in range(20)]
+
+    async def interrupted():
+        try:
+            await asyncio.wait_for(articles.crawl_articles(links, "parcial3luis", concurrency=2, **FAST), 0.5)
+        except asyncio.TimeoutError:
+            pass
+
+    asyncio.run(interrupted())
+    time.sleep(0.2) # Deja terminar las subidas que ya estaban en curso en sus hilos
+    stored = len(s3_bucket.list_objects_v2(Bucket="parcial3luis", Prefix=articles.ARTICLES_PREFIX).get("Contents", []))
+    results = asyncio.run(articles.crawl_articles(links, "parcial3luis", concurrency=8, **FAST))
+
+    assert 0 < stored < 20
+    assert sum(r["status"] == "unchanged" for r in results) == stored
+    assert sum(r["status"] == "ok" for r in results) == 20 - stored
+
+def test_concurrent_runs_keep_each_others_state(s3_bucket, article_server):
+    first = [("eltiempo", f"{article_server.url}/articulo-{i}") for i in range(10)]
+    second = [("eltiempo", f"{article_server.url}/articulo-{i}") for i in range(10, 20)]
+
+    async def both():
+        return await asyncio.gather(articles.crawl_articles(first, "parcial3luis", **FAST),
+                                    articles.crawl_articles(second, "parcial3luis", **FAST))
+
+    asyncio.run(both())
+    results = asyncio.run(articles.crawl_articles(first + second, "parcial3luis", **FAST))
+
+    assert [r["status"] for r in results] == ["unchanged"] * 20
+
+def test_articles_go_to_the_event_bucket(s3_bucket, article_server):
+    s3_bucket.create_bucket(Bucket="otro-bucket-parcial", CreateBucketConfiguration={"LocationConstraint": "sa-east-1"})
+    link = f"{article_server.url}/articulo-1"
+    s3_bucket.put_object(Bucket="otro-bucket-parcial", Key=FINAL_KEY, Body=f"category>title>link\nX>T>{link}\n".encode("utf-8"))
+
+    summary, _ = articles.run("otro-bucket-parcial", [FINAL_KEY], **FAST)
+
+    assert summary["ok"] == 1
+    s3_bucket.head_object(Bucket="otro-bucket-parcial", Key=articles.article_key("eltiempo", link))
+    assert "Contents" not in s3_bucket.list_objects_v2(Bucket="parcial3luis", Prefix=articles.ARTICLES_PREFIX)
+
+def test_cut_body_closes_its_spool_before_retrying(s3_bucket, article_server, monkeypatch):
+    from punto1 import app
+    spools = []
+    open_spool = app.open_spool
+    def tracked_spool(compression):
+        spool, writer, content_encoding = open_spool(compression)
+        spools.append(spool)
+        return spool, writer, content_encoding
+    monkeypatch.setattr(app, "open_spool", tracked_spool)
+    write_final(s3_bucket, [f"{article_server.url}/cortado"])
+
+    summary, results = articles.run("parcial3luis", [FINAL_KEY], **FAST)
+
+    assert summary["ok"] == 1 and results[0]["attempts"] == 2
+    assert len(spools) == 2 and all(spool.closed for spool in spools)
@@ -0,0 +1,72 @@
+import json
+import pytest
+from datetime import date
+from unittest.mock import patch
+from punto2 import app, backfill
+
+PAGES = {
+    "eltiempo": '<article data-category="Política"><a class="c-articulo__titulo__txt" href="/n-{day}">Titular {day}</a></article>',
+    "elespectador": '<div class="CardLayout-Container"><h2 class="Card-Title"><a href="/e-{day}">Espectador {day}</a></h2></div>',
+}
+
+@pytest.fixture
+def raw_snapshots(s3_bucket):
+    for periodico, html in PAGES.items():
+        for day in range(1, 11):
+            key = f"headlines/raw/{periodico}-2025-01-{day:02d}.html"
+            s3_bucket.put_object(Bucket="parcial3luis", Key=key, Body=html.format(day=day).encode("utf-8"))
+    s3_bucket.put_object(Bucket="parcial3luis", Key="headlines/raw/notas.txt", Body=b"x")
+    return s3_bucket
+
+def final_keys(s3, periodico):
+    response = s3.list_objects_v2(Bucket="parcial3luis", Prefix=f"headlines/final/periodico={periodico}/")
+    return sorted(obj["Key"] for obj in response.get("Contents", []))
+
+def test_parse_raw_key():
+    assert backfill.parse_raw_key("headlines/raw/eltiempo-2025-01-31.html") == ("eltiempo", date(2025, 1, 31))
+    assert backfill.parse_raw_key("headlines/raw/eltiempo-2025-02-31.html") is None
+    assert backfill.parse_raw_key("headlines/raw/notas.txt") is None
+
+def test_backfill_filters_and_paginates(raw_snapshots, tmp_path, monkeypatch):
+    original_paginator = raw_snapshots.get_paginator
+
+    def small_pages(name):
+        paginator = original_paginator(name)
+        paginate = paginator.paginate
+        paginator.paginate = lambda **kwargs: paginate(PaginationConfig={"PageSize": 3}, **kwargs)
+        return paginator
+
+    monkeypatch.setattr(raw_snapshots, "get_paginator", small_pages)
+    response = backfill.run_backfill(newspapers=["eltiempo"], since=date(2025, 1, 3), until=date(2025, 1, 7),
+                                     workers=4, manifest_path=str(tmp_path / "manifest.json"))
+
+    assert response["summary"] == {"ok": 5, "skipped": 0, "error": 0, "rows": 5}
+    assert len(final_keys(raw_snapshots, "eltiempo")) == 5
+    assert final_keys(raw_snapshots, "elespectador") == []
+
+def test_backfill_resumes_from_manifest(raw_snapshots, tmp_path):
+    manifest_path = str(tmp_path / "manifest.json")
+    original = app.process_record
+    crashed = lambda record, extract: (
+        app.record_result(record["s3"]["object"]["key"], "error", error="caída simulada")
+        if record["s3"]["object"]["key"].endswith(("08.html", "09.html", "10.html")) else original(record, extract)
+    )
+
+    with patch("punto2.app.process_record", side_effect=crashed):
+        first = backfill.run_backfill(workers=4, manifest_path=manifest_path)
+    assert first["summary"]["error"] == 6
+    assert len(json.load(open(manifest_path))["completed"]) == 14
+
+    with patch("punto2.app.process_record", side_effect=original) as second_run:
+        second = backfill.run_backfill(workers=4, manifest_path=manifest_path)
+
+    assert second_run.call_count == 6
+    assert second["summary"] == {"ok": 6, "skipped": 0, "error": 0, "rows": 6}
+    manifest = json.load(open(manifest_path))
+    assert len(manifest["completed"]) == 20 and manifest["errors"] == {}
+
+def test_main_returns_exit_code(raw_snapshots, tmp_path):
+    code = backfill.main(["--newspaper", "elespectador", "--since", "2025-01-10", "--manifest", str(tmp_path / "m.json")])
+
+    assert code == 0
+    assert len(final_keys(raw_snapshots, "elespectador")) == 1
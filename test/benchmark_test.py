@@ -0,0 +1,38 @@
+import os
+import pytest
+from benchmarks import extraction
+
+# Portadas pequeñas por defecto para que la suite siga siendo rápida; BENCHMARK_SIZE_MB permite
+# correr los mismos escenarios con portadas reales de 2-5 MB si tienen línea base guardada.
+SIZE_MB = float(os.environ.get("BENCHMARK_SIZE_MB", "0.25"))
+SCENARIOS = extraction.scenarios(sizes_mb=(SIZE_MB,))
+# La comparación contra la línea base depende de la máquina: solo corre con BENCHMARK_BASELINE=1
+# (como COLD_START_BUDGETS en test/cold_start_test.py). test_compare_flags_regressions corre siempre.
+CHECK_BASELINE = os.environ.get("BENCHMARK_BASELINE", "").lower() in ("1", "true", "yes")
+
+@pytest.fixture(scope="module")
+def calibration():
+    return extraction.calibrate()
+
+@pytest.mark.skipif(not CHECK_BASELINE, reason="Comparación con la línea base desactivada; activar con BENCHMARK_BASELINE=1")
+@pytest.mark.parametrize("name,site,size_mb,nesting", SCENARIOS, ids=[s[0] for s in SCENARIOS])
+def test_extraction_within_baseline(name, site, size_mb, nesting, calibration):
+    baseline = extraction.load_baseline()
+    if name not in baseline:
+        pytest.skip(f"Sin línea base para {name}; correr python -m benchmarks.extraction --update-baseline")
+
+    result = extraction.measure(site, size_mb, nesting)
+    result["parse_norm"] = result["parse_s"] / calibration
+    result["total_norm"] = result["total_s"] / calibration
+
+    assert result["rows"] > 0
+    assert extraction.compare(name, result, baseline) == []
+
+def test_compare_flags_regressions():
+    baseline = {"x": {"rows": 10, "parse_norm": 1.0, "total_norm": 2.0, "peak_mb": 4.0}}
+    result = {"rows": 9, "parse_norm": 1.1, "total_norm": 5.0, "peak_mb": 7.0}
+
+    problems = extraction.compare("x", result, baseline, time_tolerance=2.0, memory_tolerance=1.5)
+
+    assert len(problems) == 3
+    assert "filas" in problems[0] and "total_norm" in problems[1] and "pico" in problems[2]
@@ -0,0 +1,30 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from common import clients
+
+@pytest.fixture(autouse=True)
+def clean_clients():
+    clients.reset_clients()
+    yield
+    clients.reset_clients()
+
+@patch("boto3.client")
+def test_get_client_is_cached_per_region(mock_boto_client):
+    mock_boto_client.side_effect = lambda *args, **kwargs: MagicMock()
+
+    s3_a = clients.get_client("s3", region_name="sa-east-1")
+    s3_b = clients.get_client("s3", region_name="sa-east-1")
+    s3_other = clients.get_client("s3", region_name="us-east-1")
+
+    assert s3_a is s3_b
+    assert s3_a is not s3_other
+    assert mock_boto_client.call_count == 2
+    config = mock_boto_client.call_args.kwargs["config"]
+    assert config.max_pool_connections == clients.MAX_POOL_CONNECTIONS
+    assert config.retries["max_attempts"] == clients.MAX_RETRY_ATTEMPTS
+
+def test_http_session_is_shared():
+    session = clients.get_http_session(pool_size=4)
+
+    assert clients.get_http_session() is session
+    assert session.get_adapter("https://www.eltiempo.com/")._pool_maxsize == 4
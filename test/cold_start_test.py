@@ -0,0 +1,24 @@
+import os
+import pytest
+from benchmarks import cold_start
+
+# Los tiempos dependen de la carga de la máquina: los presupuestos solo se verifican con
+# COLD_START_BUDGETS=1. Los módulos cargados al importar sí se revisan siempre.
+CHECK_BUDGETS = os.environ.get("COLD_START_BUDGETS", "").lower() in ("1", "true", "yes")
+
+@pytest.fixture(scope="module")
+def cold_starts():
+    return cold_start.measure(repetitions=2)
+
+@pytest.mark.parametrize("name", sorted(cold_start.HANDLERS))
+def test_import_does_not_load_heavy_dependencies(cold_starts, name):
+    assert cold_starts[name]["heavy_modules_after_import"] == []
+    assert cold_starts[name]["status"] == 200
+
+@pytest.mark.skipif(not CHECK_BUDGETS, reason="Presupuestos de tiempo desactivados; activar con COLD_START_BUDGETS=1")
+@pytest.mark.parametrize("name", sorted(cold_start.HANDLERS))
+def test_cold_start_within_budget(cold_starts, name):
+    result, budget = cold_starts[name], cold_start.BUDGETS_MS[name]
+
+    assert result["import_ms"] < budget["import"], result["top_imports"]
+    assert result["first_invocation_ms"] < budget["first_invocation"]
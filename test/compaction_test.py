@@ -0,0 +1,92 @@
+import json
+
+import pytest
+from unittest.mock import patch
+from punto2.app import write_partition_files
+from punto3 import app, compaction, partitions
+from .helpers import TABLE_INPUT
+
+def rows(*slugs):
+    return [{'category': 'Política', 'title': f"Titular {slug}", 'link': f"https://www.eltiempo.com/{slug}"} for slug in slugs]
+
+@pytest.fixture
+def daily_files(s3_bucket):
+    pytest.importorskip("pyparsing") # Requerido por el mock de Glue de moto
+    partitions.clear_cache()
+    glue = app.get_glue_client()
+    glue.create_database(DatabaseInput={'Name': app.GLUE_DATABASE})
+    glue.create_table(DatabaseName=app.GLUE_DATABASE, TableInput=TABLE_INPUT)
+    keys = (write_partition_files(rows('a', 'b'), 'eltiempo', '2025', '01', '02')
+            + write_partition_files(rows('b', 'c'), 'eltiempo', '2025', '01', '01')
+            + write_partition_files(rows('d'), 'eltiempo', '2025', '01', '01', part='120000-abcd')
+            + write_partition_files(rows('x'), 'eltiempo', '2025', '02', '01')
+            + write_partition_files(rows('e'), 'elespectador', '2025', '01', '05'))
+    partitions.register_partitions(glue, s3_bucket, app.GLUE_DATABASE, 'parcial3luis', keys, app.PARTITION_TABLES)
+    yield s3_bucket, glue
+    partitions.clear_cache()
+
+def monthly_rows(s3, periodico="eltiempo", month="01"):
+    body = s3.get_object(Bucket="parcial3luis", Key=compaction.monthly_key(periodico, "2025", month))["Body"].read()
+    return compaction.read_monthly_rows(body, "csv")
+
+def glue_partitions(glue, table):
+    response = glue.get_partitions(DatabaseName=app.GLUE_DATABASE, TableName=table)
+    return sorted(tuple(p["Values"]) for p in response["Partitions"])
+
+def test_compacts_months_with_dedupe_and_registers_them(daily_files):
+    s3, glue = daily_files
+
+    response = compaction.run_compaction(until="2025-01", workers=4)
+
+    assert response["summary"] == {"ok": 2, "skipped": 0, "error": 0, "rows": 5, "duplicates": 1, "files": 4}
+    assert [(row["link"][-1], row["day"]) for row in monthly_rows(s3)] == [("b", "01"), ("c", "01"), ("d", "01"), ("a", "02")]
+    assert glue_partitions(glue, "monthly") == [("elespectador", "2025", "01"), ("eltiempo", "2025", "01")]
+    table = glue.get_table(DatabaseName=app.GLUE_DATABASE, Name="monthly")["Table"]
+    assert [column["Name"] for column in table["StorageDescriptor"]["Columns"]] == compaction.COLUMNS
+    assert len(glue_partitions(glue, "final")) == 4 # Sin --drop-daily los diarios quedan
+
+    again = compaction.run_compaction(until="2025-01")
+    assert (again["summary"]["ok"], again["summary"]["skipped"]) == (0, 2)
+
+def test_drop_daily_is_restartable(daily_files):
+    s3, glue = daily_files
+    original_delete = s3.delete_objects
+    # Se cae después de borrar solo el primer diario de eltiempo
+    crash = lambda Bucket, Delete: (original_delete(Bucket=Bucket, Delete={"Objects": Delete["Objects"][:1]}),
+                                    (_ for _ in ()).throw(RuntimeError("caída simulada")))
+    with patch.object(s3, "delete_objects", side_effect=crash):
+        first = compaction.run_compaction(newspapers=["eltiempo"], since="2025-01", until="2025-01", drop_daily=True)
+    assert first["summary"]["error"] == 1
+
+    second = compaction.run_compaction(newspapers=["eltiempo"], since="2025-01", until="2025-01", drop_daily=True)
+
+    assert second["summary"]["ok"] == 1
+    assert sorted(row["link"][-1] for row in monthly_rows(s3)) == ["a", "b", "c", "d"]
+    assert compaction.list_daily_files(s3, "parcial3luis", ["eltiempo"], until="2025-01") == {}
+    assert glue_partitions(glue, "final") == [("elespectador", "2025", "01", "05"), ("eltiempo", "2025", "02", "01")]
+    state = json.loads(s3.get_object(Bucket="parcial3luis", Key=compaction.state_key("eltiempo", "2025", "01"))["Body"].read())
+    assert state["dropped"] is True
+
+    # Un diario que llega tarde se agrega al mes ya compactado
+    write_partition_files(rows('a', 'z'), 'eltiempo', '2025', '01', '31')
+    compaction.run_compaction(newspapers=["eltiempo"], until="2025-01")
+    assert [row["link"][-1] for row in monthly_rows(s3)][-1] == "z"
+    assert len(monthly_rows(s3)) == 5
+
+def test_parquet_output(daily_files):
+    pq = pytest.importorskip("pyarrow.parquet")
+    s3, glue = daily_files
+
+    compaction.run_compaction(newspapers=["elespectador"], until="2025-01", output_format="parquet")
+
+    body = s3.get_object(Bucket="parcial3luis", Key=compaction.monthly_key("elespectador", "2025", "01", "parquet"))["Body"].read()
+    assert compaction.read_monthly_rows(body, "parquet") == [dict(rows('e')[0], day="05")]
+    assert glue_partitions(glue, "monthly_parquet") == [("elespectador", "2025", "01")]
+
+def test_last_closed_month_and_main(daily_files):
+    from datetime import date
+
+    assert compaction.last_closed_month(date(2025, 3, 15)) == "2025-02"
+    assert compaction.last_closed_month(date(2025, 1, 1)) == "2024-12"
+    assert compaction.main(["--since", "2025-02", "--until", "2025-02"]) == 0
+    assert monthly_rows(daily_files[0], month="02")[0]["link"].endswith("x")
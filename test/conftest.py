@@ -0,0 +1,18 @@
+import pytest
+from common import clients
+
+BUCKET_REGION = "sa-east-1"
+
+@pytest.fixture
+def s3_bucket(monkeypatch):
+    """S3 simulado con moto y el bucket del proyecto ya creado. Retorna el cliente S3."""
+    moto = pytest.importorskip("moto")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", BUCKET_REGION)
+    with moto.mock_aws():
+        clients.reset_clients()
+        s3 = clients.get_client("s3", region_name=BUCKET_REGION)
+        s3.create_bucket(Bucket="parcial3luis", CreateBucketConfiguration={"LocationConstraint": BUCKET_REGION})
+        yield s3
+        clients.reset_clients()
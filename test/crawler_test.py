@@ -0,0 +1,88 @@
+import json
+import pytest
+from botocore.exceptions import ClientError
+from punto3 import crawler
+
+BUCKET = "parcial3luis"
+NAME = "parcial3"
+
+class FakeGlue:
+    """Crawler simulado: corre hasta que el reloj de la prueba llega a `finishes_at`."""
+    def __init__(self, clock, state="READY", finishes_at=None):
+        self.clock, self.state, self.finishes_at, self.starts = clock, state, finishes_at, 0
+
+    def get_crawler(self, Name):
+        if self.state == "RUNNING" and self.finishes_at is not None and self.clock.now >= self.finishes_at:
+            self.state = "READY"
+        return {'Crawler': {'Name': Name, 'State': self.state}}
+
+    def start_crawler(self, Name):
+        if self.get_crawler(Name)['Crawler']['State'] != "READY":
+            raise ClientError({'Error': {'Code': 'CrawlerRunningException'}}, 'StartCrawler')
+        self.state, self.finishes_at, self.starts = "RUNNING", None, self.starts + 1
+
+class FakeClock:
+    def __init__(self):
+        self.now, self.sleeps, self.on_sleep = 0.0, [], None
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+        if self.on_sleep:
+            self.on_sleep()
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+def request(glue, s3, clock, budget=600):
+    return crawler.request_crawl(glue, s3, BUCKET, NAME, budget, sleep=clock.sleep, clock=clock)
+
+def marker(s3):
+    return crawler.read_marker(s3, BUCKET, crawler.pending_key(NAME))[0]
+
+def test_ready_crawler_starts_immediately(s3_bucket, clock):
+    glue = FakeGlue(clock)
+
+    assert request(glue, s3_bucket, clock) == "started"
+    assert glue.starts == 1 and marker(s3_bucket) is None
+
+def test_burst_during_crawl_costs_one_follow_up(s3_bucket, clock):
+    glue = FakeGlue(clock, state="RUNNING", finishes_at=100)
+    burst = []
+    # Mientras la primera invocación espera llegan cuatro disparos más
+    clock.on_sleep = lambda: burst.append(request(glue, s3_bucket, clock)) if len(burst) < 4 else None
+
+    assert request(glue, s3_bucket, clock) == "follow_up_started"
+    assert burst == ["coalesced"] * 4
+    assert glue.starts == 1 # La ejecución en curso más una de seguimiento
+    assert marker(s3_bucket) is None
+    assert clock.sleeps == [5, 10, 20, 40, 60]
+
+def test_budget_exhausted_leaves_marker_for_next_trigger(s3_bucket, clock):
+    glue = FakeGlue(clock, state="RUNNING", finishes_at=1000)
+
+    assert request(glue, s3_bucket, clock, budget=30) == "pending"
+    assert glue.starts == 0 and marker(s3_bucket) is not None
+
+    clock.now = 1000
+    assert request(glue, s3_bucket, clock) == "started"
+    assert glue.starts == 1 and marker(s3_bucket) is None
+
+def test_expired_marker_is_taken_over(s3_bucket, clock):
+    s3_bucket.put_object(Bucket=BUCKET, Key=crawler.pending_key(NAME), Body=json.dumps({'poll_until': 0}))
+    glue = FakeGlue(clock, state="RUNNING", finishes_at=20)
+
+    assert request(glue, s3_bucket, clock) == "follow_up_started"
+    assert glue.starts == 1
+
+def test_follow_up_started_elsewhere_is_not_repeated(s3_bucket, clock):
+    glue = FakeGlue(clock, state="RUNNING", finishes_at=10)
+    # Otro disparo ve el crawler libre, borra la marca e inicia la ejecución él mismo
+    clock.on_sleep = lambda: request(glue, s3_bucket, clock) if glue.starts == 0 and clock.now >= 10 else None
+
+    assert request(glue, s3_bucket, clock) == "coalesced"
+    assert glue.starts == 1
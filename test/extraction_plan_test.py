@@ -0,0 +1,53 @@
+import pytest
+from bs4 import BeautifulSoup
+from benchmarks.synthetic import generate_front_page
+from punto2.app import ELESPECTADOR_CARD_SELECTORS, extract_news_data
+from punto2.extraction_plan import compile_selectors, match_selectors
+from punto2.parsers import available_backends, parse_html
+
+GRID_HTML = """
+<div class="section-body"><div class="row"><div class="col-md-4"><h3><a href="/grid">Grid</a></h3></div></div></div>
+<div class="row"><div class="col-md-4"><h3><a href="/fuera">Fuera de section-body</a></h3></div></div>
+<section class="main-content"><article class="Content"><h2><a href="/main">Main</a></h2></article></section>
+<div data-pf-type="BlockPromo"><div class="listing-item"><a href="/listado">Listado de noticias largo</a></div></div>
+<div data-pf-type='BlockArticle' class="Card"><h2 class="Card-Title"><a href="/block">Block</a></h2></div>
+"""
+
+@pytest.mark.parametrize("backend", ["html.parser", "lxml", "selectolax"])
+@pytest.mark.parametrize("html", [GRID_HTML, generate_front_page("elespectador", n_cards=120, seed=3, nesting=2)])
+def test_match_selectors_equals_select(backend, html):
+    if backend not in available_backends():
+        pytest.skip(f"{backend} no está instalado")
+    soup = parse_html(html, backend)
+
+    matches = match_selectors(soup, ELESPECTADOR_CARD_SELECTORS)
+
+    for selector, matched in zip(ELESPECTADOR_CARD_SELECTORS, matches):
+        assert [m.get("href") or m.get_text() for m in matched] == [e.get("href") or e.get_text() for e in soup.select(selector)], selector
+
+def test_compile_selectors_prefilters_by_last_compound():
+    rules = compile_selectors(["div.section-body .row .col-md-4", "div[data-pf-type='BlockPromo']", "ul > li"])
+
+    grid = rules["*"][0]
+    assert grid.classes == frozenset(["col-md-4"]) and grid.needs_full_match
+    promo = rules["div"][0]
+    assert promo.attrs == (("data-pf-type", "=", "BlockPromo"),) and not promo.needs_full_match
+    assert rules["*"][1].selector == "ul > li" and rules["*"][1].needs_full_match
+
+def test_elespectador_does_not_select_per_selector():
+    html = generate_front_page("elespectador", n_cards=30, seed=1)
+    calls = []
+    original_select = BeautifulSoup.select
+
+    def counting_select(self, *args, **kwargs):
+        calls.append(args)
+        return original_select(self, *args, **kwargs)
+
+    BeautifulSoup.select = counting_select
+    try:
+        rows = extract_news_data(html, "https://www.elespectador.com/", "elespectador", backend="html.parser")
+    finally:
+        BeautifulSoup.select = original_select
+
+    assert rows
+    assert calls == []
@@ -0,0 +1,19 @@
+# Tabla "final" de Glue tal como la crea el crawler (CSV delimitado por '>')
+TABLE_INPUT = {
+    'Name': 'final',
+    'PartitionKeys': [{'Name': name, 'Type': 'string'} for name in ('periodico', 'year', 'month', 'day')],
+    'StorageDescriptor': {
+        'Columns': [{'Name': name, 'Type': 'string'} for name in ('category', 'title', 'link')],
+        'Location': 's3://parcial3luis/headlines/final/',
+        'SerdeInfo': {'SerializationLibrary': 'org.apache.hadoop.hive.serde2.lazy.LazySimpleSerDe',
+                      'Parameters': {'field.delim': '>'}},
+    },
+}
+
+def page(*slugs):
+    """Portada mínima de El Tiempo con un titular de Política por slug."""
+    articles = "".join(
+        f'<article data-category="Política"><a class="c-articulo__titulo__txt" href="/{slug}">Titular {slug}</a></article>'
+        for slug in slugs
+    )
+    return f"<html><body>{articles}</body></html>"
@@ -0,0 +1,72 @@
+import csv
+import io
+import pytest
+from punto2 import app, incremental
+from .helpers import page
+
+BASE = "https://www.eltiempo.com/"
+
+def put_snapshot(s3, key, html):
+    s3.put_object(Bucket="parcial3luis", Key=key, Body=html.encode("utf-8"))
+    return {"Records": [{"s3": {"bucket": {"name": "parcial3luis"}, "object": {"key": key}}}]}
+
+def partition_links(s3, prefix):
+    links = []
+    for obj in s3.list_objects_v2(Bucket="parcial3luis", Prefix=prefix).get("Contents", []):
+        body = s3.get_object(Bucket="parcial3luis", Key=obj["Key"])["Body"].read().decode("utf-8")
+        links += [row["link"] for row in csv.DictReader(io.StringIO(body), delimiter=">")]
+    return links
+
+@pytest.fixture
+def merge_mode(monkeypatch):
+    monkeypatch.setattr(app, "WRITE_MODE", "merge")
+
+def test_hash_encoding_round_trip():
+    hashes = {incremental.link_hash(f"https://x/{i}") for i in range(100)}
+
+    assert set(incremental.decode_hashes(incremental.encode_hashes(hashes))) == hashes
+    assert len(incremental.encode_hashes(hashes)) == 8 * 100
+
+def test_multiple_snapshots_per_day_only_append_new_headlines(s3_bucket, merge_mode):
+    key = "headlines/raw/eltiempo-2025-03-10.html"
+    partition = "headlines/final/periodico=eltiempo/year=2025/month=03/day=10/"
+
+    first = app.handler(put_snapshot(s3_bucket, key, page("a", "b")), None)
+    second = app.handler(put_snapshot(s3_bucket, key, page("b", "c")), None)
+    third = app.handler(put_snapshot(s3_bucket, key, page("a", "b", "c")), None)
+
+    assert first["summary"]["rows"] == 2
+    assert second["summary"]["rows"] == 1
+    assert third["summary"] == {"ok": 0, "skipped": 1, "error": 0, "rows": 0}
+    assert sorted(partition_links(s3_bucket, partition)) == [BASE + "a", BASE + "b", BASE + "c"]
+    assert len(s3_bucket.list_objects_v2(Bucket="parcial3luis", Prefix=partition)["Contents"]) == 2
+
+def test_days_are_independent(s3_bucket, merge_mode):
+    app.handler(put_snapshot(s3_bucket, "headlines/raw/eltiempo-2025-03-10.html", page("a")), None)
+    app.handler(put_snapshot(s3_bucket, "headlines/raw/eltiempo-2025-03-11.html", page("a")), None)
+
+    assert partition_links(s3_bucket, "headlines/final/periodico=eltiempo/year=2025/month=03/day=11/") == [BASE + "a"]
+
+def test_concurrent_index_update_is_retried(s3_bucket, merge_mode, monkeypatch):
+    index = incremental.index_key("eltiempo", "2025", "03", "10")
+    original_save = incremental.save_partition_index
+    calls = []
+
+    def racing_save(s3_client, bucket, key, hashes, etag):
+        if not calls:
+            # Otra ejecución escribe "b" entre la lectura y la escritura del índice
+            original_save(s3_client, bucket, key, {incremental.link_hash(BASE + "b")}, None)
+        calls.append(etag)
+        return original_save(s3_client, bucket, key, hashes, etag)
+
+    monkeypatch.setattr(incremental, "save_partition_index", racing_save)
+    rows, output_keys = app.merge_into_partition(
+        [{"category": "X", "title": "A", "link": BASE + "a"}, {"category": "X", "title": "B", "link": BASE + "b"}],
+        "eltiempo", "2025", "03", "10",
+    )
+
+    assert [row["link"] for row in rows] == [BASE + "a"]
+    assert len(calls) == 2
+    assert partition_links(s3_bucket, "headlines/final/periodico=eltiempo/") == [BASE + "a"]
+    seen, _ = incremental.load_partition_index(s3_bucket, "parcial3luis", index)
+    assert seen == {incremental.link_hash(BASE + "a"), incremental.link_hash(BASE + "b")}
@@ -0,0 +1,137 @@
+import pytest
+from benchmarks.synthetic import generate_front_page
+from punto2.app import extract_news_data
+from punto2.parsers import available_backends, parse_html
+
+FAST_BACKENDS = ["lxml", "selectolax"]
+
+# Casos borde: entidades, texto fuera de scripts, enlaces vacíos, tarjetas anidadas y de navegación
+EDGE_CASE_HTML = {
+    "eltiempo": """
+<html><body>
+    <article data-category="  Política  ">
+        <a class="c-articulo__titulo__txt otra-clase" href="/a.html"> Uno &amp; <b>dos</b><script>x()</script>&nbsp;</a>
+    </article>
+    <article data-category=""><a class="c-article-block__title-link" href="/b.html">Sin categoría</a></article>
+    <div class="c-article-block__content"><a class="c-article-block__title-link" href="/a.html">Duplicado</a></div>
+    <div class="c-main-section__cards__item"><a class="c-main-section__card__title" href>Sin enlace</a></div>
+</body></html>
+""",
+    "elespectador": """
+<html><body>
+    <div class="CardLayout-Container" data-category="Deportes">
+        <div class="Card"><h2 class="Card-Title big"><a href="/uno">Título uno</a></h2>
+            <div class="Card-SectionContainer"><h4 class="Card-Section"><a>Política</a></h4></div>
+        </div>
+    </div>
+    <div class="card-body">
+        <div class="footer-links"><a href="/footer">Enlace largo de pie de página</a></div>
+        <a href="/2">2</a><a href="/dos">Título dos suficientemente largo</a>
+    </div>
+    <div class="news-item"><h3><a href="/tres"></a></h3></div>
+    <section class="main-content"><article><h4><a href="/cuatro">Cuatro</a></h4><span class="section-name">Mundo</span></article></section>
+</body></html>
+""",
+}
+
+def backend_or_skip(backend):
+    if backend not in available_backends():
+        pytest.skip(f"{backend} no está instalado")
+    return backend
+
+@pytest.mark.parametrize("backend", FAST_BACKENDS)
+@pytest.mark.parametrize("site", ["eltiempo", "elespectador"])
+def test_backend_parity_edge_cases(backend, site):
+    backend_or_skip(backend)
+    expected = extract_news_data(EDGE_CASE_HTML[site], "https://www.ejemplo.com/", site, backend="html.parser")
+
+    assert extract_news_data(EDGE_CASE_HTML[site], "https://www.ejemplo.com/", site, backend=backend) == expected
+
+@pytest.mark.parametrize("backend", FAST_BACKENDS)
+@pytest.mark.parametrize("site", ["eltiempo", "elespectador"])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_backend_parity_synthetic_pages(backend, site, seed):
+    backend_or_skip(backend)
+    html = generate_front_page(site, n_cards=150, seed=seed, nesting=2)
+    expected = extract_news_data(html, "https://www.ejemplo.com/", site, backend="html.parser")
+
+    assert len(expected) > 50
+    assert extract_news_data(html, "https://www.ejemplo.com/", site, backend=backend) == expected
+
+def test_unknown_backend_falls_back_to_html_parser():
+    soup = parse_html("<a href='/x'>x</a>", backend="no-existe")
+
+    assert soup.find("a", href=True).get("href") == "/x"
+
+PARTIAL_BACKENDS = ["html.parser", "lxml"]
+
+FOOTER_HTML = """
+<html><body>
+    <footer class="site-footer"><div class="card-body"><a href="/pie">Enlace largo dentro del pie</a><a href="/otro">Otro texto</a></div></footer>
+    <div class="main-nav"><div class="news-item"><a href="/menu">Noticia dentro del menú</a></div></div>
+    <div class="news-item"><a href="/normal">Noticia normal con texto largo</a></div>
+</body></html>
+"""
+
+@pytest.mark.parametrize("backend", PARTIAL_BACKENDS)
+@pytest.mark.parametrize("site", ["eltiempo", "elespectador"])
+@pytest.mark.parametrize("seed", [0, 4])
+def test_partial_parse_parity(backend, site, seed):
+    backend_or_skip(backend)
+    for html in [generate_front_page(site, n_cards=150, seed=seed, nesting=2), EDGE_CASE_HTML[site], FOOTER_HTML]:
+        expected = extract_news_data(html, "https://www.ejemplo.com/", site, backend=backend, partial=False)
+
+        assert extract_news_data(html, "https://www.ejemplo.com/", site, backend=backend, partial=True) == expected
+
+def test_partial_parse_drops_everything_outside_containers():
+    html = generate_front_page("eltiempo", n_cards=30, seed=1)
+
+    soup = parse_html(html, "html.parser", containers=["article[data-category]", "div.c-main-section__cards__item"])
+
+    assert soup.find("script") is None and soup.find("style") is None and soup.find("nav") is None
+    assert {tag.name for tag in soup.find_all(True, recursive=False)} == {"article", "div"}
+
+ALL_BACKENDS = ["html.parser", "lxml", "selectolax"]
+LATIN1_HTML = """<html><head><meta charset="iso-8859-1"></head><body>
+    <article data-category="Política"><a class="c-articulo__titulo__txt" href="/a.html">Año nuevo en Bogotá</a></article>
+</body></html>"""
+
+@pytest.mark.parametrize("backend", ALL_BACKENDS)
+@pytest.mark.parametrize("seed", [0, 3])
+def test_bytes_parity_with_str(backend, seed):
+    backend_or_skip(backend)
+    html = generate_front_page("elespectador", n_cards=100, seed=seed, nesting=2) + "<p>“comillas” — ñ</p>"
+    expected = extract_news_data(html, "https://www.ejemplo.com/", "elespectador", backend=backend)
+
+    raw = html.encode("utf-8")
+    assert extract_news_data(raw, "https://www.ejemplo.com/", "elespectador", backend=backend) == expected
+    assert extract_news_data(memoryview(raw), "https://www.ejemplo.com/", "elespectador", backend=backend) == expected
+
+@pytest.mark.parametrize("backend", ALL_BACKENDS)
+def test_bytes_encoding_from_meta_and_metadata(backend):
+    backend_or_skip(backend)
+    expected = [{"category": "Política", "title": "Año nuevo en Bogotá", "link": "https://www.ejemplo.com/a.html"}]
+
+    latin1 = LATIN1_HTML.encode("iso-8859-1")
+    assert extract_news_data(latin1, "https://www.ejemplo.com/", "eltiempo", backend=backend) == expected
+    # El charset de los metadatos gana sobre un <meta> equivocado
+    utf8_with_wrong_meta = LATIN1_HTML.encode("utf-8")
+    assert extract_news_data(utf8_with_wrong_meta, "https://www.ejemplo.com/", "eltiempo", backend=backend,
+                             encoding="UTF-8") == expected
+
+def test_detect_encoding_order():
+    from punto2.parsers import detect_encoding
+
+    assert detect_encoding(b"\xef\xbb\xbf<meta charset='latin-1'>", "windows-1252") == "utf-8"
+    assert detect_encoding(b"<meta charset='latin-1'>", "windows-1252") == "cp1252"
+    assert detect_encoding(b"<meta http-equiv='Content-Type' content='text/html; charset=ISO-8859-1'>") == "iso8859-1"
+    assert detect_encoding(b"<meta charset='no-existe'><p>hola</p>", "base64") == "utf-8"
+    assert detect_encoding(b" " * 2048 + b"<meta charset='latin-1'>") == "utf-8"
+
+def test_bytearray_and_memoryview_parse_like_bytes():
+    raw = LATIN1_HTML.encode("iso-8859-1")
+    expected = extract_news_data(raw, "https://www.ejemplo.com/", "eltiempo")
+
+    assert expected
+    for buffer in (bytearray(raw), memoryview(raw)):
+        assert extract_news_data(buffer, "https://www.ejemplo.com/", "eltiempo") == expected
\ No newline at end of file
@@ -0,0 +1,102 @@
+import pytest
+from unittest.mock import patch
+from urllib.parse import quote_plus
+from punto2.app import write_partition_files
+from punto3 import app, partitions
+from .helpers import TABLE_INPUT
+
+ROWS = [{'category': 'Política', 'title': 'Titular', 'link': 'https://www.eltiempo.com/a'}]
+
+@pytest.fixture
+def glue(s3_bucket, monkeypatch):
+    pytest.importorskip("pyparsing") # Requerido por el mock de Glue de moto
+    partitions.clear_cache()
+    monkeypatch.setattr(app, "REGISTRATION_MODE", "partitions")
+    glue_client = app.get_glue_client()
+    glue_client.create_database(DatabaseInput={'Name': app.GLUE_DATABASE})
+    glue_client.create_table(DatabaseName=app.GLUE_DATABASE, TableInput=TABLE_INPUT)
+    yield glue_client
+    partitions.clear_cache()
+
+def s3_event(*keys):
+    # S3 entrega las llaves URL-encoded ('=' llega como %3D)
+    return {'Records': [{'s3': {'bucket': {'name': 'parcial3luis'}, 'object': {'key': quote_plus(key, safe='/')}}} for key in keys]}
+
+def registered(glue_client):
+    response = glue_client.get_partitions(DatabaseName=app.GLUE_DATABASE, TableName='final')
+    return {tuple(p['Values']): p['StorageDescriptor'] for p in response['Partitions']}
+
+def test_partition_from_key():
+    key = "headlines/final/periodico=eltiempo/year=2025/month=01/day=15/eltiempo-headlines-2025-01-15.csv"
+
+    assert partitions.partition_from_key(key, "b", app.PARTITION_TABLES) == (
+        'final', ('eltiempo', '2025', '01', '15'), "s3://b/headlines/final/periodico=eltiempo/year=2025/month=01/day=15/")
+    assert partitions.partition_from_key("headlines/new/periodico=x/year=2025/month=01/day=15/a.csv", "b", app.PARTITION_TABLES) is None
+
+@patch("punto3.app.schedule_crawl")
+def test_registers_new_partitions_once(mock_schedule_crawl, glue):
+    keys = write_partition_files(ROWS, 'eltiempo', '2025', '01', '15') + write_partition_files(ROWS, 'elespectador', '2025', '01', '15')
+
+    first = app.handler(s3_event(*keys), None)
+    second = app.handler(s3_event(keys[0]), None)
+
+    assert (first['registered'], first['existing'], first['crawler']) == (2, 0, None)
+    assert (second['registered'], second['existing']) == (0, 1)
+    mock_schedule_crawl.assert_not_called()
+    partitions_by_values = registered(glue)
+    descriptor = partitions_by_values[('eltiempo', '2025', '01', '15')]
+    assert descriptor['Location'] == "s3://parcial3luis/headlines/final/periodico=eltiempo/year=2025/month=01/day=15/"
+    assert descriptor['SerdeInfo']['Parameters']['field.delim'] == '>'
+    assert len(partitions_by_values) == 2
+
+@patch("punto3.app.schedule_crawl", return_value="started")
+def test_schema_change_falls_back_to_crawler(mock_schedule_crawl, glue):
+    keys = write_partition_files([dict(ROWS[0], is_new=True)], 'eltiempo', '2025', '01', '16')
+
+    result = app.handler(s3_event(*keys), None)
+
+    assert result['needs_crawler'] and result['crawler'] == "started"
+    mock_schedule_crawl.assert_called_once()
+    assert registered(glue) == {}
+
+@patch("punto3.app.schedule_crawl", return_value="started")
+def test_missing_table_falls_back_to_crawler(mock_schedule_crawl, glue):
+    glue.delete_table(DatabaseName=app.GLUE_DATABASE, Name='final')
+    keys = write_partition_files(ROWS, 'eltiempo', '2025', '01', '17')
+
+    result = app.handler({'bucket': 'parcial3luis', 'keys': keys}, None)
+
+    assert result['needs_crawler'] and result['registered'] == 0
+    mock_schedule_crawl.assert_called_once()
+
+@patch("punto3.app.schedule_crawl", return_value="started")
+def test_crawler_mode_schedules_the_crawler(mock_schedule_crawl, monkeypatch):
+    monkeypatch.setattr(app, "REGISTRATION_MODE", "crawler")
+
+    result = app.handler(s3_event("headlines/final/periodico=eltiempo/year=2025/month=01/day=15/x.csv"), None)
+
+    assert result == {'crawler': "started"}
+    mock_schedule_crawl.assert_called_once_with(None)
+
+@patch("punto3.app.schedule_crawl")
+def test_parquet_output_is_delivered_and_registered(mock_schedule_crawl, glue, monkeypatch):
+    pytest.importorskip("pyarrow")
+    from benchmarks.pipeline_load import load_triggers, triggered_stages
+    parquet_table = dict(TABLE_INPUT, Name='parquet', StorageDescriptor=dict(
+        TABLE_INPUT['StorageDescriptor'], Location='s3://parcial3luis/headlines/parquet/'))
+    glue.create_table(DatabaseName=app.GLUE_DATABASE, TableInput=parquet_table)
+    monkeypatch.setattr("punto2.app.OUTPUT_FORMATS", ["csv", "parquet"])
+    keys = write_partition_files(ROWS, 'eltiempo', '2025', '01', '15')
+    parquet_key = next(key for key in keys if key.endswith('.parquet'))
+
+    # La notificación de headlines/parquet/ de zappa_settings.json entrega la llave a punto3
+    assert triggered_stages(load_triggers(), parquet_key, "ObjectCreated:Put") == ["punto3"]
+    event = s3_event(parquet_key)
+    event['Records'][0].update(eventSource='aws:s3', eventName='ObjectCreated:Put', awsRegion='sa-east-1')
+    result = app.handler(event, None)
+
+    assert (result['registered'], result['crawler']) == (1, None)
+    response = glue.get_partitions(DatabaseName=app.GLUE_DATABASE, TableName='parquet')
+    assert [p['StorageDescriptor']['Location'] for p in response['Partitions']] == [
+        "s3://parcial3luis/headlines/parquet/periodico=eltiempo/year=2025/month=01/day=15/"]
+    assert registered(glue) == {} # El CSV tiene su propia notificación
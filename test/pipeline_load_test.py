@@ -0,0 +1,33 @@
+import pytest
+from benchmarks import pipeline_load
+
+pytest.importorskip("pyparsing") # moto lo necesita para Glue
+
+def test_percentile_nearest_rank():
+    values = [0.5, 0.1, 0.4, 0.2, 0.3]
+
+    assert pipeline_load.percentile(values, 50) == 0.3
+    assert pipeline_load.percentile(values, 99) == 0.5
+    assert pipeline_load.percentile([], 90) == 0.0
+
+def test_routes_follow_the_zappa_triggers():
+    triggers = pipeline_load.load_triggers()
+    final = "headlines/final/periodico=eltiempo/year=2025/month=01/day=01/eltiempo-headlines-2025-01-01.csv"
+    route = lambda key, event_name="ObjectCreated:Put": pipeline_load.triggered_stages(triggers, key, event_name)
+
+    assert route("headlines/raw/eltiempo-2025-01-01.html") == ["punto2"]
+    assert route(final) == ["punto3"]
+    # Un CSV grande se sube por partes: también debe llegar a punto3
+    assert route(final, "ObjectCreated:CompleteMultipartUpload") == ["punto3"]
+    assert route("headlines/state/results/eltiempo-2025-01-01.html.json") == []
+    assert route(final, "ObjectCreated:Copy") == []
+
+def test_every_write_drives_the_next_stage():
+    result = pipeline_load.run(sites=2, days=2, size_mb=0.05, concurrency=2)
+    stages = result["stages"]
+
+    assert (result["pages"], result["glue_partitions"]) == (4, 4)
+    assert result["rows"] > 0
+    assert [stages[stage]["invocations"] for stage in pipeline_load.STAGES] == [2, 4, 4]
+    assert all(stats["errors"] == 0 for stats in stages.values())
+    assert stages["punto2"]["p50_ms"] <= stages["punto2"]["p99_ms"]
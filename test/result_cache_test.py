@@ -0,0 +1,81 @@
+import time
+from unittest.mock import patch
+
+import pytest
+from punto1 import app as app1
+from punto2 import app, result_cache
+from .helpers import page
+
+KEY = "headlines/raw/eltiempo-2025-04-02.html"
+OUTPUT = "headlines/final/periodico=eltiempo/year=2025/month=04/day=02/eltiempo-headlines-2025-04-02.csv"
+
+def event(key=KEY):
+    return {"Records": [{"s3": {"bucket": {"name": "parcial3luis"}, "object": {"key": key}}}]}
+
+@pytest.fixture
+def cache_on(monkeypatch):
+    monkeypatch.setattr(app, "RESULT_CACHE", True)
+    result_cache.clear_cache()
+    yield
+    result_cache.clear_cache()
+
+def process():
+    with patch("punto2.app.download_from_s3", wraps=app.download_from_s3) as download:
+        result = app.handler(event(), None)["results"][0]
+    return result, download.call_count
+
+def test_duplicate_event_short_circuits(s3_bucket, cache_on):
+    s3_bucket.put_object(Bucket="parcial3luis", Key=KEY, Body=page("a", "b").encode("utf-8"))
+
+    first, first_downloads = process()
+    start = time.perf_counter()
+    second, second_downloads = process()
+    elapsed = time.perf_counter() - start
+
+    assert (first["status"], first["rows"], first_downloads) == ("ok", 2, 1)
+    assert second == {"key": KEY, "status": "skipped", "rows": 0, "output_keys": [OUTPUT], "error": "sin cambios (caché)"}
+    assert second_downloads == 0
+    assert elapsed < 0.5
+
+def test_identical_reupload_hits_by_content_hash(s3_bucket, cache_on):
+    # Con gzip el cuerpo (y el ETag) cambia en cada subida; el sha256 de los metadatos no
+    assert app1.upload_to_s3(page("a"), KEY, compression="gzip")
+    etag = s3_bucket.head_object(Bucket="parcial3luis", Key=KEY)["ETag"]
+    process()
+    time.sleep(1.1) # gzip guarda la hora en segundos
+    assert app1.upload_to_s3(page("a"), KEY, compression="gzip")
+    assert s3_bucket.head_object(Bucket="parcial3luis", Key=KEY)["ETag"] != etag
+
+    result, downloads = process()
+
+    assert (result["status"], downloads) == ("skipped", 0)
+
+def test_changed_content_rules_or_missing_output_reprocess(s3_bucket, cache_on, monkeypatch):
+    s3_bucket.put_object(Bucket="parcial3luis", Key=KEY, Body=page("a").encode("utf-8"))
+    process()
+
+    s3_bucket.put_object(Bucket="parcial3luis", Key=KEY, Body=page("a", "b").encode("utf-8"))
+    assert process()[0]["rows"] == 2
+
+    monkeypatch.setattr(app, "EXTRACTION_RULES_VERSION", app.EXTRACTION_RULES_VERSION + 1)
+    assert process()[0]["status"] == "ok"
+    assert process()[0]["status"] == "skipped"
+
+    s3_bucket.delete_object(Bucket="parcial3luis", Key=OUTPUT)
+    assert process()[0]["status"] == "ok"
+
+def test_cache_errors_fall_back_to_processing(s3_bucket, cache_on):
+    s3_bucket.put_object(Bucket="parcial3luis", Key=KEY, Body=page("a").encode("utf-8"))
+
+    with patch("punto2.result_cache.source_id", side_effect=RuntimeError("S3 lento")):
+        result, downloads = process()
+
+    assert (result["status"], downloads) == ("ok", 1)
+    assert "Contents" not in s3_bucket.list_objects_v2(Bucket="parcial3luis", Prefix=result_cache.S3_RESULTS_PREFIX)
+
+def test_rules_version_depends_on_settings():
+    result_cache.clear_cache()
+    base = result_cache.rules_version(app.cache_settings())
+
+    assert result_cache.rules_version(app.cache_settings()) == base
+    assert result_cache.rules_version(dict(app.cache_settings(), formats=["csv", "parquet"])) != base
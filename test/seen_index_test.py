@@ -0,0 +1,79 @@
+import csv
+import io
+import pytest
+from punto2 import app, seen_index
+from punto2.incremental import link_hash
+from .helpers import page
+
+BASE = "https://www.eltiempo.com/"
+
+def process(s3, date, *slugs):
+    key = f"headlines/raw/eltiempo-{date}.html"
+    s3.put_object(Bucket="parcial3luis", Key=key, Body=page(*slugs).encode("utf-8"))
+    return app.handler({"Records": [{"s3": {"bucket": {"name": "parcial3luis"}, "object": {"key": key}}}]}, None)
+
+def read_csv(s3, key):
+    body = s3.get_object(Bucket="parcial3luis", Key=key)["Body"].read().decode("utf-8")
+    return list(csv.DictReader(io.StringIO(body), delimiter=">"))
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    seen_index.clear_cache()
+    yield
+    seen_index.clear_cache()
+
+def test_index_merge_keeps_earliest_day_and_round_trips():
+    index = seen_index.SeenLinkIndex().merged_with({5: 20250102, 1: 20250101})
+    index = index.merged_with({5: 20250101, 9: 20250103})
+
+    restored = seen_index.SeenLinkIndex.from_bytes(index.to_bytes())
+    assert list(restored.hashes) == [1, 5, 9]
+    assert [restored.first_seen(h) for h in (1, 5, 9, 7)] == [20250101, 20250101, 20250103, None]
+
+def test_index_is_compact_for_many_links():
+    entries = {link_hash(f"{BASE}noticia-{i}"): 20250101 for i in range(200000)}
+    index = seen_index.SeenLinkIndex().merged_with(entries)
+
+    assert len(index.to_bytes()) == 12 * 200000
+    assert index.first_seen(link_hash(f"{BASE}noticia-123456")) == 20250101
+    assert index.first_seen(link_hash(f"{BASE}otra")) is None
+
+def test_tag_mode_marks_new_headlines_across_days(s3_bucket, monkeypatch):
+    monkeypatch.setattr(app, "SEEN_INDEX_MODE", "tag")
+    partition = "headlines/final/periodico=eltiempo/year=2025/month=03/day={day}/eltiempo-headlines-2025-03-{day}.csv"
+
+    process(s3_bucket, "2025-03-10", "a", "b")
+    process(s3_bucket, "2025-03-11", "b", "c")
+    day_two = read_csv(s3_bucket, partition.format(day="11"))
+    process(s3_bucket, "2025-03-11", "b", "c") # Reprocesar el mismo día no cambia las marcas
+
+    assert [row["is_new"] for row in read_csv(s3_bucket, partition.format(day="10"))] == ["True", "True"]
+    assert [(row["link"], row["is_new"]) for row in day_two] == [(BASE + "b", "False"), (BASE + "c", "True")]
+    assert read_csv(s3_bucket, partition.format(day="11")) == day_two
+
+def test_stream_mode_writes_only_new_headlines(s3_bucket, monkeypatch):
+    monkeypatch.setattr(app, "SEEN_INDEX_MODE", "stream")
+
+    process(s3_bucket, "2025-03-10", "a", "b")
+    response = process(s3_bucket, "2025-03-11", "b", "c")
+
+    new_key = "headlines/new/periodico=eltiempo/year=2025/month=03/day=11/eltiempo-headlines-2025-03-11.csv"
+    assert new_key in response["results"][0]["output_keys"]
+    assert [row["link"] for row in read_csv(s3_bucket, new_key)] == [BASE + "c"]
+    final_rows = read_csv(s3_bucket, "headlines/final/periodico=eltiempo/year=2025/month=03/day=11/eltiempo-headlines-2025-03-11.csv")
+    assert list(final_rows[0].keys()) == ["category", "title", "link"]
+
+def test_index_is_cached_and_revalidated(s3_bucket):
+    assert seen_index.record_links(s3_bucket, "parcial3luis", "eltiempo", {1: 20250101})
+    first = seen_index.load_seen_index(s3_bucket, "parcial3luis", "eltiempo")
+
+    # Sin cambios en S3 la revalidación responde 304 y se reutiliza el índice en memoria
+    assert seen_index.load_seen_index(s3_bucket, "parcial3luis", "eltiempo") is first
+
+    # Otra ejecución actualiza el objeto: la revalidación trae la versión nueva
+    updated = first.merged_with({2: 20250102})
+    s3_bucket.put_object(Bucket="parcial3luis", Key=seen_index.seen_key("eltiempo"), Body=updated.to_bytes())
+    assert list(seen_index.load_seen_index(s3_bucket, "parcial3luis", "eltiempo").hashes) == [1, 2]
+
+    assert seen_index.record_links(s3_bucket, "parcial3luis", "eltiempo", {3: 20250103})
+    assert list(seen_index.load_seen_index(s3_bucket, "parcial3luis", "eltiempo").hashes) == [1, 2, 3]
@@ -0,0 +1,91 @@
+import json
+
+import pytest
+from benchmarks.synthetic import generate_front_page
+from punto2 import app, selector_profile
+
+def write_snapshots(root, pages):
+    raw_dir = root / "headlines" / "raw"
+    raw_dir.mkdir(parents=True, exist_ok=True)
+    for filename, html in pages.items():
+        (raw_dir / filename).write_text(html, encoding="utf-8")
+    return lambda: selector_profile.iter_local_snapshots(str(root))
+
+@pytest.fixture
+def synthetic_snapshots(tmp_path):
+    pages = {}
+    for day in range(1, 4):
+        for site in ("eltiempo", "elespectador"):
+            pages[f"{site}-2025-02-{day:02d}.html"] = generate_front_page(site, n_cards=60, seed=day, nesting=2)
+    return write_snapshots(tmp_path, pages)
+
+@pytest.fixture
+def reset_rules(monkeypatch):
+    monkeypatch.setattr(app, "_active_rules", None)
+    yield
+    app._active_rules = None
+
+def test_profile_counts_matches_and_rows(synthetic_snapshots):
+    report, outputs = selector_profile.profile_snapshots(synthetic_snapshots())
+    rules = report["rules"]
+
+    assert report["pages"] == {"elespectador": 3, "eltiempo": 3}
+    assert rules["elespectador div.news-card"]["matches"] == 0
+    assert rules["elespectador div.Card"]["matches"] > 0 and rules["elespectador div.Card"]["rows"] == 0
+    assert rules["eltiempo link c-articulo__titulo__txt"]["pages_with_rows"] == 3
+    for site in ("eltiempo", "elespectador"):
+        profiled_rows = sum(stats["rows"] for rule, stats in rules.items()
+                            if rule.startswith(site) and " link " not in rule)
+        assert profiled_rows == sum(len(rows) for key, rows in outputs.items() if site in key)
+
+def test_optimize_prunes_dead_rules_and_rules_file_is_used(synthetic_snapshots, tmp_path, reset_rules, monkeypatch):
+    report = selector_profile.optimize(synthetic_snapshots)
+    accepted = report["accepted"]
+
+    assert "div.news-card" not in accepted["elespectador"]["card_selectors"]
+    assert "div.Card" not in accepted["elespectador"]["card_selectors"]
+    assert accepted["eltiempo"]["link_classes"] == ["c-articulo__titulo__txt"]
+    assert report["candidates"][-1]["mismatches"] == []
+
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(selector_profile.rules_file(report)), encoding="utf-8")
+    monkeypatch.setattr(app, "SELECTOR_RULES_PATH", str(path))
+    assert app.active_rules()["elespectador"] == accepted["elespectador"]
+    for key, periodico, content, encoding in synthetic_snapshots():
+        base_url = selector_profile.BASE_URLS[periodico]
+        assert app.extract_news_data(content, base_url, periodico) == \
+            app.extract_news_data(content, base_url, periodico, rules=app.default_rules())
+
+def test_reordering_that_changes_output_is_rejected(tmp_path):
+    only_second = "".join(
+        f'<article data-category="X"><a class="c-article-block__title-link" href="/b{i}">B {i}</a></article>'
+        for i in range(5)
+    )
+    both = ('<article data-category="X"><a class="c-article-block__title-link" href="/b">B</a>'
+            '<a class="c-articulo__titulo__txt" href="/a">A</a></article>')
+    load = write_snapshots(tmp_path, {"eltiempo-2025-02-01.html": f"<html><body>{only_second}{both}</body></html>"})
+
+    report = selector_profile.optimize(load)
+
+    assert report["candidates"][0]["rules"]["eltiempo"]["link_classes"][0] == "c-article-block__title-link"
+    assert report["candidates"][0]["mismatches"] == ["headlines/raw/eltiempo-2025-02-01.html"]
+    assert report["accepted"]["eltiempo"]["link_classes"] == ["c-articulo__titulo__txt", "c-article-block__title-link"]
+
+def test_stale_rules_file_is_ignored(tmp_path):
+    stale = dict(app.default_rules(), baseline={"elespectador": {"card_selectors": ["div.Card"]}})
+    stale["elespectador"] = {"card_selectors": ["div.Card"]}
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(stale), encoding="utf-8")
+
+    assert app.load_rules(str(path)) == app.default_rules()
+    assert app.load_rules(str(tmp_path / "no-existe.json")) == app.default_rules()
+
+def test_cli_writes_rules_only_with_enough_snapshots(synthetic_snapshots, tmp_path):
+    rules_path = tmp_path / "rules.json"
+    args = ["--local", str(tmp_path), "--write-rules", str(rules_path), "--report", str(tmp_path / "report.json")]
+
+    assert selector_profile.main(args + ["--min-snapshots", "10"]) == 1
+    assert not rules_path.exists()
+    assert selector_profile.main(args + ["--min-snapshots", "6"]) == 0
+    assert json.loads(rules_path.read_text(encoding="utf-8"))["snapshots"] == 6
+    assert json.loads((tmp_path / "report.json").read_text(encoding="utf-8"))["accepted"] is not None
@@ -0,0 +1,77 @@
+import io
+import pytest
+from unittest.mock import patch
+from punto2 import app, streaming
+from benchmarks.synthetic import generate_front_page
+
+def synthetic_rows(n, on_row=None):
+    for i in range(n):
+        if on_row:
+            on_row(i)
+        yield {'category': f"Categoría {i % 7}", 'title': f"Titular número {i} con > y \"comillas\"" + " relleno" * 8,
+               'link': f"https://www.eltiempo.com/seccion/noticia-{i}"}
+
+def test_csv_stream_matches_rows_to_csv():
+    rows = list(synthetic_rows(5000))
+    sink = io.BytesIO()
+    writer = streaming.CsvStreamWriter(sink, app.CSV_FIELDNAMES)
+    for row in rows:
+        writer.write(row)
+    writer.close()
+
+    assert sink.getvalue() == app.rows_to_csv(rows).encode('utf-8')
+
+def test_parquet_stream_matches_rows_to_parquet():
+    pq = pytest.importorskip("pyarrow.parquet")
+    rows = list(synthetic_rows(2500))
+    sink = io.BytesIO()
+    writer = streaming.ParquetStreamWriter(sink, app.rows_to_table, row_group_size=1000)
+    for row in rows:
+        writer.write(row)
+    writer.close()
+
+    table = pq.read_table(io.BytesIO(sink.getvalue()))
+    assert table.to_pylist() == pq.read_table(io.BytesIO(app.rows_to_parquet(rows))).to_pylist()
+    assert pq.ParquetFile(io.BytesIO(sink.getvalue())).num_row_groups == 3
+
+def test_large_output_uploads_parts_before_extraction_ends(s3_bucket, monkeypatch):
+    monkeypatch.setattr(app, "MULTIPART_PART_SIZE", streaming.MIN_PART_SIZE)
+    uploads_in_progress = []
+
+    def check_progress(i):
+        if i == 60000: # ~10 MB de CSV ya producidos
+            response = s3_bucket.list_multipart_uploads(Bucket="parcial3luis")
+            uploads_in_progress.extend(response.get('Uploads', []))
+
+    row_count, keys = app.stream_partition_files(synthetic_rows(90000, check_progress), 'eltiempo', '2025', '01', '15')
+
+    assert row_count == 90000 and len(uploads_in_progress) == 1
+    body = s3_bucket.get_object(Bucket="parcial3luis", Key=keys[0])['Body'].read()
+    assert body == app.rows_to_csv(list(synthetic_rows(90000))).encode('utf-8')
+    assert s3_bucket.list_multipart_uploads(Bucket="parcial3luis").get('Uploads', []) == []
+
+def test_failed_upload_aborts_and_cleans_up(s3_bucket, monkeypatch):
+    monkeypatch.setattr(app, "MULTIPART_PART_SIZE", streaming.MIN_PART_SIZE)
+    client = app.get_s3_client()
+
+    with patch.object(client, "complete_multipart_upload", side_effect=RuntimeError("S3 caído")):
+        row_count, keys = app.stream_partition_files(synthetic_rows(50000), 'eltiempo', '2025', '01', '15')
+
+    assert keys is None
+    assert s3_bucket.list_multipart_uploads(Bucket="parcial3luis").get('Uploads', []) == []
+    assert 'Contents' not in s3_bucket.list_objects_v2(Bucket="parcial3luis", Prefix="headlines/final/")
+
+@pytest.mark.parametrize("site", ["eltiempo", "elespectador"])
+def test_streaming_handler_output_matches_list_path(s3_bucket, monkeypatch, site):
+    raw_key = f"headlines/raw/{site}-2025-01-15.html"
+    s3_bucket.put_object(Bucket="parcial3luis", Key=raw_key, Body=generate_front_page(site, n_cards=300, seed=4).encode('utf-8'))
+    event = {"Records": [{"s3": {"bucket": {"name": "parcial3luis"}, "object": {"key": raw_key}}}]}
+    outputs = []
+    for stream_output in (False, True):
+        monkeypatch.setattr(app, "STREAM_OUTPUT", stream_output)
+        response = app.handler(event, None)
+        key = response["results"][0]["output_keys"][0]
+        outputs.append((response["summary"], s3_bucket.get_object(Bucket="parcial3luis", Key=key)['Body'].read()))
+
+    assert outputs[0] == outputs[1]
+    assert outputs[1][0]["rows"] > 100
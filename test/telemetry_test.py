@@ -0,0 +1,69 @@
+import json
+import pytest
+from common import telemetry
+from punto2.app import ELESPECTADOR_CARD_SELECTORS, extract_news_data
+
+ESPECTADOR_HTML = """
+<div class="Card"><h2 class="Card-Title"><a href="/uno">Primera noticia</a></h2></div>
+<div class="Card"><h2 class="Card-Title"><a href="/dos">Segunda noticia</a></h2></div>
+<div class="news-card"><h3><a href="/tres">Tercera noticia</a></h3></div>
+"""
+
+@pytest.fixture
+def fresh_metrics(monkeypatch):
+    metrics = telemetry.Metrics(enabled=True)
+    monkeypatch.setattr(telemetry, "metrics", metrics)
+    monkeypatch.setattr(telemetry, "LOG_FORMAT", "json")
+    return metrics
+
+def lines(capsys):
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines() if line]
+
+def test_log_is_structured_and_level_gated(monkeypatch, capsys):
+    monkeypatch.setattr(telemetry, "LOG_FORMAT", "json")
+    monkeypatch.setattr(telemetry, "LOG_LEVEL", "WARNING")
+    telemetry.info("no se escribe")
+    telemetry.warning("sí se escribe", key="a/b.html")
+
+    assert lines(capsys) == [{"level": "WARNING", "message": "sí se escribe", "key": "a/b.html"}]
+
+def test_flush_emits_one_emf_document_per_dimension_set(fresh_metrics, capsys):
+    with telemetry.span("download"):
+        pass
+    telemetry.count("rows", 2, Selector="div.Card")
+    telemetry.count("rows", 1, Selector="div.Card")
+
+    documents = telemetry.flush_metrics(Function="punto2")
+
+    assert lines(capsys) == documents
+    by_dimensions = {tuple(d["_aws"]["CloudWatchMetrics"][0]["Dimensions"][0]): d for d in documents}
+    assert by_dimensions[("Function",)]["download_ms"] >= 0
+    assert by_dimensions[("Function",)]["_aws"]["CloudWatchMetrics"][0]["Metrics"] == [{"Name": "download_ms", "Unit": "Milliseconds"}]
+    assert by_dimensions[("Function", "Selector")]["rows"] == 3
+    assert telemetry.flush_metrics() == [] # flush reinicia lo acumulado
+
+def test_noop_mode_records_nothing(monkeypatch, capsys):
+    monkeypatch.setattr(telemetry, "metrics", telemetry.Metrics(enabled=False))
+    with telemetry.span("parse"):
+        telemetry.count("rows", 5)
+
+    assert telemetry.flush_metrics(Function="punto2") == []
+    assert capsys.readouterr().out == ""
+
+def test_extraction_counts_rows_per_selector_without_row_logs(fresh_metrics, monkeypatch, capsys):
+    monkeypatch.setattr(telemetry, "LOG_LEVEL", "INFO")
+    rows = extract_news_data(ESPECTADOR_HTML, "https://www.elespectador.com/", "elespectador")
+
+    output = capsys.readouterr().out
+    assert len(rows) == 3
+    assert "Noticia extraída" not in output
+    counts = {dict(dims)["Selector"]: value for (dims, name), value in fresh_metrics.snapshot().items() if name == "rows"}
+    assert set(counts) == set(ELESPECTADOR_CARD_SELECTORS)
+    assert counts["div.Card"] == 2 and counts["div.news-card"] == 1 and sum(counts.values()) == 3
+
+def test_row_logs_only_in_debug(fresh_metrics, monkeypatch, capsys):
+    monkeypatch.setattr(telemetry, "LOG_LEVEL", "DEBUG")
+    extract_news_data(ESPECTADOR_HTML, "https://www.elespectador.com/", "elespectador")
+
+    row_logs = [line for line in lines(capsys) if line["message"] == "Noticia extraída"]
+    assert [line["link"] for line in row_logs] == ["https://www.elespectador.com/uno", "https://www.elespectador.com/dos", "https://www.elespectador.com/tres"]